@@ -1,5 +1,13 @@
+import time
+
+import startup_profile
+
+# Con SCAVENGER_IMPORT_PROFILE se cronometran las importaciones a partir de
+# aquí (ver startup_profile.py).
+INICIO_SCRIPT = time.perf_counter()
+startup_profile.install()
+
 import streamlit as st
-from PIL import Image 
 
 from pathlib import Path
 
@@ -21,7 +29,8 @@ if logo_path is None:
     )
     black_logo = None
 else:
-    black_logo = Image.open(logo_path)
+    # set_page_config y st.image aceptan la ruta: no hace falta cargar PIL.
+    black_logo = str(logo_path)
 
 st.set_page_config(
     page_title="Market Scavenger Hunt",
@@ -128,4 +137,6 @@ elif seccion == "🗓️ Estrategias laterales":
 elif seccion == "⚡ Estrategias de movimiento fuerte":
 
     from options.payoff_movement_streamlit import dashboard_app_movement
-    dashboard_app_movement()
\ No newline at end of file
+    dashboard_app_movement()
+
+startup_profile.write_report(seccion, time.perf_counter() - INICIO_SCRIPT)
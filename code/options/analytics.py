@@ -0,0 +1,111 @@
+"""
+Métricas cerradas de una estrategia a vencimiento a partir de sus patas:
+breakevens, máximo beneficio, máxima pérdida y pendientes de las colas.
+
+El payoff a vencimiento es lineal a trozos con codos en los strikes, así que
+los extremos solo pueden estar en un strike, en S = 0 o en el infinito (según
+la pendiente de la cola derecha), y los breakevens se obtienen interpolando
+en el tramo donde cambia el signo. Sin rejilla: unos microsegundos por
+estrategia, apto para escanear todo un universo.
+"""
+import math
+import time
+from dataclasses import dataclass
+
+from .strategy import payoff_kinks, payoff_zeros
+
+
+@dataclass(frozen=True)
+class StrategyMetrics:
+    """
+    - cost: prima neta (> 0 débito, < 0 crédito)
+    - max_profit / max_loss: inf / -inf si no están acotados
+    - breakevens: precios S >= 0 con payoff 0, en orden
+    - slope_left / slope_right: pendiente del payoff por debajo del menor
+      strike y por encima del mayor (contratos netos)
+    """
+    cost: float
+    max_profit: float
+    max_loss: float
+    breakevens: tuple
+    slope_left: float
+    slope_right: float
+
+    @property
+    def reward_risk(self):
+        """
+        Máximo beneficio / máxima pérdida (inf si no se puede perder y hay
+        algo que ganar; nan si el payoff es 0 en todas partes).
+        """
+        if self.max_loss >= 0:
+            return math.inf if self.max_profit > 0 else math.nan
+        return self.max_profit / -self.max_loss
+
+    def breakeven_distance(self, spot):
+        """
+        Distancia relativa del spot al breakeven más cercano (nan si no hay).
+        """
+        if not self.breakevens:
+            return math.nan
+        return min(abs(be / spot - 1) for be in self.breakevens)
+
+
+def strategy_metrics(legs):
+    """
+    Métricas exactas de una estrategia con todas sus patas a vencimiento.
+    """
+    if not legs:
+        raise ValueError("La estrategia debe tener al menos una pata.")
+    if any(leg.expiry > 0 for leg in legs):
+        raise ValueError("Las métricas cerradas requieren todas las patas a vencimiento.")
+
+    strikes, values, slope_left, slope_right = payoff_kinks(legs)
+
+    # Candidatos a extremo: los strikes y S = 0 (la cola izquierda es una recta).
+    candidates = values + [values[0] - slope_left * strikes[0]]
+    max_profit = math.inf if slope_right > 0 else max(candidates)
+    max_loss = -math.inf if slope_right < 0 else min(candidates)
+
+    return StrategyMetrics(
+        cost=sum(leg.side * leg.qty * leg.premium for leg in legs),
+        max_profit=max_profit,
+        max_loss=max_loss,
+        breakevens=tuple(payoff_zeros(strikes, values, slope_left, slope_right)),
+        slope_left=slope_left,
+        slope_right=slope_right,
+    )
+
+
+if __name__ == "__main__":
+    import numpy as np
+
+    from .strategy import CALL, PUT, Leg, evaluate_legs
+
+    estrategias = {
+        "Call Ladder": [Leg(1, 1, CALL, 100, 4.0), Leg(-1, 1, CALL, 105, 2.0), Leg(1, 1, CALL, 110, 0.8)],
+        "Call Butterfly": [Leg(1, 1, CALL, 95, 7.0), Leg(-1, 2, CALL, 100, 4.0), Leg(1, 1, CALL, 105, 2.0)],
+        "Long Condor": [Leg(1, 1, CALL, 90, 11.0), Leg(-1, 1, CALL, 95, 7.0),
+                        Leg(-1, 1, CALL, 105, 2.0), Leg(1, 1, CALL, 110, 0.8)],
+        "Long Box": [Leg(1, 1, CALL, 95, 7.0), Leg(-1, 1, CALL, 105, 2.0),
+                     Leg(1, 1, PUT, 105, 6.5), Leg(-1, 1, PUT, 95, 1.8)],
+        "Long Straddle": [Leg(1, 1, CALL, 100, 4.0), Leg(1, 1, PUT, 100, 3.9)],
+        "Long Strangle": [Leg(1, 1, CALL, 105, 2.0), Leg(1, 1, PUT, 95, 1.8)],
+        "Long Guts": [Leg(1, 1, CALL, 95, 7.0), Leg(1, 1, PUT, 105, 6.5)],
+        "Put Backspread": [Leg(-1, 1, PUT, 100, 3.9), Leg(1, 2, PUT, 95, 1.8)],
+    }
+
+    S = np.linspace(0, 300, 300_001)
+    for nombre, legs in estrategias.items():
+        m = strategy_metrics(legs)
+        payoff = evaluate_legs(legs, S)
+        print(f"{nombre:15s} coste {m.cost:6.2f} | máx {m.max_profit:7.2f} (rejilla {payoff.max():7.2f}) | "
+              f"mín {m.max_loss:7.2f} (rejilla {payoff.min():7.2f}) | "
+              f"breakevens {[round(be, 2) for be in m.breakevens]}")
+
+    repeticiones = 10_000
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for legs in estrategias.values():
+            strategy_metrics(legs)
+    t = (time.perf_counter() - inicio) / (repeticiones * len(estrategias))
+    print(f"strategy_metrics: {t * 1e6:.1f} µs por estrategia")
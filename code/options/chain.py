@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+
+from .pricing import implied_volatility
+
+# Esquema interno de la cadena: nombre en inglés → (etiqueta de Yahoo / de
+# pantalla, tipo). Los nombres en español solo se usan al leer la tabla
+# descargada y al pintarla.
+SCHEMA = {
+    "contract":      ("Nombre del contrato", object),
+    "last_trade":    ("Fecha de última transacción (GMT-5)", object),
+    "strike":        ("Precio de ejercicio", np.float64),
+    "last":          ("Último precio", np.float64),
+    "bid":           ("Oferta", np.float64),
+    "ask":           ("Demanda", np.float64),
+    "change":        ("Cambio", np.float32),
+    "change_pct":    ("Cambio de %", np.float32),
+    "volume":        ("Volumen", np.float32),
+    "open_interest": ("Interés abierto", np.float32),
+    "iv":            ("Volatilidad implícita", np.float64),
+}
+LABELS = {label: name for name, (label, _) in SCHEMA.items()}
+
+# Columnas que se enseñan al mostrar los strikes elegidos.
+SELECTION_LABELS = ["Precio de ejercicio", "Último precio", "Volatilidad implícita"]
+
+
+def _column(df, label, dtype):
+    if label not in df:
+        return np.full(len(df), None if dtype is object else np.nan, dtype=dtype)
+    if dtype is object:
+        return df[label].to_numpy(dtype=object)
+    values = df[label]
+    if not pd.api.types.is_numeric_dtype(values):
+        # Columnas con "-" se quedan como texto con separador de miles ("1,234").
+        values = values.astype(str).str.replace(",", "", regex=False)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=dtype)
+
+
+class OptionChain:
+    """
+    Cadena de opciones (CALLs o PUTs de un vencimiento) en formato columnar:
+    un array de numpy tipado por columna del esquema, ordenado por strike una
+    sola vez. Las búsquedas (más cercano, vecinos, exacto) son O(log n) con
+    searchsorted y las filas se devuelven como vistas (OptionRow) sin copiar.
+    """
+
+    __slots__ = tuple(SCHEMA)
+
+    def __init__(self, df):
+        strike = _column(df, SCHEMA["strike"][0], np.float64)
+        order = np.argsort(strike, kind="mergesort")
+        for name, (label, dtype) in SCHEMA.items():
+            setattr(self, name, _column(df, label, dtype)[order])
+
+    def __len__(self):
+        return len(self.strike)
+
+    @property
+    def empty(self):
+        return len(self.strike) == 0
+
+    def row(self, idx):
+        """
+        Fila `idx` (posición en el orden por strike) como vista.
+        """
+        return OptionRow(self, idx)
+
+    def nearest_index(self, K, lo=0, hi=None):
+        """
+        Posición del strike más cercano a K dentro de [lo, hi).
+        En caso de empate se queda con el strike inferior.
+        """
+        hi = len(self.strike) if hi is None else hi
+        if hi <= lo:
+            raise ValueError("La cadena de opciones está vacía.")
+        i = lo + int(np.searchsorted(self.strike[lo:hi], K))
+        if i == lo:
+            return lo
+        if i == hi:
+            return hi - 1
+        return i - 1 if K - self.strike[i - 1] <= self.strike[i] - K else i
+
+    def nearest(self, K):
+        return self.row(self.nearest_index(K))
+
+    def index_of(self, K):
+        """
+        Posición del strike exactamente igual a K.
+        """
+        i = int(np.searchsorted(self.strike, K))
+        if i == len(self.strike) or self.strike[i] != K:
+            raise ValueError(f"El strike {K} no se encuentra en la tabla de strikes")
+        return i
+
+    def neighbors(self, K, below=1, above=1):
+        """
+        Posiciones a `below` filas por debajo y `above` por encima del strike
+        más cercano a K, recortadas a los extremos de la cadena.
+        """
+        idx = self.nearest_index(K)
+        return max(idx - below, 0), min(idx + above, len(self.strike) - 1)
+
+    def quoted(self):
+        """
+        Contratos con cotización a ambos lados (bid > 0 y ask >= bid).
+        """
+        return (self.bid > 0) & (self.ask >= self.bid)
+
+    def mid(self):
+        """
+        Precio de referencia de cada contrato: el punto medio bid/ask si hay
+        cotización a ambos lados y, si no, el último precio.
+        """
+        return np.where(self.quoted(), 0.5 * (self.bid + self.ask), self.last)
+
+    def solve_iv(self, spot, T, kind, r=0.0):
+        """
+        Recalcula la volatilidad implícita de toda la cadena (en tanto por
+        uno) a partir del precio, el strike, el spot y los años hasta el
+        vencimiento `T`, con una sola llamada al solver vectorizado. Donde el
+        precio no permite despejarla se conserva la que venía de Yahoo.
+        """
+        iv = implied_volatility(self.mid(), spot, self.strike, T, r=r, kind=kind)
+        self.iv = np.where(np.isnan(iv), self.iv, iv)
+        return self
+
+    def to_frame(self, n=None):
+        """
+        DataFrame con las etiquetas en español para mostrar (las `n` primeras
+        filas si se indica). Solo para pintar: copia los datos.
+        """
+        rows = slice(None, n)
+        return pd.DataFrame({label: getattr(self, name)[rows] for name, (label, _) in SCHEMA.items()})
+
+
+class OptionRow:
+    """
+    Vista de una fila de un OptionChain. Se accede a los campos por nombre del
+    esquema (`row.strike`, `row["strike"]`) o por la etiqueta en español
+    (`row["Precio de ejercicio"]`), como con la Series de antes.
+    """
+
+    __slots__ = ("chain", "idx")
+
+    def __init__(self, chain, idx):
+        self.chain = chain
+        self.idx = idx
+
+    def __getattr__(self, name):
+        if name in SCHEMA:
+            return getattr(self.chain, name)[self.idx]
+        raise AttributeError(name)
+
+    def __getitem__(self, key):
+        if isinstance(key, list):
+            return self.to_series(key)
+        return getattr(self.chain, LABELS.get(key, key))[self.idx]
+
+    def __repr__(self):
+        return f"OptionRow(strike={self.strike}, last={self.last}, iv={self.iv})"
+
+    def to_series(self, labels=SELECTION_LABELS):
+        """
+        Series con las etiquetas en español (para mostrar).
+        """
+        return pd.Series({label: self[label] for label in labels}, name=self.idx)
+
+
+def as_chain(data):
+    """
+    Acepta un DataFrame de opciones o un OptionChain ya construido.
+    """
+    return data if isinstance(data, OptionChain) else OptionChain(data)
+
+
+def display_rows(rows, index, labels=SELECTION_LABELS):
+    """
+    Tabla en español con varias filas elegidas (una por estrategia / pata).
+    """
+    return pd.DataFrame([row.to_series(labels) for row in rows], index=index)
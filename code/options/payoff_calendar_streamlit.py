@@ -1,13 +1,15 @@
 import math
-import numpy as np
-import pandas as pd
 import streamlit as st
 
 from .tabla import dashboard_universe_vs_sp500
 
 from scrapper.fecha import fechas_unix
 
-from scrapper.sp500 import scrape_series_data
+from scrapper.sp500 import get_sp500_constituents
+
+from .chain import as_chain, display_rows
+
+from .strategy import CALL, leg_from_row, payoff_frame
 
 from .payoff_utils import (
     load_calls_for_expiration,
@@ -17,14 +19,20 @@ from .payoff_utils import (
     best_otm_put,
     choose_butterfly_call_rows,
     choose_butterfly_put_rows,
+    match_strike_row,
     get_current_price,
     make_price_grid,
-    payoff_put_long,
-    payoff_call_long,
-    plot_payoff
+    plot_payoff,
+    options_cache_caption,
+    refresh_implied_vol,
+    years_to_expiry
 )
+from .session_store import session_chains
+from .surface import vol_surface_if_ready
+
+# Cada cuánto se mira si la superficie de volatilidad ya está construida.
+SURFACE_POLL_SECONDS = 2
 
-@st.cache_data(show_spinner=False)
 def choose_symmetric_strikes(df, spot):
     """
     Elige dos strikes alrededor del spot en el vencimiento corto:
@@ -32,21 +40,9 @@ def choose_symmetric_strikes(df, spot):
     - K2: strike inmediatamente superior al spot
     Devuelve (row_K1, row_K2).
     """
-    df = df.copy().sort_values("Precio de ejercicio").reset_index(drop=True)
-    df["dist"] = (df["Precio de ejercicio"] - spot).abs()
-    idx_atm = df["dist"].idxmin()
-
-    idx_low = max(idx_atm - 1, 0)
-    idx_high = min(idx_atm + 1, len(df) - 1)
-
-    row_K1 = df.loc[idx_low]
-    row_K2 = df.loc[idx_high]
-
-    # aseguramos K1 < K2
-    if row_K1["Precio de ejercicio"] > row_K2["Precio de ejercicio"]:
-        row_K1, row_K2 = row_K2, row_K1
-
-    return row_K1, row_K2
+    chain = as_chain(df)
+    idx_low, idx_high = chain.neighbors(spot)
+    return chain.row(idx_low), chain.row(idx_high)
 
 
 def choose_condor_strikes_calls(df_calls, spot):
@@ -54,117 +50,75 @@ def choose_condor_strikes_calls(df_calls, spot):
     Elige 4 strikes para una Long Condor con CALLs:
     K1 < K2 < K3 < K4.
     """
-    df = df_calls.copy().sort_values("Precio de ejercicio").reset_index(drop=True)
-    df["dist"] = (df["Precio de ejercicio"] - spot).abs()
-    idx_atm = df["dist"].idxmin()
-
-    idx1 = max(idx_atm - 1, 0)
-    idx2 = idx_atm
-    idx3 = min(idx_atm + 1, len(df) - 1)
-    idx4 = min(idx_atm + 2, len(df) - 1)
-
-    filas = pd.DataFrame([
-        df.loc[idx1],
-        df.loc[idx2],
-        df.loc[idx3],
-        df.loc[idx4],
-    ])
-    filas = filas.sort_values("Precio de ejercicio").reset_index(drop=True)
-
-    row_K1 = filas.loc[0]
-    row_K2 = filas.loc[1]
-    row_K3 = filas.loc[2]
-    row_K4 = filas.loc[3]
-
-    return row_K1, row_K2, row_K3, row_K4
-
-
-def match_strike_row(df, K):
-    """
-    Devuelve la fila de df cuya 'Precio de ejercicio' coincida con K
-    (o la más cercana si no existe exactamente).
-    """
-    df = df.copy().sort_values("Precio de ejercicio").reset_index(drop=True)
-    df["diff"] = (df["Precio de ejercicio"] - K).abs()
-    idx = df["diff"].idxmin()
-    return df.loc[idx]
-
+    chain = as_chain(df_calls)
+    idx_atm = chain.nearest_index(spot)
+    idx1, idx4 = chain.neighbors(spot, below=1, above=2)
+    idx3 = min(idx_atm + 1, len(chain) - 1)
 
-def norm_cdf(x):
-    x = np.asarray(x, dtype=float)
-    return 0.5 * (1.0 + math.erf(x / math.sqrt(2))) if x.ndim == 0 else \
-        0.5 * (1.0 + np.fromiter((math.erf(v) for v in x / math.sqrt(2)), float))
-
-
-def bs_call_value(S, K, sigma, T, r=0.0):
-    """
-    Valor de una call europea (Black–Scholes) para cada S.
-    S puede ser array.
-    """
-    S = np.asarray(S, dtype=float)
-    sigma = float(sigma)
-    T = float(T)
-
-    if T <= 0 or sigma <= 0:
-        return np.maximum(S - K, 0.0)
-
-    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
-    d2 = d1 - sigma * np.sqrt(T)
-    return S * norm_cdf(d1) - K * np.exp(-r * T) * norm_cdf(d2)
+    return chain.row(idx1), chain.row(idx_atm), chain.row(idx3), chain.row(idx4)
 
 
 def _clean_sigma(raw_sigma):
     """
-    Normaliza la sigma: si viene en % (20) → 0.20.
-    Y evita sigma=0 o NaN poniendo un mínimo razonable.
+    Sigma de la pata larga. La IV de la cadena ya viene en tanto por uno
+    (recalculada con refresh_implied_vol), así que solo se evita sigma=0 o
+    NaN poniendo un mínimo razonable.
     """
     try:
-        sigma = float(raw_sigma)
+        sigma = abs(float(raw_sigma))
     except Exception:
         sigma = 0.2  # fallback
 
-    sigma = abs(sigma)
-
-    if sigma > 1.0:
-        sigma = sigma / 100.0
-
     if sigma < 1e-4 or math.isnan(sigma):
         sigma = 0.2
 
     return sigma
 
 
+def _long_sigma(row_long, K, surface, T_long):
+    """
+    Sigma de la pata larga en el strike K: de la superficie de volatilidad si
+    la hay (sigma(K, T) interpolada entre vencimientos) o, si no, la IV de la
+    propia fila.
+    """
+    if surface is not None and T_long is not None:
+        sigma = float(surface.sigma(K, T_long))
+        if sigma > 0:
+            return sigma
+    return _clean_sigma(row_long.iv)
+
+
 def payoff_long_calendar_from_rows(row_short, row_long,
                                    tau_remain,
                                    factor_min=0.8, factor_max=1.2,
                                    n=4000,
-                                   ticker="AAPL"):
-    K_short, p_short = row_short["Precio de ejercicio"], row_short["Último precio"]
-    K_long,  p_long  = row_long["Precio de ejercicio"],  row_long["Último precio"]
-
+                                   ticker="AAPL", spot=None,
+                                   surface=None, T_long=None):
+    """
+    Long Calendar con CALLs, evaluado al vencimiento corto:
+        -1 Call K (vencimiento corto, a vencimiento)
+        +1 Call K (vencimiento largo, valorada con Black–Scholes a tau_remain)
+    surface / T_long: superficie de volatilidad y años hasta el vencimiento
+    largo para tomar la sigma de la pata larga.
+    """
+    K_short, K_long = row_short.strike, row_long.strike
     assert abs(K_short - K_long) / K_short < 0.01, "Los strikes del calendar deben ser prácticamente iguales"
     K = (K_short + K_long) / 2
 
-    sigma_long = _clean_sigma(row_long["Volatilidad implícita"])
-
-    spot = get_current_price(ticker)
-    center = spot
-    S = make_price_grid(center, factor_min, factor_max, n)
-
-    short_T1 = -np.maximum(S - K, 0.0)
-    long_T1  = bs_call_value(S, K, sigma_long, tau_remain, r=0.0)
-
-    net_premium = p_long - p_short
-
-    payoff_total = short_T1 + long_T1 - net_premium
-
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
+    legs = [
+        leg_from_row(row_short, CALL, side=-1, strike=K),
+        leg_from_row(row_long, CALL, side=1, strike=K,
+                     expiry=tau_remain, sigma=_long_sigma(row_long, K, surface, T_long)),
+    ]
+    spot = get_current_price(ticker) if spot is None else spot
+    S = make_price_grid(spot, factor_min, factor_max, n)
+    return payoff_frame(legs, S)
 
 
 def payoff_long_condor_from_rows(row_K1, row_K2, row_K3, row_K4,
                                  factor_min=0.8, factor_max=1.2,
                                  n=4000,
-                                 ticker="AAPL"):
+                                 ticker="AAPL", spot=None):
     """
     Long Condor con CALLs:
         +1 Call K1
@@ -173,24 +127,18 @@ def payoff_long_condor_from_rows(row_K1, row_K2, row_K3, row_K4,
         +1 Call K4
     con K1 < K2 < K3 < K4.
     """
-    K1, p1 = row_K1["Precio de ejercicio"], row_K1["Último precio"]
-    K2, p2 = row_K2["Precio de ejercicio"], row_K2["Último precio"]
-    K3, p3 = row_K3["Precio de ejercicio"], row_K3["Último precio"]
-    K4, p4 = row_K4["Precio de ejercicio"], row_K4["Último precio"]
-
-    assert K1 < K2 < K3 < K4, "Se requiere K1 < K2 < K3 < K4 para la Condor."
-
-    spot = get_current_price(ticker)
-    center = spot
-    S = make_price_grid(center, factor_min, factor_max, n)
+    assert row_K1.strike < row_K2.strike < row_K3.strike < row_K4.strike, \
+        "Se requiere K1 < K2 < K3 < K4 para la Condor."
 
-    C1 = payoff_call_long(S, K1, p1)
-    C2 = payoff_call_long(S, K2, p2)
-    C3 = payoff_call_long(S, K3, p3)
-    C4 = payoff_call_long(S, K4, p4)
-
-    payoff_total = C1 - C2 - C3 + C4
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
+    legs = [
+        leg_from_row(row_K1, CALL, side=1),
+        leg_from_row(row_K2, CALL, side=-1),
+        leg_from_row(row_K3, CALL, side=-1),
+        leg_from_row(row_K4, CALL, side=1),
+    ]
+    spot = get_current_price(ticker) if spot is None else spot
+    S = make_price_grid(spot, factor_min, factor_max, n)
+    return payoff_frame(legs, S)
 
 
 def payoff_double_diagonal_from_rows(row_short_K1, row_long_K1,
@@ -198,44 +146,41 @@ def payoff_double_diagonal_from_rows(row_short_K1, row_long_K1,
                                      tau_remain,
                                      factor_min=0.8, factor_max=1.2,
                                      n=4000,
-                                     ticker="AAPL"):
-
-    K1_short, p1_short = row_short_K1["Precio de ejercicio"], row_short_K1["Último precio"]
-    K1_long,  p1_long  = row_long_K1["Precio de ejercicio"],  row_long_K1["Último precio"]
-
-    K2_short, p2_short = row_short_K2["Precio de ejercicio"], row_short_K2["Último precio"]
-    K2_long,  p2_long  = row_long_K2["Precio de ejercicio"],  row_long_K2["Último precio"]
-
-    K1 = (K1_short + K1_long) / 2
-    K2 = (K2_short + K2_long) / 2
+                                     ticker="AAPL",
+                                     surface=None, T_long=None):
+    """
+    Double Diagonal: dos calendars de CALLs en K1 < K2, evaluados al
+    vencimiento corto. surface / T_long como en el calendar.
+    """
+    K1 = (row_short_K1.strike + row_long_K1.strike) / 2
+    K2 = (row_short_K2.strike + row_long_K2.strike) / 2
     assert K1 < K2, "Se requiere K1 < K2 para la Double Diagonal"
 
-    sigma1 = _clean_sigma(row_long_K1["Volatilidad implícita"])
-    sigma2 = _clean_sigma(row_long_K2["Volatilidad implícita"])
+    legs = [
+        leg_from_row(row_short_K1, CALL, side=-1, strike=K1),
+        leg_from_row(row_long_K1, CALL, side=1, strike=K1,
+                     expiry=tau_remain, sigma=_long_sigma(row_long_K1, K1, surface, T_long)),
+        leg_from_row(row_short_K2, CALL, side=-1, strike=K2),
+        leg_from_row(row_long_K2, CALL, side=1, strike=K2,
+                     expiry=tau_remain, sigma=_long_sigma(row_long_K2, K2, surface, T_long)),
+    ]
+    S = make_price_grid((K1 + K2) / 2, factor_min, factor_max, n)
+    return payoff_frame(legs, S)
 
-    center = (K1 + K2) / 2
-    S = make_price_grid(center, factor_min, factor_max, n)
 
-    short1_T1 = -np.maximum(S - K1, 0.0)
-    long1_T1  = bs_call_value(S, K1, sigma1, tau_remain, r=0.0)
-    net1 = p1_long - p1_short
-    payoff1 = short1_T1 + long1_T1 - net1
-
-    short2_T1 = -np.maximum(S - K2, 0.0)
-    long2_T1  = bs_call_value(S, K2, sigma2, tau_remain, r=0.0)
-    net2 = p2_long - p2_short
-    payoff2 = short2_T1 + long2_T1 - net2
-
-    payoff_total = payoff1 + payoff2
-
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
+# Estrategias del selector (una se pinta cada vez).
+ESTRATEGIAS_CALENDAR = [
+    "Long Calendar Spread",
+    "Long Condor (solo buy)",
+    "Double Diagonal (solo buy)",
+]
 
 
 def dashboard_app_calendar():
     st.title("📆 Estrategias laterales: Calendar & Double Diagonal")
 
     # Por si quieres usar los tickers del SP500
-    df_sp500 = scrape_series_data(verbose=False)
+    df_sp500 = get_sp500_constituents()
     Empresas = df_sp500['Company'].tolist()
     TICKERS = df_sp500['Symbol'].tolist()
 
@@ -327,7 +272,13 @@ def dashboard_app_calendar():
 
     st.markdown("---")
 
-    if st.button("📥 Descargar CALLS para estos vencimientos", key="btn_descargar_calls_calendar"):
+    # Lo descargado, los strikes elegidos y la superficie se guardan en la
+    # sesión por (símbolo, vencimiento corto, vencimiento largo): cualquier
+    # otro widget vuelve a ejecutar el script con el botón a False.
+    cadenas = session_chains("calendar")
+    vencimientos = (item_corto["timestamp"], item_largo["timestamp"])
+    descargado = st.button("📥 Descargar CALLS para estos vencimientos", key="btn_descargar_calls_calendar")
+    if descargado:
 
         if item_largo["timestamp"] <= item_corto["timestamp"]:
             if st.session_state.get("mostrar_texto_global", True):
@@ -355,17 +306,9 @@ def dashboard_app_calendar():
                 st.error("No se pudieron descargar CALLS para el vencimiento largo.")
             return
 
-        if st.session_state.get("mostrar_texto_global", True):
-            st.success("Datos de CALLs descargados correctamente.")
-        
-        st.subheader("Vista previa de CALLs (corto plazo)")
-        st.dataframe(calls_short.head())
-        st.subheader("Vista previa de CALLs (largo plazo)")
-        st.dataframe(calls_long.head())
-
         spot = get_current_price(symbol_cal)
-        if st.session_state.get("mostrar_texto_global", True):
-            st.info(f"Precio actual de {symbol_cal}: {spot:.2f} $")
+        # La pata larga se valora con la IV de su propio precio.
+        refresh_implied_vol(calls_long, spot, item_largo["timestamp"], CALL)
 
         try:
             row_ATM_short = choose_atm_strike(calls_short, spot=spot)
@@ -382,68 +325,146 @@ def dashboard_app_calendar():
             row_K2_long = match_strike_row(calls_long, K2)
 
         except Exception as e:
-            st.error(f"Error al seleccionar strikes para estrategias laterales: {e}")
+            if st.session_state.get("mostrar_texto_global", True):
+                st.error(f"Error al seleccionar strikes para estrategias laterales: {e}")
             return
 
         seconds_year = 365 * 24 * 60 * 60
         delta_seconds = item_largo["timestamp"] - item_corto["timestamp"]
-        tau_remain = max(delta_seconds / seconds_year, 1e-6)
-
-        st.markdown("### Strikes seleccionados")
-
-        colA, colB, colC = st.columns(3)
-
-        with colA:
-            st.write("**Calendar ATM (K)**")
-            st.write(pd.DataFrame(
-                [row_ATM_short, row_ATM_long],
-                index=["Short (corto plazo)", "Long (largo plazo)"]
-            )[["Precio de ejercicio", "Último precio", "Volatilidad implícita"]])
-
-        with colB:
-            st.write("**Double Diagonal (K1 / K2)**")
-            st.write(pd.DataFrame(
-                [row_K1_short, row_K1_long, row_K2_short, row_K2_long],
-                index=["K1 short", "K1 long", "K2 short", "K2 long"]
-            )[["Precio de ejercicio", "Último precio", "Volatilidad implícita"]])
-
-        with colC:
-            st.write("**Condor (CALLs/PUTs)**")
-            st.write(pd.DataFrame(
-                [row_K1_c, row_K2_c, row_K3_c, row_K4_c,],
-                index=["Condor K1", "Condor K2", "Condor K3", "Condor K4"]
-            )[["Precio de ejercicio", "Último precio", "Volatilidad implícita"]])
-
-        st.markdown("---")
-
-        st.markdown("""
-        <style>
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(1) {
-            color: #00CC44 !important;  /* verde */
-        }
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(2) {
-            color: #FFD700 !important;  /* amarillo */
-        }
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(3) {
-            color: #FF0000 !important;  /* rojo */
-        }
-        </style>
-        """, unsafe_allow_html=True)
-
-        tabcal_1, tabcal_2, tabcal_3 = st.tabs([
-            "Long Calendar Spread",
-            "Long Condor (solo buy)",
-            "Double Diagonal (solo buy)"
-        ])
-
-        with tabcal_1:
+
+        cadenas.put(
+            symbol_cal, vencimientos,
+            calls_short=calls_short, calls_long=calls_long, spot=spot,
+            rows=(row_ATM_short, row_ATM_long,
+                  row_K1_c, row_K2_c, row_K3_c, row_K4_c,
+                  row_K1_short, row_K2_short, row_K1_long, row_K2_long),
+            tau_remain=max(delta_seconds / seconds_year, 1e-6),
+            T_long=years_to_expiry(item_largo["timestamp"]),
+            surface=None, surface_error=None,
+        )
+
+    entrada = cadenas.get(symbol_cal, vencimientos)
+    if entrada is None:
+        if st.session_state.get("mostrar_texto_global", True):
+            st.info("Pulsa el botón para descargar las CALLS y ver los payoffs.")
+        return
+
+    calls_short, calls_long, spot = entrada["calls_short"], entrada["calls_long"], entrada["spot"]
+    (row_ATM_short, row_ATM_long,
+     row_K1_c, row_K2_c, row_K3_c, row_K4_c,
+     row_K1_short, row_K2_short, row_K1_long, row_K2_long) = entrada["rows"]
+    tau_remain, T_long = entrada["tau_remain"], entrada["T_long"]
+
+    def superficie():
+        """
+        Superficie de volatilidad de la entrada (todos los vencimientos, una
+        por ventana de la caché). Se construye en segundo plano: mientras no
+        esté lista devuelve None y se usa la IV de cada fila.
+        """
+        if entrada["surface"] is None and entrada["surface_error"] is None:
+            try:
+                entrada["surface"] = vol_surface_if_ready(symbol_cal)
+            except Exception as e:
+                entrada["surface_error"] = str(e)
+        return entrada["surface"]
+
+    esperando_superficie = superficie() is None and entrada["surface_error"] is None
+
+    def payoff_guardado(nombre, construir):
+        """
+        Payoff `nombre` construido sobre el spot de la entrada y guardado con
+        ella: uno con la IV de cada fila y otro cuando llega la superficie.
+        """
+        clave = (nombre, entrada["surface"] is not None)
+        frames = entrada.setdefault("frames", {})
+        if clave not in frames:
+            frames[clave] = construir()
+        return frames[clave]
+
+    if descargado and st.session_state.get("mostrar_texto_global", True):
+        st.success("Datos de CALLs descargados correctamente.")
+        st.caption(options_cache_caption())
+
+    st.subheader("Vista previa de CALLs (corto plazo)")
+    st.dataframe(calls_short.to_frame(n=5))
+    st.subheader("Vista previa de CALLs (largo plazo)")
+    st.dataframe(calls_long.to_frame(n=5))
+
+    if st.session_state.get("mostrar_texto_global", True):
+        st.info(f"Precio actual de {symbol_cal}: {spot:.2f} $")
+        if esperando_superficie:
+            st.caption("Construyendo la superficie de volatilidad en segundo plano; "
+                       "de momento se usa la IV de cada fila.")
+        elif entrada["surface_error"] is not None:
+            st.warning(f"No se pudo construir la superficie de volatilidad: {entrada['surface_error']}")
+
+    st.markdown("### Strikes seleccionados")
+
+    colA, colB, colC = st.columns(3)
+
+    with colA:
+        st.write("**Calendar ATM (K)**")
+        st.write(display_rows(
+            [row_ATM_short, row_ATM_long],
+            index=["Short (corto plazo)", "Long (largo plazo)"]
+        ))
+
+    with colB:
+        st.write("**Double Diagonal (K1 / K2)**")
+        st.write(display_rows(
+            [row_K1_short, row_K1_long, row_K2_short, row_K2_long],
+            index=["K1 short", "K1 long", "K2 short", "K2 long"]
+        ))
+
+    with colC:
+        st.write("**Condor (CALLs/PUTs)**")
+        st.write(display_rows(
+            [row_K1_c, row_K2_c, row_K3_c, row_K4_c,],
+            index=["Condor K1", "Condor K2", "Condor K3", "Condor K4"]
+        ))
+
+    st.markdown("---")
+
+    st.markdown("""
+    <style>
+    .st-key-estrategia_calendar button:nth-of-type(1) {
+        color: #00CC44 !important;  /* verde */
+    }
+    .st-key-estrategia_calendar button:nth-of-type(2) {
+        color: #FFD700 !important;  /* amarillo */
+    }
+    .st-key-estrategia_calendar button:nth-of-type(3) {
+        color: #FF0000 !important;  /* rojo */
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # Solo se pinta la estrategia elegida. Mientras se construye la superficie
+    # el fragmento se repite cada SURFACE_POLL_SECONDS; cuando la construcción
+    # termina (bien o con error) se vuelve a pintar toda la página, que deja
+    # de sondear y enseña la superficie o el aviso.
+    @st.fragment(run_every=SURFACE_POLL_SECONDS if esperando_superficie else None)
+    def estrategia_seleccionada():
+        if esperando_superficie:
+            superficie()
+            if entrada["surface"] is not None or entrada["surface_error"] is not None:
+                st.rerun()
+        surface = entrada["surface"]
+
+        estrategia = st.segmented_control(
+            "Estrategia", ESTRATEGIAS_CALENDAR, default=ESTRATEGIAS_CALENDAR[0],
+            key="estrategia_calendar", label_visibility="collapsed"
+        ) or ESTRATEGIAS_CALENDAR[0]
+
+        if estrategia == "Long Calendar Spread":
             st.subheader("Long Calendar Spread (CALLs)")
-            df_calendar = payoff_long_calendar_from_rows(
+            df_calendar = payoff_guardado("calendar", lambda: payoff_long_calendar_from_rows(
                 row_ATM_short, row_ATM_long,
                 tau_remain=tau_remain,
-                ticker=symbol_cal
-            )
-            fig1 = plot_payoff(df_calendar, "Long Calendar Spread (CALLs)", ticker=symbol_cal)
+                ticker=symbol_cal, spot=spot,
+                surface=surface, T_long=T_long
+            ))
+            fig1 = plot_payoff(df_calendar, "Long Calendar Spread (CALLs)", ticker=symbol_cal, spot=spot)
             st.plotly_chart(fig1, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -469,12 +490,12 @@ def dashboard_app_calendar():
                 Es una estrategia popular cuando se espera **movimiento moderado** o **aumento de volatilidad**.
                 """)
 
-        with tabcal_2:
+        elif estrategia == "Long Condor (solo buy)":
             st.subheader("Long Condor (solo buy, CALLs)")
-            df_condor = payoff_long_condor_from_rows(
-                row_K1_c, row_K2_c, row_K3_c, row_K4_c, ticker=symbol_cal
-            )
-            fig3 = plot_payoff(df_condor, "Long Condor (solo buy)", ticker=symbol_cal)
+            df_condor = payoff_guardado("condor", lambda: payoff_long_condor_from_rows(
+                row_K1_c, row_K2_c, row_K3_c, row_K4_c, ticker=symbol_cal, spot=spot
+            ))
+            fig3 = plot_payoff(df_condor, "Long Condor (solo buy)", ticker=symbol_cal, spot=spot)
             st.plotly_chart(fig3, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -503,15 +524,16 @@ def dashboard_app_calendar():
                 Se utiliza cuando se espera que el precio termine en una **franja concreta**, con algo más de margen que en una butterfly clásica.
                 """)
 
-        with tabcal_3:
+        elif estrategia == "Double Diagonal (solo buy)":
             st.subheader("Double Diagonal (aprox. double calendar)")
-            df_dd = payoff_double_diagonal_from_rows(
+            df_dd = payoff_guardado("double_diagonal", lambda: payoff_double_diagonal_from_rows(
                 row_K1_short, row_K1_long,
                 row_K2_short, row_K2_long,
                 tau_remain=tau_remain,
-                ticker=symbol_cal
-            )
-            fig2 = plot_payoff(df_dd, "Double Diagonal (solo buy)", ticker=symbol_cal)
+                ticker=symbol_cal,
+                surface=surface, T_long=T_long
+            ))
+            fig2 = plot_payoff(df_dd, "Double Diagonal (solo buy)", ticker=symbol_cal, spot=spot)
             st.plotly_chart(fig2, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -535,9 +557,8 @@ def dashboard_app_calendar():
 
                 Suele utilizarse cuando se espera que el precio permanezca en un **rango** razonable, pero con cierta asimetría o sesgo.
                 """)
-    else:
-        if st.session_state.get("mostrar_texto_global", True):
-            st.info("Pulsa el botón para descargar las CALLS y ver los payoffs.")
+
+    estrategia_seleccionada()
 
 if __name__ == "__main__":
     dashboard_app_calendar()
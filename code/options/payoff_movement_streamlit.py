@@ -1,116 +1,101 @@
-import pandas as pd
 import streamlit as st
 
 from .tabla import dashboard_universe_vs_sp500
 
 from scrapper.fecha import fechas_unix
 
-from scrapper.sp500 import scrape_series_data
+from scrapper.sp500 import get_sp500_constituents
+
+from .chain import display_rows
+
+from .strategy import CALL, PUT, leg_from_row, payoff_frame
 
 from .payoff_utils import (
-    load_calls_for_expiration,
-    load_puts_for_expiration,
+    load_options_for_expiration,
     choose_atm_strike,
     best_otm_call,
     best_otm_put,
     choose_butterfly_call_rows,
     choose_butterfly_put_rows,
+    match_strike_row,
     get_current_price,
     make_price_grid,
-    payoff_put_long,
-    payoff_call_long,
-    plot_payoff
+    plot_payoff,
+    options_cache_caption,
+    refresh_implied_vol,
+    probability_table,
+    years_to_expiry
 )
 
-@st.cache_data(show_spinner=False)
-def match_strike_row(df, K):
-    """
-    Devuelve la fila de df con strike más cercano a K.
-    """
-    df = df.copy().sort_values("Precio de ejercicio").reset_index(drop=True)
-    df["diff"] = (df["Precio de ejercicio"] - K).abs()
-    idx = df["diff"].idxmin()
-    return df.loc[idx]
-
+from .session_store import session_chains
 
 def payoff_long_strangle_from_rows(row_call_otm, row_put_otm,
                                    factor_min=0.8, factor_max=1.2,
                                    n=4000,
-                                   ticker="AAPL"):
-    Kc, pc = row_call_otm["Precio de ejercicio"], row_call_otm["Último precio"]
-    Kp, pp = row_put_otm["Precio de ejercicio"], row_put_otm["Último precio"]
-
-    spot = get_current_price(ticker)
-    center = spot
-    S = make_price_grid(center, factor_min, factor_max, n)
-
-    payoff_total = payoff_call_long(S, Kc, pc) + payoff_put_long(S, Kp, pp)
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
+                                   ticker="AAPL", spot=None):
+    legs = [leg_from_row(row_call_otm, CALL), leg_from_row(row_put_otm, PUT)]
+    spot = get_current_price(ticker) if spot is None else spot
+    S = make_price_grid(spot, factor_min, factor_max, n)
+    return payoff_frame(legs, S)
 
 
 def payoff_long_guts_from_rows(row_call_itm, row_put_itm,
                                factor_min=0.8, factor_max=1.2,
                                n=4000,
-                               ticker="AAPL"):
-    Kc, pc = row_call_itm["Precio de ejercicio"], row_call_itm["Último precio"]
-    Kp, pp = row_put_itm["Precio de ejercicio"], row_put_itm["Último precio"]
+                               ticker="AAPL", spot=None):
+    legs = [leg_from_row(row_call_itm, CALL), leg_from_row(row_put_itm, PUT)]
+    spot = get_current_price(ticker) if spot is None else spot
+    S = make_price_grid(spot, factor_min, factor_max, n)
+    return payoff_frame(legs, S)
 
-    spot = get_current_price(ticker)
-    center = spot
-    S = make_price_grid(center, factor_min, factor_max, n)
-
-    payoff_total = payoff_call_long(S, Kc, pc) + payoff_put_long(S, Kp, pp)
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
 
 def payoff_long_straddle_from_rows(row_call_atm, row_put_atm,
                                    factor_min=0.8, factor_max=1.2,
                                    n=4000,
-                                   ticker="AAPL"):
-    Kc, pc = row_call_atm["Precio de ejercicio"], row_call_atm["Último precio"]
-    Kp, pp = row_put_atm["Precio de ejercicio"], row_put_atm["Último precio"]
-
-    spot = get_current_price(ticker)
-    center = spot
-    S = make_price_grid(center, factor_min, factor_max, n)
-
-    payoff_total = payoff_call_long(S, Kc, pc) + payoff_put_long(S, Kp, pp)
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
+                                   ticker="AAPL", spot=None):
+    legs = [leg_from_row(row_call_atm, CALL), leg_from_row(row_put_atm, PUT)]
+    spot = get_current_price(ticker) if spot is None else spot
+    S = make_price_grid(spot, factor_min, factor_max, n)
+    return payoff_frame(legs, S)
 
 
 def payoff_long_box_from_rows(row_call_K1, row_call_K2,
                               row_put_K1, row_put_K2,
                               factor_min=0.8, factor_max=1.2,
                               n=4000,
-                              ticker="AAPL"):
+                              ticker="AAPL", spot=None):
     """
     Long Box (CALL + PUT) misma expiración:
         Bull Call Spread:  +Call(K1) -Call(K2)
         Bear Put Spread:   +Put(K2)  -Put(K1)
     con K1 < K2.
     """
-    K1c, p1c = row_call_K1["Precio de ejercicio"], row_call_K1["Último precio"]
-    K2c, p2c = row_call_K2["Precio de ejercicio"], row_call_K2["Último precio"]
-    K1p, p1p = row_put_K1["Precio de ejercicio"], row_put_K1["Último precio"]
-    K2p, p2p = row_put_K2["Precio de ejercicio"], row_put_K2["Último precio"]
+    assert row_call_K1.strike < row_call_K2.strike, "Se requiere K1 < K2 para la Box."
 
-    assert K1c < K2c, "Se requiere K1 < K2 para la Box."
+    legs = [
+        leg_from_row(row_call_K1, CALL, side=1),
+        leg_from_row(row_call_K2, CALL, side=-1),
+        leg_from_row(row_put_K2, PUT, side=1),
+        leg_from_row(row_put_K1, PUT, side=-1),
+    ]
+    spot = get_current_price(ticker) if spot is None else spot
+    S = make_price_grid(spot, factor_min, factor_max, n)
+    return payoff_frame(legs, S)
 
-    spot = get_current_price(ticker)
-    center = spot
-    S = make_price_grid(center, factor_min, factor_max, n)
 
-    C1 = payoff_call_long(S, K1c, p1c)
-    C2 = payoff_call_long(S, K2c, p2c)
-    P1 = payoff_put_long(S, K1p, p1p)
-    P2 = payoff_put_long(S, K2p, p2p)
+# Estrategias del selector (una se pinta cada vez).
+ESTRATEGIAS_MOV = [
+    "Long Strangle OTM",
+    "Long Guts",
+    "Long Straddle ATM",
+    "Long Box (solo buy)",
+]
 
-    payoff_total = (C1 - C2) + (P2 - P1)
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
 
 def dashboard_app_movement():
     st.title("⚡ Estrategias de movimiento fuerte")
 
-    df_sp500 = scrape_series_data(verbose=False)
+    df_sp500 = get_sp500_constituents()
     Empresas = df_sp500['Company'].iloc[1:5].tolist()
     TICKERS = df_sp500['Symbol'].iloc[1:5].tolist()
 
@@ -185,49 +170,42 @@ def dashboard_app_movement():
     st.markdown("---")
 
     # --- Botón para descargar datos de opciones ---
-    if st.button("📥 Descargar CALLS y PUTS para esta fecha", key="btn_descargar_mov"):
+    # Lo descargado y los strikes elegidos se guardan en la sesión: cualquier
+    # otro widget vuelve a ejecutar el script con el botón a False.
+    cadenas = session_chains("movement")
+    descargado = st.button("📥 Descargar CALLS y PUTS para esta fecha", key="btn_descargar_mov")
+    if descargado:
 
         with st.spinner("Descargando opciones CALL y PUT..."):
-            calls_df = load_calls_for_expiration(
-                symbol_mov,
-                item_sel_mov["timestamp"],
-                max_intentos=max_intentos_opt
-            )
-            puts_df = load_puts_for_expiration(
+            calls_chain, puts_chain = load_options_for_expiration(
                 symbol_mov,
                 item_sel_mov["timestamp"],
                 max_intentos=max_intentos_opt
             )
 
-        if calls_df is None or calls_df.empty:
+        if calls_chain is None or calls_chain.empty:
             if st.session_state.get("mostrar_texto_global", True):
                 st.error("No se pudieron descargar CALLS para este símbolo/fecha.")
             return
-        if puts_df is None or puts_df.empty:
+        if puts_chain is None or puts_chain.empty:
             if st.session_state.get("mostrar_texto_global", True):
                 st.error("No se pudieron descargar PUTS para este símbolo/fecha.")
             return
-        if st.session_state.get("mostrar_texto_global", True):
-            st.success("Datos de opciones descargados correctamente.")
-        st.subheader("Vista previa CALLs")
-        st.dataframe(calls_df.head())
-        st.subheader("Vista previa PUTs")
-        st.dataframe(puts_df.head())
 
         spot = get_current_price(symbol_mov)
-        if st.session_state.get("mostrar_texto_global", True):
-            st.info(f"Precio actual de {symbol_mov}: {spot:.2f} $")
+        refresh_implied_vol(calls_chain, spot, item_sel_mov["timestamp"], CALL)
+        refresh_implied_vol(puts_chain, spot, item_sel_mov["timestamp"], PUT)
 
         try:
-            row_call_atm = choose_atm_strike(calls_df, spot)
+            row_call_atm = choose_atm_strike(calls_chain, spot)
             K_atm = row_call_atm["Precio de ejercicio"]
-            row_put_atm = match_strike_row(puts_df, K_atm)
+            row_put_atm = match_strike_row(puts_chain, K_atm)
 
-            row_call_otm = best_otm_call(calls_df, spot)
-            row_put_otm = best_otm_put(puts_df, spot)
+            row_call_otm = best_otm_call(calls_chain, spot)
+            row_put_otm = best_otm_put(puts_chain, spot)
 
-            row_call_itm = choose_butterfly_call_rows(calls_df, spot)
-            row_put_itm = choose_butterfly_put_rows(puts_df, spot)
+            row_call_itm = choose_butterfly_call_rows(calls_chain, spot)
+            row_put_itm = choose_butterfly_put_rows(puts_chain, spot)
 
             row_call_K1 = row_call_itm
             row_call_K2 = row_call_otm
@@ -238,69 +216,132 @@ def dashboard_app_movement():
                 K1_box, K2_box = K2_box, K1_box
                 row_call_K1, row_call_K2 = row_call_K2, row_call_K1
 
-            row_put_K1 = match_strike_row(puts_df, K1_box)
-            row_put_K2 = match_strike_row(puts_df, K2_box)
+            row_put_K1 = match_strike_row(puts_chain, K1_box)
+            row_put_K2 = match_strike_row(puts_chain, K2_box)
 
         except Exception as e:
             st.error(f"Error al seleccionar strikes para estrategias de movimiento: {e}")
             return
 
-        st.markdown("### Strikes seleccionados")
-
-        colA, colB, colC = st.columns(3)
-
-        with colA:
-            st.write("**Straddle ATM**")
-            st.write(pd.DataFrame(
-                [row_call_atm, row_put_atm],
-                index=["Call ATM", "Put ATM"]
-            )[["Precio de ejercicio", "Último precio", "Volatilidad implícita"]])
-
-        with colB:
-            st.write("**Strangle OTM / Guts**")
-            st.write(pd.DataFrame(
-                [row_call_otm, row_put_otm, row_call_itm, row_put_itm],
-                index=["Call OTM (Strangle)", "Put OTM (Strangle)",
-                       "Call ITM (Guts)", "Put ITM (Guts)"]
-            )[["Precio de ejercicio", "Último precio", "Volatilidad implícita"]])
-
-        with colC:
-            st.write("**Box (CALLs/PUTs)**")
-            st.write(pd.DataFrame(
-                [row_call_K1, row_call_K2, row_put_K1, row_put_K2],
-                index=["Call K1 (Box)", "Call K2 (Box)", "Put K1 (Box)", "Put K2 (Box)"]
-            )[["Precio de ejercicio", "Último precio", "Volatilidad implícita"]])
-
-        st.markdown("---")
-
-        st.markdown("""
-        <style>
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(1) {
-            color: #00CC44 !important;  /* verde */
-        }
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(2) {
-            color: #FFD700 !important;  /* amarillo */
-        }
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(3),
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(4) {
-            color: #FF0000 !important;  /* rojo */
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        cadenas.put(
+            symbol_mov, item_sel_mov["timestamp"],
+            calls=calls_chain, puts=puts_chain, spot=spot,
+            rows=(row_call_atm, row_put_atm, row_call_otm, row_put_otm, row_call_itm,
+                  row_put_itm, row_call_K1, row_call_K2, row_put_K1, row_put_K2)
+        )
 
-        tabm_1, tabm_2, tabm_3, tabm_4 = st.tabs([
-            "Long Strangle OTM",
-            "Long Guts",
-            "Long Straddle ATM",
-            "Long Box (solo buy)"
-        ])
+    entrada = cadenas.get(symbol_mov, item_sel_mov["timestamp"])
+    if entrada is None:
+        if st.session_state.get("mostrar_texto_global", True):
+            st.info("Pulsa el botón para descargar las opciones y ver los payoffs.")
+        return
 
-        with tabm_1:
+    calls_chain, puts_chain, spot = entrada["calls"], entrada["puts"], entrada["spot"]
+    (row_call_atm, row_put_atm, row_call_otm, row_put_otm, row_call_itm,
+     row_put_itm, row_call_K1, row_call_K2, row_put_K1, row_put_K2) = entrada["rows"]
+
+    if descargado and st.session_state.get("mostrar_texto_global", True):
+        st.success("Datos de opciones descargados correctamente.")
+        st.caption(options_cache_caption())
+    st.subheader("Vista previa CALLs")
+    st.dataframe(calls_chain.to_frame(n=5))
+    st.subheader("Vista previa PUTs")
+    st.dataframe(puts_chain.to_frame(n=5))
+
+    if st.session_state.get("mostrar_texto_global", True):
+        st.info(f"Precio actual de {symbol_mov}: {spot:.2f} $")
+
+    st.markdown("### Strikes seleccionados")
+
+    colA, colB, colC = st.columns(3)
+
+    with colA:
+        st.write("**Straddle ATM**")
+        st.write(display_rows(
+            [row_call_atm, row_put_atm],
+            index=["Call ATM", "Put ATM"]
+        ))
+
+    with colB:
+        st.write("**Strangle OTM / Guts**")
+        st.write(display_rows(
+            [row_call_otm, row_put_otm, row_call_itm, row_put_itm],
+            index=["Call OTM (Strangle)", "Put OTM (Strangle)",
+                   "Call ITM (Guts)", "Put ITM (Guts)"]
+        ))
+
+    with colC:
+        st.write("**Box (CALLs/PUTs)**")
+        st.write(display_rows(
+            [row_call_K1, row_call_K2, row_put_K1, row_put_K2],
+            index=["Call K1 (Box)", "Call K2 (Box)", "Put K1 (Box)", "Put K2 (Box)"]
+        ))
+
+    st.markdown("---")
+
+    st.markdown("""
+    <style>
+    .st-key-estrategia_mov button:nth-of-type(1) {
+        color: #00CC44 !important;  /* verde */
+    }
+    .st-key-estrategia_mov button:nth-of-type(2) {
+        color: #FFD700 !important;  /* amarillo */
+    }
+    .st-key-estrategia_mov button:nth-of-type(3),
+    .st-key-estrategia_mov button:nth-of-type(4) {
+        color: #FF0000 !important;  /* rojo */
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # Payoffs de todas las pestañas (baratos: lineales a trozos) para
+    # calcular su probabilidad de beneficio con un solo Monte Carlo. Se
+    # construyen una vez por entrada sobre su spot y se guardan con ella,
+    # igual que el Monte Carlo: al volver a pintar desde memoria no se
+    # repiten y la tabla y las gráficas usan el mismo precio.
+    if "frames" not in entrada:
+        entrada["frames"] = {
+            "Long Strangle OTM": payoff_long_strangle_from_rows(
+                row_call_otm, row_put_otm, ticker=symbol_mov, spot=spot
+            ),
+            "Long Guts": payoff_long_guts_from_rows(
+                row_call_itm, row_put_itm, ticker=symbol_mov, spot=spot
+            ),
+            "Long Straddle ATM": payoff_long_straddle_from_rows(
+                row_call_atm, row_put_atm, ticker=symbol_mov, spot=spot
+            ),
+            "Long Box (solo buy)": payoff_long_box_from_rows(
+                row_call_K1, row_call_K2, row_put_K1, row_put_K2, ticker=symbol_mov, spot=spot
+            ),
+        }
+    frames = entrada["frames"]
+    df_strangle = frames["Long Strangle OTM"]
+    df_guts = frames["Long Guts"]
+    df_straddle = frames["Long Straddle ATM"]
+    df_box = frames["Long Box (solo buy)"]
+
+    if "tabla_mc" not in entrada:
+        entrada["tabla_mc"] = probability_table(
+            frames, spot, row_call_atm.iv, years_to_expiry(item_sel_mov["timestamp"])
+        )
+    tabla_mc = entrada["tabla_mc"]
+    if tabla_mc is not None:
+        st.markdown("### Probabilidad de beneficio (Monte Carlo)")
+        st.dataframe(tabla_mc.style.format("{:.2f}").format({"Prob. beneficio": "{:.1%}"}))
+
+    # Solo se pinta la estrategia elegida; al cambiar de estrategia se vuelve
+    # a ejecutar este fragmento (no todo el script), y las figuras salen de
+    # la caché compartida mientras no cambie la cadena.
+    @st.fragment
+    def estrategia_seleccionada():
+        estrategia = st.segmented_control(
+            "Estrategia", ESTRATEGIAS_MOV, default=ESTRATEGIAS_MOV[0],
+            key="estrategia_mov", label_visibility="collapsed"
+        ) or ESTRATEGIAS_MOV[0]
+
+        if estrategia == "Long Strangle OTM":
             st.subheader("Long Strangle OTM")
-            df_strangle = payoff_long_strangle_from_rows(
-                row_call_otm, row_put_otm, ticker=symbol_mov
-            )
-            fig1 = plot_payoff(df_strangle, "Long Strangle OTM", ticker=symbol_mov)
+            fig1 = plot_payoff(df_strangle, "Long Strangle OTM", ticker=symbol_mov, spot=spot)
             st.plotly_chart(fig1, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -328,12 +369,9 @@ def dashboard_app_movement():
                 Es típico cuando se espera **noticia / evento** que pueda disparar el precio en cualquier dirección.
                 """)
 
-        with tabm_2:
+        elif estrategia == "Long Guts":
             st.subheader("Long Guts")
-            df_guts = payoff_long_guts_from_rows(
-                row_call_itm, row_put_itm, ticker=symbol_mov
-            )
-            fig2 = plot_payoff(df_guts, "Long Guts", ticker=symbol_mov)
+            fig2 = plot_payoff(df_guts, "Long Guts", ticker=symbol_mov, spot=spot)
             st.plotly_chart(fig2, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -362,12 +400,9 @@ def dashboard_app_movement():
                 """)
 
 
-        with tabm_3:
+        elif estrategia == "Long Straddle ATM":
             st.subheader("Long Straddle ATM")
-            df_straddle = payoff_long_straddle_from_rows(
-                row_call_atm, row_put_atm, ticker=symbol_mov
-            )
-            fig4 = plot_payoff(df_straddle, "Long Straddle ATM", ticker=symbol_mov)
+            fig4 = plot_payoff(df_straddle, "Long Straddle ATM", ticker=symbol_mov, spot=spot)
             st.plotly_chart(fig4, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -395,12 +430,9 @@ def dashboard_app_movement():
                 Es típica cuando se espera un **evento clave** (resultados, anuncio importante…) pero no se sabe en qué dirección se moverá el mercado.
                 """)
 
-        with tabm_4:
+        elif estrategia == "Long Box (solo buy)":
             st.subheader("Long Box (solo buy)")
-            df_box = payoff_long_box_from_rows(
-                row_call_K1, row_call_K2, row_put_K1, row_put_K2, ticker=symbol_mov
-            )
-            fig5 = plot_payoff(df_box, "Long Box (solo buy)", ticker=symbol_mov)
+            fig5 = plot_payoff(df_box, "Long Box (solo buy)", ticker=symbol_mov, spot=spot)
             st.plotly_chart(fig5, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -428,9 +460,7 @@ def dashboard_app_movement():
                 Se usa más como **herramienta teórica / de arbitraje** que como apuesta direccional o de volatilidad.
                 """)
 
-    else:
-        if st.session_state.get("mostrar_texto_global", True):
-            st.info("Pulsa el botón para descargar las opciones y ver los payoffs.")
+    estrategia_seleccionada()
 
 
 # Para probar este fichero directamente si quieres
@@ -1,11 +1,14 @@
-import pandas as pd
 import streamlit as st
 
 from .tabla import dashboard_universe_vs_sp500
 
 from scrapper.fecha import fechas_unix
 
-from scrapper.sp500 import scrape_series_data
+from scrapper.sp500 import get_sp500_constituents
+
+from .chain import display_rows
+
+from .strategy import PUT, leg_from_row, payoff_frame
 
 from .payoff_utils import (
     load_calls_for_expiration,
@@ -15,73 +18,40 @@ from .payoff_utils import (
     best_otm_put,
     choose_butterfly_call_rows,
     choose_butterfly_put_rows,
+    choose_put_ladder_rows,
     get_current_price,
     make_price_grid,
-    payoff_put_long,
-    payoff_call_long,
-    plot_payoff
+    plot_payoff,
+    options_cache_caption,
+    refresh_implied_vol,
+    probability_table,
+    years_to_expiry
 )
 
-@st.cache_data(show_spinner=False)      
-def choose_put_ladder_rows(df_puts, spot):
-    """
-    Elige las ROWS para una PUT LADDER (solo buy):
-
-    +1 Put K   (ATM)
-    -1 Put K1  (OTM intermedia, más baja que K)
-    +1 Put K2  (OTM más lejana, aún más baja)
-    """
-    row_K = choose_atm_strike(df_puts, spot)
-    K = row_K["Precio de ejercicio"]
-
-    row_K1 = best_otm_put(df_puts, spot)
-    K1 = row_K1["Precio de ejercicio"]
-
-    df = df_puts.copy().sort_values("Precio de ejercicio").reset_index(drop=True)
-
-    #    K2_target = K1 - (K - K1) = 2*K1 - K
-    K2_target = K1 - (K - K1)
-
-    df_aux = df[df["Precio de ejercicio"] < K1].copy()
-    if df_aux.empty:
-        df_aux = df.copy()
-
-    df_aux["diff"] = (df_aux["Precio de ejercicio"] - K2_target).abs()
-    idx2 = df_aux["diff"].idxmin()
-    row_K2 = df_aux.loc[idx2]
-
-    row_K2 = row_K2.drop(labels=["diff"], errors="ignore")
-
-    return row_K2
+from .session_store import session_chains
 
 
 def payoff_long_put_otm_from_row(row_otm,
                                  factor_min=0.7, factor_max=1.1,
                                  n=400,
-                                 ticker="AAPL"):
-    K = row_otm["Precio de ejercicio"]
-    p = row_otm["Último precio"]
-    precio_actual = get_current_price(ticker)
-
+                                 ticker="AAPL", spot=None):
+    legs = [leg_from_row(row_otm, PUT)]
+    precio_actual = get_current_price(ticker) if spot is None else spot
     S = make_price_grid(precio_actual, factor_min, factor_max, n)
-    payoff = payoff_put_long(S, K, p)
-    return pd.DataFrame({"S": S, "payoff": payoff})
+    return payoff_frame(legs, S)
 
 
 def payoff_long_put_atm_from_row(row_atm,
                                  factor_min=0.8, factor_max=1.2,
                                  n=400,
-                                 ticker="AAPL"):
-    K = row_atm["Precio de ejercicio"]
-    p = row_atm["Último precio"]
-    precio_actual = get_current_price(ticker)
-
+                                 ticker="AAPL", spot=None):
+    legs = [leg_from_row(row_atm, PUT)]
+    precio_actual = get_current_price(ticker) if spot is None else spot
     S = make_price_grid(precio_actual, factor_min, factor_max, n)
-    payoff = payoff_put_long(S, K, p)
-    return pd.DataFrame({"S": S, "payoff": payoff})
+    return payoff_frame(legs, S)
 
 
-def payoff_put_ladder_from_rows(row_K, row_K1, row_K2, ticker="AAPL",
+def payoff_put_ladder_from_rows(row_K, row_K1, row_K2, ticker="AAPL", spot=None,
                                 factor_min=0.7, factor_max=1.1, n=400):
     """
     PUT LADDER (solo buy, neto en débito)
@@ -89,97 +59,87 @@ def payoff_put_ladder_from_rows(row_K, row_K1, row_K2, ticker="AAPL",
     -1 Put K1  (OTM intermedia, más baja que K)
     +1 Put K2  (OTM más lejana, aún más baja)
     """
-    K,  p  = row_K["Precio de ejercicio"],  row_K["Último precio"]
-    K1, p1 = row_K1["Precio de ejercicio"], row_K1["Último precio"]
-    K2, p2 = row_K2["Precio de ejercicio"], row_K2["Último precio"]
-
     # Para put ladder bajista: K2 < K1 < K
-    assert K2 < K1 < K, "Para la PUT LADDER se requiere K2 < K1 < K"
-
-    precio_actual = get_current_price(ticker)
+    assert row_K2.strike < row_K1.strike < row_K.strike, "Para la PUT LADDER se requiere K2 < K1 < K"
+
+    legs = [
+        leg_from_row(row_K, PUT, side=1),
+        leg_from_row(row_K1, PUT, side=-1),
+        leg_from_row(row_K2, PUT, side=1),
+    ]
+    precio_actual = get_current_price(ticker) if spot is None else spot
     S = make_price_grid(precio_actual, factor_min, factor_max, n)
-
-    P_long_K  = payoff_put_long(S, K,  p)   # +1 Put K
-    P_long_K2 = payoff_put_long(S, K2, p2)  # +1 Put K2
-
-    P_short_K1 = payoff_put_long(S, K1, p1)
-
-    payoff_total = P_long_K - P_short_K1 + P_long_K2
-
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
+    return payoff_frame(legs, S)
 
 
 def payoff_put_butterfly_from_rows(row_K1, row_K2, row_K3,
                                    factor_min=0.8, factor_max=1.2,
                                    n=400,
-                                   ticker="AAPL"):
+                                   ticker="AAPL", spot=None):
     """
     Mariposa LONG de PUTS:
     +1 Put K1   (strike alto)
     -2 Put K2   (strike medio, ATM)
     +1 Put K3   (strike bajo)
     """
-    K1, p1 = row_K1["Precio de ejercicio"], row_K1["Último precio"]
-    K2, p2 = row_K2["Precio de ejercicio"], row_K2["Último precio"]
-    K3, p3 = row_K3["Precio de ejercicio"], row_K3["Último precio"]
-
     # Queremos K1 > K2 > K3
-    assert K1 > K2 > K3, "Para la mariposa de PUTS se requiere K1 > K2 > K3"
-
-    precio_actual = get_current_price(ticker)
+    assert row_K1.strike > row_K2.strike > row_K3.strike, "Para la mariposa de PUTS se requiere K1 > K2 > K3"
+
+    legs = [
+        leg_from_row(row_K1, PUT, side=1),
+        leg_from_row(row_K2, PUT, side=-1, qty=2),
+        leg_from_row(row_K3, PUT, side=1),
+    ]
+    precio_actual = get_current_price(ticker) if spot is None else spot
     S = make_price_grid(precio_actual, factor_min, factor_max, n)
-
-    P1_long = payoff_put_long(S, K1, p1)   # +1 Put K1
-    P2_long = payoff_put_long(S, K2, p2)   # +1 Put K2
-    P3_long = payoff_put_long(S, K3, p3)   # +1 Put K3
-
-    payoff_total = P1_long - 2 * P2_long + P3_long
-
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
+    return payoff_frame(legs, S)
 
 
 def payoff_long_put_itm_from_row(row_itm,
                                  factor_min=0.9, factor_max=1.3,
                                  n=400,
-                                 ticker="AAPL"):
-    K = row_itm["Precio de ejercicio"]
-    p = row_itm["Último precio"]
-    precio_actual = get_current_price(ticker)
-
+                                 ticker="AAPL", spot=None):
+    legs = [leg_from_row(row_itm, PUT)]
+    precio_actual = get_current_price(ticker) if spot is None else spot
     S = make_price_grid(precio_actual, factor_min, factor_max, n)
-    payoff = payoff_put_long(S, K, p)
-    return pd.DataFrame({"S": S, "payoff": payoff})
+    return payoff_frame(legs, S)
 
 
 def payoff_put_backspread_from_rows(row_ATM, row_OTM,
                                     factor_min=0.75, factor_max=1.15,
                                     n=400,
-                                    ticker="AAPL"):
+                                    ticker="AAPL", spot=None):
     """
     Backspread bajista de PUTS:
         -1 Put ATM  (strike más alto)
         +2 Put OTM  (strike más bajo)
     """
-    K_atm, p_atm = row_ATM["Precio de ejercicio"], row_ATM["Último precio"]
-    K_otm, p_otm = row_OTM["Precio de ejercicio"], row_OTM["Último precio"]
-
-    assert K_atm > K_otm, "Para un backspread de PUTS: K_ATM > K_OTM"
+    assert row_ATM.strike > row_OTM.strike, "Para un backspread de PUTS: K_ATM > K_OTM"
 
-    precio_actual = get_current_price(ticker)
+    legs = [
+        leg_from_row(row_ATM, PUT, side=-1),
+        leg_from_row(row_OTM, PUT, side=1, qty=2),
+    ]
+    precio_actual = get_current_price(ticker) if spot is None else spot
     S = make_price_grid(precio_actual, factor_min, factor_max, n)
+    return payoff_frame(legs, S)
 
-    P_atm = payoff_put_long(S, K_atm, p_atm)
-    P_otm = payoff_put_long(S, K_otm, p_otm)
 
-    payoff_total = -P_atm + 2 * P_otm
-
-    return pd.DataFrame({"S": S, "payoff": payoff_total})
+# Estrategias del selector (una se pinta cada vez).
+ESTRATEGIAS_PUT = [
+    "Long Put OTM",
+    "Long Put ATM",
+    "Put Ladder",
+    "Put Butterfly",
+    "Long Put ITM",
+    "Put Ratio Backspread",
+]
 
 
 def dashboard_app_put():
     st.title("📉 Payoffs de estrategias con opciones PUT")
 
-    df_sp500 = scrape_series_data(verbose=False)
+    df_sp500 = get_sp500_constituents()
     Empresas = df_sp500['Company'].iloc[1:5].tolist()
     TICKERS = df_sp500['Symbol'].iloc[1:5].tolist()
 
@@ -246,90 +206,147 @@ def dashboard_app_put():
 
     st.markdown("---")
 
-    if st.button("📥 Descargar PUTS para esta fecha", key="btn_descargar_put"):
+    # Lo descargado y los strikes elegidos se guardan en la sesión: cualquier
+    # otro widget vuelve a ejecutar el script con el botón a False.
+    cadenas = session_chains("put")
+    descargado = st.button("📥 Descargar PUTS para esta fecha", key="btn_descargar_put")
+    if descargado:
         with st.spinner("Descargando opciones PUT..."):
-            puts_df = load_puts_for_expiration(
+            puts_chain = load_puts_for_expiration(
                 symbol_put,
                 item_sel_put["timestamp"],
                 max_intentos=max_intentos_put
             )
 
-        if puts_df is None or puts_df.empty:
+        if puts_chain is None or puts_chain.empty:
             if st.session_state.get("mostrar_texto_global", True):
                 st.error("No se pudieron descargar opciones PUT para este símbolo/fecha.")
             return
-        
-        if st.session_state.get("mostrar_texto_global", True):
-            st.success("Datos de PUTs descargados correctamente.")
-        st.subheader("Vista previa de PUTs")
-        st.dataframe(puts_df.head())
 
         spot = get_current_price(symbol_put)
-        if st.session_state.get("mostrar_texto_global", True):
-            st.info(f"Precio actual de {symbol_put}: {spot:.2f} $")
+        refresh_implied_vol(puts_chain, spot, item_sel_put["timestamp"], PUT)
 
         try:
-            row_ATM_put = choose_atm_strike(puts_df, spot=spot)
-            row_OTM_put = best_otm_put(puts_df, spot=spot)
-            row_ITM_put = choose_butterfly_put_rows(puts_df, spot=spot)
-            row_OTM2_put = choose_put_ladder_rows(puts_df, spot=spot)
+            rows = (
+                choose_atm_strike(puts_chain, spot=spot),
+                best_otm_put(puts_chain, spot=spot),
+                choose_butterfly_put_rows(puts_chain, spot=spot),
+                choose_put_ladder_rows(puts_chain, spot=spot),
+            )
         except Exception as e:
             if st.session_state.get("mostrar_texto_global", True):
                 st.error(f"Error al seleccionar strikes para estrategias: {e}")
             return
 
-        st.markdown("### Strikes seleccionados")
-        colA, colB, colC = st.columns(3)
-        with colA:
-            st.write("**ATM (K_ATM)**")
-            st.write(row_ATM_put[["Precio de ejercicio", "Último precio", "Volatilidad implícita"]])
-        with colB:
-            st.write("**OTM (K_OTM)**")
-            st.write(row_OTM_put[["Precio de ejercicio", "Último precio", "Volatilidad implícita"]])
-        with colC:
-            st.write("**Butterfly K1 / K2 / K3**")
-            st.write(pd.DataFrame(
-                [row_ITM_put, row_ATM_put, row_OTM_put],
-                index=["K1 (alto)", "K2 (ATM)", "K3 (bajo)"]
-            )[["Precio de ejercicio", "Último precio", "Volatilidad implícita"]])
-
-        st.markdown("---")
-
-        st.markdown("""
-        <style>
-        /* 1º tab → VERDE */
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(1) {
-            color: #00CC44 !important;
-        }
+        cadenas.put(symbol_put, item_sel_put["timestamp"], puts=puts_chain, spot=spot, rows=rows)
 
-        /* 2º, 3º y 4º → AMARILLO */
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(2),
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(3),
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(4) {
-            color: #FFD700 !important;
-        }
+    entrada = cadenas.get(symbol_put, item_sel_put["timestamp"])
+    if entrada is None:
+        if st.session_state.get("mostrar_texto_global", True):
+            st.info("Pulsa el botón para descargar las PUTS y ver los payoffs.")
+        return
+
+    puts_chain, spot = entrada["puts"], entrada["spot"]
+    row_ATM_put, row_OTM_put, row_ITM_put, row_OTM2_put = entrada["rows"]
+
+    if descargado and st.session_state.get("mostrar_texto_global", True):
+        st.success("Datos de PUTs descargados correctamente.")
+        st.caption(options_cache_caption())
+    st.subheader("Vista previa de PUTs")
+    st.dataframe(puts_chain.to_frame(n=5))
+
+    if st.session_state.get("mostrar_texto_global", True):
+        st.info(f"Precio actual de {symbol_put}: {spot:.2f} $")
+
+    st.markdown("### Strikes seleccionados")
+    colA, colB, colC = st.columns(3)
+    with colA:
+        st.write("**ATM (K_ATM)**")
+        st.write(row_ATM_put.to_series())
+    with colB:
+        st.write("**OTM (K_OTM)**")
+        st.write(row_OTM_put.to_series())
+    with colC:
+        st.write("**Butterfly K1 / K2 / K3**")
+        st.write(display_rows(
+            [row_ITM_put, row_ATM_put, row_OTM_put],
+            index=["K1 (alto)", "K2 (ATM)", "K3 (bajo)"]
+        ))
+
+    st.markdown("---")
 
-        /* 5º y 6º → ROJO */
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(5),
-        .stTabs [data-baseweb="tab-list"] button:nth-of-type(6) {
-            color: #FF0000 !important;
+    st.markdown("""
+    <style>
+    /* 1º tab → VERDE */
+    .st-key-estrategia_put button:nth-of-type(1) {
+        color: #00CC44 !important;
+    }
+
+    /* 2º, 3º y 4º → AMARILLO */
+    .st-key-estrategia_put button:nth-of-type(2),
+    .st-key-estrategia_put button:nth-of-type(3),
+    .st-key-estrategia_put button:nth-of-type(4) {
+        color: #FFD700 !important;
+    }
+
+    /* 5º y 6º → ROJO */
+    .st-key-estrategia_put button:nth-of-type(5),
+    .st-key-estrategia_put button:nth-of-type(6) {
+        color: #FF0000 !important;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+
+    # Payoffs de todas las pestañas (baratos: lineales a trozos) para
+    # calcular su probabilidad de beneficio con un solo Monte Carlo. Se
+    # construyen una vez por entrada sobre su spot y se guardan con ella,
+    # igual que el Monte Carlo: al volver a pintar desde memoria no se
+    # repiten y la tabla y las gráficas usan el mismo precio.
+    if "frames" not in entrada:
+        entrada["frames"] = {
+            "Long Put OTM": payoff_long_put_otm_from_row(row_OTM_put, ticker=symbol_put, spot=spot),
+            "Long Put ATM": payoff_long_put_atm_from_row(row_ATM_put, ticker=symbol_put, spot=spot),
+            "Put Ladder": payoff_put_ladder_from_rows(
+                row_ATM_put, row_OTM_put, row_OTM2_put, ticker=symbol_put, spot=spot
+            ),
+            "Put Butterfly": payoff_put_butterfly_from_rows(
+                row_ITM_put, row_ATM_put, row_OTM_put, ticker=symbol_put, spot=spot
+            ),
+            "Long Put ITM": payoff_long_put_itm_from_row(row_ITM_put, ticker=symbol_put, spot=spot),
+            "Put Ratio Backspread": payoff_put_backspread_from_rows(
+                row_ATM_put, row_OTM_put, ticker=symbol_put, spot=spot
+            ),
         }
-        </style>
-        """, unsafe_allow_html=True)
-
-        tabput_1, tabput_2, tabput_3, tabput_4, tabput_5, tabput_6 = st.tabs([
-            "Long Put OTM",
-            "Long Put ATM",
-            "Put Ladder",
-            "Put Butterfly",
-            "Long Put ITM",
-            "Put Ratio Backspread"
-        ])
-
-        with tabput_1:
+    frames = entrada["frames"]
+    df_long_otm = frames["Long Put OTM"]
+    df_long_atm = frames["Long Put ATM"]
+    df_ladder = frames["Put Ladder"]
+    df_butterfly = frames["Put Butterfly"]
+    df_long_itm = frames["Long Put ITM"]
+    df_backspread = frames["Put Ratio Backspread"]
+
+    if "tabla_mc" not in entrada:
+        entrada["tabla_mc"] = probability_table(
+            frames, spot, row_ATM_put.iv, years_to_expiry(item_sel_put["timestamp"])
+        )
+    tabla_mc = entrada["tabla_mc"]
+    if tabla_mc is not None:
+        st.markdown("### Probabilidad de beneficio (Monte Carlo)")
+        st.dataframe(tabla_mc.style.format("{:.2f}").format({"Prob. beneficio": "{:.1%}"}))
+
+    # Solo se pinta la estrategia elegida; al cambiar de estrategia se vuelve
+    # a ejecutar este fragmento (no todo el script), y las figuras salen de
+    # la caché compartida mientras no cambie la cadena.
+    @st.fragment
+    def estrategia_seleccionada():
+        estrategia = st.segmented_control(
+            "Estrategia", ESTRATEGIAS_PUT, default=ESTRATEGIAS_PUT[0],
+            key="estrategia_put", label_visibility="collapsed"
+        ) or ESTRATEGIAS_PUT[0]
+
+        if estrategia == "Long Put OTM":
             st.subheader("Long Put OTM")
-            df_long_otm = payoff_long_put_otm_from_row(row_OTM_put, ticker=symbol_put)
-            fig1 = plot_payoff(df_long_otm, "Long Put OTM", ticker=symbol_put)
+            fig1 = plot_payoff(df_long_otm, "Long Put OTM", ticker=symbol_put, spot=spot)
             st.plotly_chart(fig1, width='stretch')   
             if st.session_state.get("mostrar_estrategias_global", True):  
                 st.markdown("""
@@ -356,10 +373,9 @@ def dashboard_app_put():
                 """)
 
 
-        with tabput_2:
+        elif estrategia == "Long Put ATM":
             st.subheader("Long Put ATM")
-            df_long_atm = payoff_long_put_atm_from_row(row_ATM_put, ticker=symbol_put)
-            fig2 = plot_payoff(df_long_atm, "Long Put ATM", ticker=symbol_put)
+            fig2 = plot_payoff(df_long_atm, "Long Put ATM", ticker=symbol_put, spot=spot)
             st.plotly_chart(fig2, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -384,13 +400,10 @@ def dashboard_app_put():
                 Es la forma “estándar” de tomar una posición **bajista con riesgo limitado**.
                 """)
 
-        
-        with tabput_3:
+
+        elif estrategia == "Put Ladder":
             st.subheader("Put Ladder")
-            df_ladder = payoff_put_ladder_from_rows(
-                row_ATM_put, row_OTM_put, row_OTM2_put, ticker=symbol_put
-            )
-            fig3 = plot_payoff(df_ladder, "Put Ladder", ticker=symbol_put)
+            fig3 = plot_payoff(df_ladder, "Put Ladder", ticker=symbol_put, spot=spot)
             st.plotly_chart(fig3, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -418,12 +431,9 @@ def dashboard_app_put():
                 """)
 
 
-        with tabput_4:
+        elif estrategia == "Put Butterfly":
             st.subheader("Put Butterfly (buy-only)")
-            df_butterfly = payoff_put_butterfly_from_rows(
-                row_ITM_put, row_ATM_put, row_OTM_put, ticker=symbol_put
-            )
-            fig4 = plot_payoff(df_butterfly, "Put Butterfly (buy-only)", ticker=symbol_put)
+            fig4 = plot_payoff(df_butterfly, "Put Butterfly (buy-only)", ticker=symbol_put, spot=spot)
             st.plotly_chart(fig4, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -451,10 +461,9 @@ def dashboard_app_put():
                 Se usa cuando se espera que el precio termine en un **rango concreto** de forma relativamente controlada.
                 """)
 
-        with tabput_5:
+        elif estrategia == "Long Put ITM":
             st.subheader("Long Put ITM")
-            df_long_itm = payoff_long_put_itm_from_row(row_ITM_put, ticker=symbol_put)
-            fig5 = plot_payoff(df_long_itm, "Long Put ITM", ticker=symbol_put)
+            fig5 = plot_payoff(df_long_itm, "Long Put ITM", ticker=symbol_put, spot=spot)
             st.plotly_chart(fig5, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -479,10 +488,9 @@ def dashboard_app_put():
                 Ideal cuando se espera una **caída alta o moderada con probabilidad elevada**.
                 """)
 
-        with tabput_6:
+        elif estrategia == "Put Ratio Backspread":
             st.subheader("Put Ratio Backspread (buy-only)")
-            df_backspread = payoff_put_backspread_from_rows(row_ATM_put, row_OTM_put, ticker=symbol_put)
-            fig6 = plot_payoff(df_backspread, "Put Ratio Backspread (buy-only)", ticker=symbol_put)
+            fig6 = plot_payoff(df_backspread, "Put Ratio Backspread (buy-only)", ticker=symbol_put, spot=spot)
             st.plotly_chart(fig6, width='stretch')
             if st.session_state.get("mostrar_estrategias_global", True):
                 st.markdown("""
@@ -509,9 +517,7 @@ def dashboard_app_put():
                 Es típica cuando se anticipa un **movimiento bajista violento**, pero se quiere riesgo limitado.
                 """)
 
-    else:
-        if st.session_state.get("mostrar_texto_global", True):
-            st.info("Pulsa el botón para descargar las PUTS y ver los payoffs.")
+    estrategia_seleccionada()
 
 if __name__ == "__main__":
     dashboard_app_put()
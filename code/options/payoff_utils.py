@@ -1,87 +1,178 @@
 import numpy as np
-import yfinance as yf
 import plotly.graph_objects as go
 import time
 from scrapper.options import scrape_options_data
+from scrapper.cache import OPTIONS_CACHE
+from scrapper.quotes import QUOTE_SERVICE
+from render.cache import cached_figure, data_fingerprint
+from render.downsample import minmax_indices
 
-def load_calls_for_expiration(symbol: str, timestamp: int, max_intentos: int = 10):
+from .chain import OptionChain, as_chain
+from .montecarlo import monte_carlo_stats
+
+
+def _load_options(symbol, timestamp, max_intentos, required):
     """
-    Descarga datos de opciones CALL para un symbol y un timestamp concreto.
-    Devuelve (df_calls) o None si no se pudo.
+    Devuelve (df_calls, df_puts) con una sola descarga y un solo parseo por
+    intento, pasando antes por la caché en disco. `required` indica qué lados
+    (0 = CALLS, 1 = PUTS) se piden; un lado que falta sale como None.
+
+    Solo se reintenta si no llegó ninguna tabla (error de red, HTTP o página
+    sin cargar). Si la página trae una tabla y no la otra, es que no la tiene:
+    repetir la petición no cambia nada y solo bloquea la sesión.
     """
-    calls_df = None
+    cached = OPTIONS_CACHE.get(symbol, timestamp, required)
+    if cached is not None:
+        return cached
+
+    options = (None, None)
     for intento in range(max_intentos):
-        options_compra, _ = scrape_options_data(symbol, timestamp, verbose=False)
-        if options_compra is not None and not options_compra.empty:
-            calls_df = options_compra
+        options = scrape_options_data(symbol, timestamp, verbose=False)
+        if any(df is not None for df in options):
             break
-        else:
+        if intento + 1 < max_intentos:
             time.sleep(2*intento)
-    return calls_df
+
+    options = tuple(df if df is not None and not df.empty else None for df in options)
+    if any(df is not None for df in options):
+        OPTIONS_CACHE.put(symbol, timestamp, *options)
+    return options
+
+
+def _to_chain(df):
+    return None if df is None else OptionChain(df)
+
+
+def load_options_for_expiration(symbol: str, timestamp: int, max_intentos: int = 10):
+    """
+    Descarga CALLS y PUTS para un symbol y un timestamp concreto con una sola
+    petición por intento.
+    Devuelve (calls, puts) como OptionChain; el lado que no se pudo descargar es None.
+    """
+    calls, puts = _load_options(symbol, timestamp, max_intentos, required=(0, 1))
+    return _to_chain(calls), _to_chain(puts)
+
+
+def load_calls_for_expiration(symbol: str, timestamp: int, max_intentos: int = 10):
+    """
+    Descarga datos de opciones CALL para un symbol y un timestamp concreto.
+    Devuelve un OptionChain o None si no se pudo.
+    """
+    return _to_chain(_load_options(symbol, timestamp, max_intentos, required=(0,))[0])
 
 
 def load_puts_for_expiration(symbol: str, timestamp: int, max_intentos: int = 10):
     """
     Descarga datos de opciones PUT para un symbol y un timestamp concreto.
-    Devuelve (df_puts) o None si no se pudo.
+    Devuelve un OptionChain o None si no se pudo.
     """
-    puts_df = None
-    for intento in range(max_intentos):
-        _, options_venta = scrape_options_data(symbol, timestamp, verbose=False)
-        if options_venta is not None and not options_venta.empty:
-            puts_df = options_venta
-            break
-        else:
-            time.sleep(2*intento)
-    return puts_df
+    return _to_chain(_load_options(symbol, timestamp, max_intentos, required=(1,))[1])
+
+
+SECONDS_YEAR = 365 * 24 * 60 * 60
+# Yahoo da el vencimiento a las 00:00 UTC del día; las opciones dejan de
+# cotizar al cierre (16:00 en Nueva York, ~20:00 UTC).
+EXPIRY_CLOSE_SECONDS = 20 * 60 * 60
+
+
+def years_to_expiry(timestamp, now=None):
+    """
+    Años que faltan hasta el cierre del día de vencimiento `timestamp`.
+    """
+    now = time.time() if now is None else now
+    return max((timestamp + EXPIRY_CLOSE_SECONDS - now) / SECONDS_YEAR, 0.0)
+
+
+def refresh_implied_vol(chain, spot, timestamp, kind):
+    """
+    Sustituye la IV descargada de `chain` (a menudo desfasada o a 0) por la
+    implícita en sus precios actuales. `kind`: "call" o "put".
+    """
+    if chain is not None and not chain.empty:
+        chain.solve_iv(spot, years_to_expiry(timestamp), kind)
+    return chain
+
+
+def options_cache_stats():
+    """
+    Aciertos, fallos y tasa de aciertos de la caché de cadenas de opciones.
+    """
+    return OPTIONS_CACHE.stats()
+
+
+def options_cache_caption():
+    """
+    Texto con la tasa de aciertos de la caché de opciones para st.caption.
+    """
+    stats = options_cache_stats()
+    return (f"Caché de opciones: {stats['hit_rate']:.0%} de aciertos "
+            f"({stats['hits']} aciertos / {stats['misses']} fallos)")
 
 
 def choose_atm_strike(df, spot):
     """
     Devuelve la ROW (Series) de la opción ATM:
     la que tiene strike más cercano al spot.
+    `df` puede ser el DataFrame de opciones o un OptionChain.
     """
-    df = df.copy().sort_values("Precio de ejercicio").reset_index(drop=True)
-    df["dist"] = (df["Precio de ejercicio"] - spot).abs()
-    idx_atm = df["dist"].idxmin()
-    return df.loc[idx_atm]
+    return as_chain(df).nearest(spot)
 
 
-def best_otm_call(df, spot):
+def match_strike_row(df, K):
     """
-    Devuelve la ROW (Series) de la mejor Call OTM:
-    - strike > spot
-    - IV en [Volatilidad_implícita_min, Volatilidad_implícita_max]
+    Devuelve la fila cuyo 'Precio de ejercicio' coincida con K
+    (o la más cercana si no existe exactamente).
+    """
+    return as_chain(df).nearest(K)
+
+
+def _best_otm_index(chain, spot, side):
+    """
+    Posición de la mejor opción OTM más allá de la ATM:
+    - side=+1 (CALL): strike > spot
+    - side=-1 (PUT):  strike < spot
+    - |IV| en el primer cuartil de las candidatas
     - score = distance / (Último precio * |IV|), minimizado
     """
-    row_atm = choose_atm_strike(df, spot)
-    K_atm = row_atm["Precio de ejercicio"]
+    nombre = "CALLs" if side > 0 else "PUTs"
+    K_atm = chain.strike[chain.nearest_index(spot)]
 
-    df = df[df["Precio de ejercicio"] > K_atm]
-    if df.empty:
-        raise ValueError("No hay CALLs OTM más allá de la ATM.")
-    
-    df = df.copy()
+    if side > 0:
+        candidatas = np.arange(np.searchsorted(chain.strike, K_atm, side="right"), len(chain))
+    else:
+        candidatas = np.arange(np.searchsorted(chain.strike, K_atm, side="left"))
+    if candidatas.size == 0:
+        raise ValueError(f"No hay {nombre} OTM más allá de la ATM.")
 
-    df["distance"] = df["Precio de ejercicio"] - spot
-    df = df[df["distance"] > 0] 
+    distance = side * (chain.strike[candidatas] - spot)
+    candidatas, distance = candidatas[distance > 0], distance[distance > 0]
 
-    Volatilidad_implícita_min = df["Volatilidad implícita"].abs().quantile(0)
-    Volatilidad_implícita_max = df["Volatilidad implícita"].abs().quantile(0.25)
-    df = df[
-        (df["Volatilidad implícita"].abs() >= Volatilidad_implícita_min) &
-        (df["Volatilidad implícita"].abs() <= Volatilidad_implícita_max)
-    ]
+    iv = np.abs(chain.iv[candidatas])
+    if candidatas.size and not np.isnan(iv).all():
+        iv_min, iv_max = np.nanquantile(iv, [0, 0.25])
+        ok = (iv >= iv_min) & (iv <= iv_max)
+        candidatas, distance, iv = candidatas[ok], distance[ok], iv[ok]
+    else:
+        candidatas = candidatas[:0]
 
-    if df.empty:
-        raise ValueError("No hay CALLs OTM que cumplan los filtros de IV.")
+    if candidatas.size == 0:
+        raise ValueError(f"No hay {nombre} OTM que cumplan los filtros de IV.")
 
-    df["score"] = df["distance"] / (
-        df["Último precio"] *
-        df["Volatilidad implícita"].abs()
-    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = distance / (chain.last[candidatas] * iv)
+    score = np.where(np.isnan(score), np.inf, score)
+    return int(candidatas[np.argmin(score)])
 
-    return df.sort_values("score", ascending=True).iloc[0]
+
+def best_otm_call(df, spot):
+    """
+    Devuelve la ROW (Series) de la mejor Call OTM:
+    - strike > spot
+    - IV en [Volatilidad_implícita_min, Volatilidad_implícita_max]
+    - score = distance / (Último precio * |IV|), minimizado
+    """
+    chain = as_chain(df)
+    return chain.row(_best_otm_index(chain, spot, side=1))
 
 
 def best_otm_put(df, spot):
@@ -91,34 +182,8 @@ def best_otm_put(df, spot):
     - IV en [Volatilidad_implícita_min, Volatilidad_implícita_max]
     - score = distance / (Último precio * |IV|), minimizado
     """
-    row_atm = choose_atm_strike(df, spot)
-    K_atm = row_atm["Precio de ejercicio"]
-
-    df = df[df["Precio de ejercicio"] < K_atm]
-    if df.empty:
-        raise ValueError("No hay PUTs OTM más allá de la ATM.")
-    
-    df = df.copy()
-
-    df["distance"] = spot - df["Precio de ejercicio"]
-    df = df[df["distance"] > 0]  
-
-    Volatilidad_implícita_min = df["Volatilidad implícita"].abs().quantile(0)
-    Volatilidad_implícita_max = df["Volatilidad implícita"].abs().quantile(0.25)
-    df = df[
-        (df["Volatilidad implícita"].abs() >= Volatilidad_implícita_min) &
-        (df["Volatilidad implícita"].abs() <= Volatilidad_implícita_max)
-    ]
-
-    if df.empty:
-        raise ValueError("No hay PUTS OTM que cumplan los filtros de IV.")
-
-    df["score"] = df["distance"] / (
-        df["Último precio"] *
-        df["Volatilidad implícita"].abs()
-    )
-
-    return df.sort_values("score", ascending=True).iloc[0]
+    chain = as_chain(df)
+    return chain.row(_best_otm_index(chain, spot, side=-1))
 
 
 def choose_butterfly_call_rows(df_calls, spot):
@@ -128,28 +193,12 @@ def choose_butterfly_call_rows(df_calls, spot):
     - row_K3: mejor Call OTM (ala superior)
     - row_K1: strike simétrico a K3 respecto a K2 pero por FILAS (ala inferior)
     """
-    row_K2 = choose_atm_strike(df_calls, spot)
-    K2 = row_K2["Precio de ejercicio"]
-
-    row_K3 = best_otm_call(df_calls, spot)
-    K3 = row_K3["Precio de ejercicio"]
-
-    df = df_calls.copy().sort_values("Precio de ejercicio").reset_index(drop=True)
-
-    try:
-        idx2 = df.index[df["Precio de ejercicio"] == K2][0]
-        idx3 = df.index[df["Precio de ejercicio"] == K3][0]
-    except IndexError:
-        raise ValueError("K2 o K3 no se encuentran en la tabla de strikes")
-
-    d = idx3 - idx2
-    idx1 = idx2 - d
-    if idx1 < 0:
-        idx1 = 0  
-
-    row_K1 = df.loc[idx1]
+    chain = as_chain(df_calls)
+    idx2 = chain.nearest_index(spot)
+    idx3 = _best_otm_index(chain, spot, side=1)
 
-    return row_K1
+    idx1 = max(idx2 - (idx3 - idx2), 0)
+    return chain.row(idx1)
 
 
 def choose_butterfly_put_rows(df_puts, spot):
@@ -160,35 +209,94 @@ def choose_butterfly_put_rows(df_puts, spot):
     - row_K1: strike simétrico a K3 respecto a K2 pero por FILAS (strike más alto)
     Queremos finalmente K1 > K2 > K3.
     """
-    row_K2 = choose_atm_strike(df_puts, spot)
-    K2 = row_K2["Precio de ejercicio"]
+    chain = as_chain(df_puts)
+    idx2 = chain.nearest_index(spot)
+    idx3 = _best_otm_index(chain, spot, side=-1)
 
-    row_K3 = best_otm_put(df_puts, spot)
-    K3 = row_K3["Precio de ejercicio"]
+    idx1 = min(idx2 + (idx2 - idx3), len(chain) - 1)
+    return chain.row(idx1)
 
-    df = df_puts.copy().sort_values("Precio de ejercicio").reset_index(drop=True)
 
-    try:
-        idx2 = df.index[df["Precio de ejercicio"] == K2][0]
-        idx3 = df.index[df["Precio de ejercicio"] == K3][0]
-    except IndexError:
-        raise ValueError("K2 o K3 no se encuentran en la tabla de strikes")
+def choose_ladder_call_rows(df_calls, spot):
+    """
+    Elige las ROWS para una CALL LADDER (solo buy):
+
+    Estructura (típica):
+    - row_K:  Call ATM (base, comprada)
+    - row_K1: mejor Call OTM (primera ala)
+    - row_K2: Call OTM más lejana (segunda ala), con strike:
+              K2_target = K1 + (K1 - K)
+    """
+    chain = as_chain(df_calls)
+    K = chain.nearest(spot)["Precio de ejercicio"]
+    K1 = best_otm_call(chain, spot)["Precio de ejercicio"]
+
+    K2_target = K1 + (K1 - K)
+
+    # Se busca entre los strikes > K1 (o en toda la cadena si no hay).
+    lo = int(np.searchsorted(chain.strike, K1, side="right"))
+    if lo == len(chain):
+        lo = 0
+
+    return chain.row(chain.nearest_index(K2_target, lo=lo))
+
+
+def choose_put_ladder_rows(df_puts, spot):
+    """
+    Elige las ROWS para una PUT LADDER (solo buy):
+
+    +1 Put K   (ATM)
+    -1 Put K1  (OTM intermedia, más baja que K)
+    +1 Put K2  (OTM más lejana, aún más baja)
+    """
+    chain = as_chain(df_puts)
+    K = chain.nearest(spot)["Precio de ejercicio"]
+    K1 = best_otm_put(chain, spot)["Precio de ejercicio"]
 
-    d = idx2 - idx3
-    idx1 = idx2 + d
-    if idx1 >= len(df):
-        idx1 = len(df) - 1  
+    #    K2_target = K1 - (K - K1) = 2*K1 - K
+    K2_target = K1 - (K - K1)
 
-    row_K1 = df.loc[idx1]
+    # Se busca entre los strikes < K1 (o en toda la cadena si no hay).
+    hi = int(np.searchsorted(chain.strike, K1, side="left"))
+    if hi == 0:
+        hi = len(chain)
+
+    return chain.row(chain.nearest_index(K2_target, hi=hi))
 
-    return row_K1
 
 def get_current_price(indicador="AAPL"):
     """
-    Obtiene el precio actual del subyacente usando yfinance.
+    Obtiene el precio actual del subyacente usando yfinance, a través del
+    servicio de cotizaciones compartido (una petición por símbolo y TTL).
     """
-    precio_actual = yf.Ticker(indicador).history(period="1d")["Close"].iloc[-1]
-    return precio_actual
+    return QUOTE_SERVICE.get_price(indicador)
+
+
+MC_LABELS = {
+    "pop": "Prob. beneficio",
+    "expected_pnl": "P&L esperado",
+    "q05": "P&L 5%",
+    "q25": "P&L 25%",
+    "q50": "P&L mediano",
+    "q75": "P&L 75%",
+    "q95": "P&L 95%",
+}
+
+
+def probability_table(frames, spot, sigma, T, seed=0):
+    """
+    Probabilidad de beneficio, P&L esperado y cuantiles de todas las
+    estrategias de un dashboard con una sola simulación de Monte Carlo (GBM
+    con la IV ATM hasta el vencimiento).
+    frames: {nombre: DataFrame de payoff_frame}. Devuelve None si la IV no
+    es válida.
+    """
+    sigma = float(sigma)
+    if not np.isfinite(sigma) or sigma <= 0 or T <= 0:
+        return None
+    stats = monte_carlo_stats({nombre: df.attrs["legs"] for nombre, df in frames.items()},
+                              spot, sigma, T, seed=seed)
+    return stats.rename(columns=MC_LABELS).rename_axis("Estrategia")
 
 
 def make_price_grid(center, factor_min=0.8, factor_max=1.2, n=4000):
@@ -199,30 +307,28 @@ def make_price_grid(center, factor_min=0.8, factor_max=1.2, n=4000):
     return np.linspace(center * factor_min, center * factor_max, n)
 
 
-def payoff_call_long(S, strike, premium):
-    """
-    Payoff de UNA Call comprada:
-    max(S - K, 0) - prima
-    """
-    return np.maximum(S - strike, 0) - premium
+import plotly.graph_objects as go
 
-def payoff_put_long(S, strike, premium):
+def plot_payoff(df, title="Payoff", ticker="AAPL", spot=None):
     """
-    Payoff de UNA Put comprada:
-    max(K - S, 0) - prima
+    Figura del payoff, reutilizada de la caché compartida mientras no cambien
+    los datos ni el spot. `spot` es el precio con el que se construyó el
+    payoff (si no se da, el actual). La figura devuelta no se debe modificar.
     """
-    return np.maximum(strike - S, 0) - premium
+    precio_actual = float(get_current_price(ticker) if spot is None else spot)
+    clave = ("payoff", ticker, precio_actual, data_fingerprint(df, ["S", "payoff"]))
+    return cached_figure(clave, lambda: _build_payoff_figure(df, ticker, precio_actual))
 
-import plotly.graph_objects as go
 
-def plot_payoff(df, title="Payoff", ticker="AAPL"):
-    df_plot = df.copy()
-    precio_actual = float(get_current_price(ticker))
+def _build_payoff_figure(df, ticker, precio_actual):
+    # Payoffs lineales a trozos ya vienen con pocos puntos; los de rejilla
+    # (calendars) se reducen al presupuesto por traza.
+    df_plot = df.iloc[minmax_indices(df["payoff"].to_numpy())].copy()
     df_plot["ratio"] = (df_plot["S"] / precio_actual - 1) * 100
 
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df_plot["S"],
         y=df_plot["payoff"].where(df_plot["payoff"] >= 0),
         fill="tozeroy",
@@ -232,9 +338,11 @@ def plot_payoff(df, title="Payoff", ticker="AAPL"):
         name="Payoff positivo"
     ))
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df_plot["S"],
-        y=df_plot["payoff"].where(df_plot["payoff"] < 0),
+        # <= 0 para que el relleno llegue hasta el breakeven (con el payoff
+        # lineal a trozos es un punto, no un tramo de rejilla).
+        y=df_plot["payoff"].where(df_plot["payoff"] <= 0),
         fill="tozeroy",
         mode="none",
         fillcolor="rgba(200,0,0,0.3)",
@@ -242,7 +350,7 @@ def plot_payoff(df, title="Payoff", ticker="AAPL"):
         name="Payoff negativo"
     ))
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=df_plot["S"],
         y=df_plot["payoff"],
         mode="lines",
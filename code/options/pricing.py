@@ -0,0 +1,296 @@
+"""
+Black–Scholes vectorizado: valores de calls / puts y griegas.
+
+Todas las funciones aceptan escalares o arrays de numpy para S, K, sigma y T
+y los combinan por broadcasting (p. ej. S de forma (n,) con K de forma (m, 1)
+da una matriz (m, n)). T en años, sigma y r anuales en tanto por uno.
+
+La normal acumulada usa la aproximación de Hart (1968) en la forma de
+West (2005), con precisión de doble (~1e-15), sin depender de scipy.
+
+Medido con `python -m options.pricing` (1e6 puntos, un núcleo, mejor de 7):
+    bucle con math.erf (versión anterior)   ~160-200 ms
+    scipy.special.ndtr (referencia)          ~27-30 ms
+    norm_cdf                                 ~27-30 ms  (x6; error frente a ndtr 2.2e-16)
+    una sola pasada de np.exp                ~1.2 ms
+El objetivo de x50 (~3.5 ms) equivale a unas tres pasadas elemento a
+elemento, y una aproximación de doble precisión necesita la exponencial y
+los dos polinomios de Hart (unas treinta). norm_cdf va a la par con scipy.
+"""
+import math
+import time
+
+import numpy as np
+
+_SQRT_2PI = math.sqrt(2.0 * math.pi)
+
+# Coeficientes de Hart para |x| < 7.07 (numerador y denominador racionales).
+_HART_NUM = (3.52624965998911e-02, 0.700383064443688, 6.37396220353165,
+             33.912866078383, 112.079291497871, 221.213596169931, 220.206867912376)
+_HART_DEN = (8.83883476483184e-02, 1.75566716318264, 16.064177579207,
+             86.7807322029461, 296.564248779674, 637.333633378831,
+             793.826512519948, 440.413735824752)
+_HART_SPLIT = 7.07106781186547
+
+
+def _horner(coefs, x):
+    result = coefs[0] * x
+    result += coefs[1]
+    for c in coefs[2:]:
+        result *= x
+        result += c
+    return result
+
+
+def norm_pdf(x):
+    x = np.asarray(x, dtype=float)
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def _result(values):
+    return values[()] if values.ndim == 0 else values
+
+
+def norm_cdf(x):
+    """
+    Función de distribución de la normal estándar, elemento a elemento.
+    """
+    x = np.asarray(x, dtype=float)
+    shape = x.shape
+    x = x.reshape(-1)
+    ax = np.abs(x)
+
+    # cum = N(-|x|). Zona central: cociente de polinomios, con operaciones in
+    # situ para no crear un array temporal por coeficiente.
+    with np.errstate(over="ignore", invalid="ignore"):
+        cum = ax * ax
+        cum *= -0.5
+        np.exp(cum, out=cum)
+        cum *= _horner(_HART_NUM, ax)
+        cum /= _horner(_HART_DEN, ax)
+
+    # Cola (|x| >= 7.07): fracción continua, solo sobre los pocos puntos que caen ahí.
+    tail = np.flatnonzero(ax >= _HART_SPLIT)
+    if tail.size:
+        at = ax[tail]
+        b = at + 0.65
+        for k in (4.0, 3.0, 2.0, 1.0):
+            b = at + k / b
+        with np.errstate(invalid="ignore"):
+            cum[tail] = np.where(at > 37.0, 0.0, np.exp(-0.5 * at * at) / b / _SQRT_2PI)
+
+    # N(x) = cum si x < 0, 1 - cum si x > 0. Se combina sin ramas (np.where con
+    # signos aleatorios es varias veces más lento) y sin perder la precisión
+    # relativa de la cola izquierda: N(x) = cum + h · (1 - 2·cum), h ∈ {0, 1}.
+    h = np.copysign(0.5, x)
+    h += 0.5
+    result = cum * -2.0
+    result += 1.0
+    result *= h
+    result += cum
+    return _result(result.reshape(shape))
+
+
+def _prepare(S, K, sigma, T, r):
+    S, K, sigma, T, r = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (S, K, sigma, T, r)))
+    # Vencida o sin volatilidad: el valor es el intrínseco.
+    expired = (T <= 0) | (sigma <= 0)
+    T_safe = np.where(expired, 1.0, T)
+    sigma_safe = np.where(expired, 1.0, sigma)
+
+    sqrt_T = np.sqrt(T_safe)
+    vol_sqrt_T = sigma_safe * sqrt_T
+    with np.errstate(divide="ignore"):
+        d1 = (np.log(S / K) + (r + 0.5 * sigma_safe**2) * T_safe) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    discount = np.exp(-r * np.where(expired, 0.0, T))
+    return S, K, sigma_safe, T_safe, r, d1, d2, sqrt_T, discount, expired
+
+
+def bs_call_value(S, K, sigma, T, r=0.0):
+    """
+    Valor de una call europea (Black–Scholes).
+    """
+    S, K, _, _, _, d1, d2, _, discount, expired = _prepare(S, K, sigma, T, r)
+    value = S * norm_cdf(d1) - K * discount * norm_cdf(d2)
+    return _result(np.where(expired, np.maximum(S - K, 0.0), value))
+
+
+def bs_put_value(S, K, sigma, T, r=0.0):
+    """
+    Valor de una put europea (Black–Scholes).
+    """
+    S, K, _, _, _, d1, d2, _, discount, expired = _prepare(S, K, sigma, T, r)
+    value = K * discount * norm_cdf(-d2) - S * norm_cdf(-d1)
+    return _result(np.where(expired, np.maximum(K - S, 0.0), value))
+
+
+def bs_greeks(S, K, sigma, T, r=0.0, kind="call"):
+    """
+    Griegas de una opción europea. Devuelve un dict con arrays:
+    - delta, gamma
+    - vega: por unidad de sigma (÷100 para 1 punto de volatilidad)
+    - theta: por año (÷365 para theta diaria)
+    Para opciones vencidas o sin volatilidad: delta escalón, el resto 0.
+    """
+    if kind not in ("call", "put"):
+        raise ValueError(f"Tipo de opción desconocido: {kind}. Usa 'call' o 'put'.")
+
+    S, K, sigma, T, r, d1, d2, sqrt_T, discount, expired = _prepare(S, K, sigma, T, r)
+    pdf_d1 = norm_pdf(d1)
+
+    gamma = pdf_d1 / (S * sigma * sqrt_T)
+    vega = S * pdf_d1 * sqrt_T
+    decay = -S * pdf_d1 * sigma / (2.0 * sqrt_T)
+
+    if kind == "call":
+        delta = norm_cdf(d1)
+        theta = decay - r * K * discount * norm_cdf(d2)
+        delta_expired = (S > K).astype(float)
+    else:
+        delta = norm_cdf(d1) - 1.0
+        theta = decay + r * K * discount * norm_cdf(-d2)
+        delta_expired = -(S < K).astype(float)
+
+    return {
+        "delta": _result(np.where(expired, delta_expired, delta)),
+        "gamma": _result(np.where(expired, 0.0, gamma)),
+        "vega": _result(np.where(expired, 0.0, vega)),
+        "theta": _result(np.where(expired, 0.0, theta)),
+    }
+
+
+def _value_and_vega(S, K, sigma, T, disc, phi):
+    # Valor (call si phi = +1, put si phi = -1) y vega, sin comprobaciones:
+    # solo se llama con T > 0 y sigma > 0.
+    sqrt_T = np.sqrt(T)
+    vol_sqrt_T = sigma * sqrt_T
+    d1 = (np.log(S / (K * disc)) + 0.5 * vol_sqrt_T**2) / vol_sqrt_T
+    d2 = d1 - vol_sqrt_T
+    value = phi * (S * norm_cdf(phi * d1) - K * disc * norm_cdf(phi * d2))
+    return value, S * norm_pdf(d1) * sqrt_T
+
+
+def implied_volatility(price, S, K, T, r=0.0, kind="call", tol=1e-10, max_iter=100):
+    """
+    Volatilidad implícita de muchas opciones a la vez (Newton vectorizado con
+    bisección de respaldo). `price`, S, K, T y r se combinan por broadcasting;
+    `kind` es "call", "put" o un array de esos valores (uno por opción).
+
+    Cada opción mantiene un intervalo [lo, hi] que contiene la solución: si el
+    paso de Newton se sale de él (vega casi nula, opciones muy fuera del
+    dinero) se toma el punto medio, así que siempre converge. Solo se itera
+    sobre las opciones que aún no han convergido.
+
+    Devuelve NaN donde no hay solución: T <= 0 o precio fuera de los límites
+    de no arbitraje (por debajo del intrínseco o por encima de S / K·e^{-rT}).
+    """
+    kind = np.asarray(kind)
+    if not np.isin(kind, ("call", "put")).all():
+        raise ValueError(f"Tipo de opción desconocido en {kind}. Usa 'call' o 'put'.")
+
+    price, S, K, T, r, phi = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (price, S, K, T, r, np.where(kind == "call", 1.0, -1.0)))
+    )
+    shape = price.shape
+    price, S, K, T, r, phi = (v.reshape(-1) for v in (price, S, K, T, r, phi))
+    sigma = np.full(price.shape, np.nan)
+
+    with np.errstate(invalid="ignore"):
+        disc = np.exp(-r * T)
+        lower = np.maximum(phi * (S - K * disc), 0.0)
+        upper = np.where(phi > 0, S, K * disc)
+        valid = (T > 0) & (price > lower) & (price < upper)
+
+    idx = np.flatnonzero(valid)
+    p, s, k, t, d, f = price[idx], S[idx], K[idx], T[idx], disc[idx], phi[idx]
+
+    # Punto de partida de Brenner–Subrahmanyam (bueno cerca del dinero).
+    x = np.clip(np.sqrt(2.0 * np.pi / t) * p / s, 0.01, 3.0)
+    lo, hi = np.full(x.shape, 1e-6), np.full(x.shape, 10.0)
+
+    for _ in range(max_iter):
+        value, vega = _value_and_vega(s, k, x, t, d, f)
+        diff = value - p
+        done = np.abs(diff) < tol * np.maximum(p, 1.0)
+        sigma[idx[done]] = x[done]
+        if done.all():
+            break
+
+        keep = ~done
+        idx, p, s, k, t, d, f = (v[keep] for v in (idx, p, s, k, t, d, f))
+        x, lo, hi, diff, vega = x[keep], lo[keep], hi[keep], diff[keep], vega[keep]
+
+        # El valor crece con sigma: acotar el intervalo con el signo del error.
+        np.copyto(hi, x, where=diff > 0)
+        np.copyto(lo, x, where=diff <= 0)
+
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            x = x - diff / vega
+        fuera = ~((x > lo) & (x < hi))
+        x[fuera] = 0.5 * (lo[fuera] + hi[fuera])
+    else:
+        # Sin converger del todo en max_iter pasos: mejor estimación disponible.
+        sigma[idx] = x
+
+    return _result(sigma.reshape(shape))
+
+
+def _norm_cdf_erf(x):
+    # Versión anterior (math.erf punto a punto), solo como referencia del benchmark.
+    return 0.5 * (1.0 + np.fromiter((math.erf(v) for v in np.asarray(x) / math.sqrt(2)), float))
+
+
+def _mejor_tiempo(func, x, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = func(x)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+if __name__ == "__main__":
+    x = np.random.default_rng(0).normal(0, 3, 1_000_000)
+
+    t_erf, referencia = _mejor_tiempo(_norm_cdf_erf, x, repeticiones=7)
+    t_vec, vectorizada = _mejor_tiempo(norm_cdf, x, repeticiones=7)
+    t_exp, _ = _mejor_tiempo(np.exp, x, repeticiones=7)
+
+    print(f"norm_cdf 1e6 puntos: math.erf {t_erf * 1000:.1f} ms | "
+          f"vectorizada {t_vec * 1000:.1f} ms | x{t_erf / t_vec:.1f} | "
+          f"una pasada de np.exp {t_exp * 1000:.1f} ms")
+    print(f"Error máximo: {np.max(np.abs(referencia - vectorizada)):.2e}")
+    try:
+        from scipy.special import ndtr
+    except ImportError:
+        ndtr = None
+    if ndtr is not None:
+        t_scipy, exacta = _mejor_tiempo(ndtr, x, repeticiones=7)
+        print(f"scipy.special.ndtr {t_scipy * 1000:.1f} ms | "
+              f"error frente a scipy: {np.max(np.abs(exacta - vectorizada)):.2e}")
+
+    S = np.linspace(80, 120, 4000)
+    K = np.array([[90.0], [100.0], [110.0]])
+    calls = bs_call_value(S, K, 0.25, 30 / 365)
+    puts = bs_put_value(S, K, 0.25, 30 / 365)
+    print("Paridad put-call (r=0):", np.allclose(calls - puts, S - K))
+    print("Griegas ATM:", {k: float(v[1, 2000]) for k, v in bs_greeks(S, K, 0.25, 30 / 365).items()})
+
+    # Volatilidad implícita de 10.000 contratos: se recupera la sigma usada para valorarlos.
+    rng = np.random.default_rng(1)
+    n = 10_000
+    K = rng.uniform(50, 150, n)
+    T = rng.uniform(2 / 365, 2.0, n)
+    sigma = rng.uniform(0.05, 1.5, n)
+    kind = np.where(rng.random(n) < 0.5, "call", "put")
+    precio = np.where(kind == "call", bs_call_value(100.0, K, sigma, T), bs_put_value(100.0, K, sigma, T))
+
+    inicio = time.perf_counter()
+    iv = implied_volatility(precio, 100.0, K, T, kind=kind)
+    t_iv = time.perf_counter() - inicio
+    # Las opciones con vega prácticamente nula no determinan la sigma: se mide el error en precio.
+    recuperado = np.where(kind == "call", bs_call_value(100.0, K, iv, T), bs_put_value(100.0, K, iv, T))
+    print(f"IV de {n} contratos: {t_iv * 1000:.1f} ms | resueltas {np.isfinite(iv).mean():.1%} | "
+          f"error máx. en precio {np.nanmax(np.abs(recuperado - precio)):.1e} | "
+          f"error mediano en sigma {np.nanmedian(np.abs(iv - sigma)):.1e}")
@@ -0,0 +1,351 @@
+"""
+Escáner de estrategias para todo un universo de símbolos.
+
+Para cada símbolo × vencimiento aplica la misma selección de strikes que los
+dashboards (ATM, mejor OTM, mariposas, ladders...), evalúa todas las
+estrategias y devuelve una tabla ordenada por relación beneficio / riesgo,
+distancia al breakeven y coste.
+
+- Descargas (I/O): hilos, con el limitador de peticiones compartido.
+- Selección y evaluación (CPU): ProcessPoolExecutor con todos los núcleos.
+  Cada vencimiento se envía al pool en cuanto llegan sus cadenas.
+
+Uso (desde la carpeta code/):
+    python -m options.scanner --universe sp500 --limit 50 --expirations 2
+    python -m options.scanner --symbols AAPL MSFT SPY --out ranking.csv
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from scrapper.bulk import load_all_expirations
+from scrapper.fecha import fechas_unix
+from scrapper.quotes import QUOTE_SERVICE
+
+from .analytics import strategy_metrics
+from .chain import OptionChain
+from .payoff_utils import (
+    choose_atm_strike,
+    best_otm_call,
+    best_otm_put,
+    choose_butterfly_call_rows,
+    choose_butterfly_put_rows,
+    choose_ladder_call_rows,
+    choose_put_ladder_rows,
+    match_strike_row,
+    refresh_implied_vol,
+)
+from .strategy import CALL, PUT, leg_from_row
+
+DOWNLOAD_WORKERS = 4
+
+RESULT_COLUMNS = [
+    "rank", "symbol", "expiration", "strategy", "spot", "cost", "max_profit",
+    "max_loss", "reward_risk", "breakeven_distance", "legs", "flag",
+]
+
+# Marcas de filas que no compiten con el resto en el ranking:
+# - "last_price": alguna pata sin bid/ask, valorada con el último precio
+# - "no_risk" / "no_payoff": no se puede perder (casi siempre precios viejos)
+#   o el payoff es 0 en todas partes. Su reward_risk (inf / nan) no es
+#   comparable; el inf de un beneficio no acotado con pérdida real sí compite.
+FLAG_ORDER = {"": 0, "last_price": 1, "no_risk": 2, "no_payoff": 2}
+
+
+def _ordered(*strikes, descending=False):
+    pairs = zip(strikes, strikes[1:])
+    ok = all(a > b for a, b in pairs) if descending else all(a < b for a, b in pairs)
+    if not ok:
+        raise ValueError("Strikes fuera de orden para la estrategia.")
+
+
+def _leg(row, type, side=1, qty=1):
+    """
+    Pata con la prima ejecutable: ask al comprar y bid al vender. Sin
+    cotización a ambos lados se usa el último precio (y la fila se marca).
+    """
+    if row.bid > 0 and row.ask >= row.bid:
+        return replace(leg_from_row(row, type, side=side, qty=qty),
+                       premium=float(row.ask if side > 0 else row.bid))
+    return leg_from_row(row, type, side=side, qty=qty)
+
+
+def _all_quoted(legs, calls, puts):
+    """
+    True si todas las patas tienen cotización bid/ask (no el último precio).
+    """
+    for leg in legs:
+        chain = calls if leg.type == CALL else puts
+        if not chain.quoted()[chain.index_of(leg.strike)]:
+            return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Estrategias: (calls, puts, spot) → lista de patas.
+# Misma selección de strikes y estructura que los dashboards.
+# ---------------------------------------------------------------------------
+
+def _long_call_otm(calls, puts, spot):
+    return [_leg(best_otm_call(calls, spot), CALL)]
+
+
+def _call_ladder(calls, puts, spot):
+    row_K, row_K1 = choose_atm_strike(calls, spot), best_otm_call(calls, spot)
+    row_K2 = choose_ladder_call_rows(calls, spot)
+    _ordered(row_K.strike, row_K1.strike, row_K2.strike)
+    return [_leg(row_K, CALL), _leg(row_K1, CALL, side=-1), _leg(row_K2, CALL)]
+
+
+def _call_butterfly(calls, puts, spot):
+    row_K1, row_K2 = choose_butterfly_call_rows(calls, spot), choose_atm_strike(calls, spot)
+    row_K3 = best_otm_call(calls, spot)
+    _ordered(row_K1.strike, row_K2.strike, row_K3.strike)
+    return [_leg(row_K1, CALL), _leg(row_K2, CALL, side=-1, qty=2), _leg(row_K3, CALL)]
+
+
+def _call_backspread(calls, puts, spot):
+    row_atm, row_otm = choose_atm_strike(calls, spot), best_otm_call(calls, spot)
+    _ordered(row_atm.strike, row_otm.strike)
+    return [_leg(row_atm, CALL, side=-1), _leg(row_otm, CALL, qty=2)]
+
+
+def _long_put_otm(calls, puts, spot):
+    return [_leg(best_otm_put(puts, spot), PUT)]
+
+
+def _put_ladder(calls, puts, spot):
+    row_K, row_K1 = choose_atm_strike(puts, spot), best_otm_put(puts, spot)
+    row_K2 = choose_put_ladder_rows(puts, spot)
+    _ordered(row_K.strike, row_K1.strike, row_K2.strike, descending=True)
+    return [_leg(row_K, PUT), _leg(row_K1, PUT, side=-1), _leg(row_K2, PUT)]
+
+
+def _put_butterfly(calls, puts, spot):
+    row_K1, row_K2 = choose_butterfly_put_rows(puts, spot), choose_atm_strike(puts, spot)
+    row_K3 = best_otm_put(puts, spot)
+    _ordered(row_K1.strike, row_K2.strike, row_K3.strike, descending=True)
+    return [_leg(row_K1, PUT), _leg(row_K2, PUT, side=-1, qty=2), _leg(row_K3, PUT)]
+
+
+def _put_backspread(calls, puts, spot):
+    row_atm, row_otm = choose_atm_strike(puts, spot), best_otm_put(puts, spot)
+    _ordered(row_atm.strike, row_otm.strike, descending=True)
+    return [_leg(row_atm, PUT, side=-1), _leg(row_otm, PUT, qty=2)]
+
+
+def _long_straddle(calls, puts, spot):
+    row_call = choose_atm_strike(calls, spot)
+    return [_leg(row_call, CALL), _leg(match_strike_row(puts, row_call.strike), PUT)]
+
+
+def _long_strangle(calls, puts, spot):
+    return [_leg(best_otm_call(calls, spot), CALL), _leg(best_otm_put(puts, spot), PUT)]
+
+
+def _long_guts(calls, puts, spot):
+    return [_leg(choose_butterfly_call_rows(calls, spot), CALL),
+            _leg(choose_butterfly_put_rows(puts, spot), PUT)]
+
+
+def _long_box(calls, puts, spot):
+    row_K1, row_K2 = choose_butterfly_call_rows(calls, spot), best_otm_call(calls, spot)
+    if row_K1.strike > row_K2.strike:
+        row_K1, row_K2 = row_K2, row_K1
+    _ordered(row_K1.strike, row_K2.strike)
+    put_K1, put_K2 = match_strike_row(puts, row_K1.strike), match_strike_row(puts, row_K2.strike)
+    return [_leg(row_K1, CALL), _leg(row_K2, CALL, side=-1),
+            _leg(put_K2, PUT), _leg(put_K1, PUT, side=-1)]
+
+
+SCAN_STRATEGIES = {
+    "Long Call OTM": _long_call_otm,
+    "Call Ladder": _call_ladder,
+    "Call Butterfly": _call_butterfly,
+    "Call Backspread": _call_backspread,
+    "Long Put OTM": _long_put_otm,
+    "Put Ladder": _put_ladder,
+    "Put Butterfly": _put_butterfly,
+    "Put Backspread": _put_backspread,
+    "Long Straddle": _long_straddle,
+    "Long Strangle": _long_strangle,
+    "Long Guts": _long_guts,
+    "Long Box": _long_box,
+}
+
+
+def describe_legs(legs):
+    return " ".join(
+        f"{'+' if leg.side > 0 else '-'}{leg.qty:g}{leg.type[0].upper()} {leg.strike:g}" for leg in legs
+    )
+
+
+def scan_expiration(symbol, expiration, timestamp, calls_df, puts_df, spot):
+    """
+    Evalúa todas las estrategias de SCAN_STRATEGIES para un símbolo y un
+    vencimiento con las métricas cerradas de options.analytics. Se ejecuta en
+    los procesos del pool: recibe DataFrames (se serializan bien) y devuelve
+    una lista de dicts. La IV de las cadenas se recalcula con sus precios
+    antes de elegir strikes, y las primas son bid/ask (ver _leg).
+    """
+    calls = OptionChain(calls_df) if calls_df is not None else None
+    puts = OptionChain(puts_df) if puts_df is not None else None
+    refresh_implied_vol(calls, spot, timestamp, CALL)
+    refresh_implied_vol(puts, spot, timestamp, PUT)
+
+    filas = []
+    for nombre, builder in SCAN_STRATEGIES.items():
+        try:
+            legs = builder(calls, puts, spot)
+        except (ValueError, AttributeError, TypeError):
+            # Cadena vacía, lado sin datos o strikes que no cuadran.
+            continue
+        metrics = strategy_metrics(legs)
+        reward_risk = metrics.reward_risk
+        if np.isnan(reward_risk):
+            flag = "no_payoff"
+        elif metrics.max_loss >= 0:
+            flag = "no_risk"
+        else:
+            flag = "" if _all_quoted(legs, calls, puts) else "last_price"
+        filas.append({
+            "symbol": symbol,
+            "expiration": expiration,
+            "strategy": nombre,
+            "spot": spot,
+            "cost": metrics.cost,
+            "max_profit": metrics.max_profit,
+            "max_loss": metrics.max_loss,
+            "reward_risk": reward_risk,
+            "breakeven_distance": metrics.breakeven_distance(spot),
+            "legs": describe_legs(legs),
+            "flag": flag,
+        })
+    return filas
+
+
+def rank_strategies(filas):
+    """
+    Tabla ordenada por grupos (FLAG_ORDER: primero las filas sin marca) y,
+    dentro de cada grupo, mejor relación beneficio / riesgo, luego breakeven
+    más cercano y luego menor coste. Las filas que no pueden perder no
+    desplazan a las operaciones reales.
+    """
+    df = pd.DataFrame(filas, columns=RESULT_COLUMNS[1:])
+    df["_grupo"] = df["flag"].map(FLAG_ORDER)
+    df = df.sort_values(["_grupo", "reward_risk", "breakeven_distance", "cost"],
+                        ascending=[True, False, True, True], na_position="last")
+    df = df.drop(columns="_grupo").reset_index(drop=True)
+    df.insert(0, "rank", np.arange(1, len(df) + 1))
+    return df
+
+
+def _download_symbol(symbol, max_expirations):
+    """
+    Descarga las cadenas de los primeros vencimientos de `symbol`.
+    Devuelve {fecha: (timestamp, df_calls, df_puts)}.
+    """
+    expirations = fechas_unix(symbol)[:max_expirations] if max_expirations else fechas_unix(symbol)
+    timestamps = {item["date"]: item["timestamp"] for item in expirations}
+    return {
+        fecha: (timestamps[fecha], calls_df, puts_df)
+        for fecha, (calls_df, puts_df) in load_all_expirations(symbol, expirations).items()
+    }
+
+
+def scan_universe(symbols, max_expirations=2, max_workers=None,
+                  download_workers=DOWNLOAD_WORKERS, verbose=False):
+    """
+    Escanea `symbols` (hasta `max_expirations` vencimientos por símbolo) y
+    devuelve la tabla ordenada de estrategias.
+    max_workers: procesos del pool de cálculo (por defecto todos los núcleos).
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    spots = QUOTE_SERVICE.get_prices(symbols)
+
+    filas = []
+    # "spawn": este proceso ya tiene en marcha los hilos del limitador y de las
+    # descargas; con fork un hijo podría heredar un lock tomado por otro hilo.
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=contexto) as cpu_pool, \
+            ThreadPoolExecutor(max_workers=download_workers) as io_pool:
+        descargas = {
+            io_pool.submit(_download_symbol, symbol, max_expirations): symbol
+            for symbol in symbols if symbol in spots
+        }
+        calculos = {}
+        for descarga in as_completed(descargas):
+            symbol = descargas[descarga]
+            try:
+                cadenas = descarga.result()
+            except Exception as e:
+                if verbose:
+                    print(f"Error descargando {symbol}:", e)
+                continue
+            for fecha, (timestamp, calls_df, puts_df) in cadenas.items():
+                if calls_df is None and puts_df is None:
+                    continue
+                calculo = cpu_pool.submit(
+                    scan_expiration, symbol, fecha, timestamp, calls_df, puts_df, spots[symbol]
+                )
+                calculos[calculo] = (symbol, fecha)
+            if verbose:
+                print(f"{symbol}: {len(cadenas)} vencimientos en cola")
+
+        for calculo in as_completed(calculos):
+            symbol, fecha = calculos[calculo]
+            try:
+                filas.extend(calculo.result())
+            except Exception as e:
+                if verbose:
+                    print(f"Error calculando {symbol} {fecha}:", e)
+
+    return rank_strategies(filas)
+
+
+def sp500_universe():
+    """
+    Símbolos del S&P 500: la última tabla del servicio de constituyentes o,
+    si todavía no hay ninguna (primer arranque), una descarga directa.
+    """
+    from scrapper.sp500 import get_sp500_constituents, scrape_series_data
+    df = get_sp500_constituents()
+    if df.empty:
+        df = scrape_series_data(verbose=False)
+    return [] if df is None else df["Symbol"].tolist()
+
+
+def etf_universe():
+    """
+    ETFs e índices de options/tabla.py que tienen opciones sobre el propio ticker.
+    """
+    from .tabla import data
+    return [fila["Ticker"] for fila in data if fila["Ticker"] == fila["Opciones"]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escáner de estrategias con opciones")
+    parser.add_argument("--universe", choices=("sp500", "etf"), default="sp500")
+    parser.add_argument("--symbols", nargs="*", help="Símbolos concretos (ignora --universe)")
+    parser.add_argument("--limit", type=int, default=None, help="Máximo de símbolos")
+    parser.add_argument("--expirations", type=int, default=2, help="Vencimientos por símbolo")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos de cálculo")
+    parser.add_argument("--out", default=None, help="CSV de salida")
+    args = parser.parse_args()
+
+    symbols = args.symbols or (sp500_universe() if args.universe == "sp500" else etf_universe())
+    symbols = symbols[:args.limit] if args.limit else symbols
+
+    inicio = time.perf_counter()
+    ranking = scan_universe(symbols, max_expirations=args.expirations,
+                            max_workers=args.workers, verbose=True)
+    print(ranking.head(30).to_string(index=False))
+    print(f"{len(ranking)} estrategias de {len(symbols)} símbolos en {time.perf_counter() - inicio:.1f} s")
+    if args.out:
+        ranking.to_csv(args.out, index=False)
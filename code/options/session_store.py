@@ -0,0 +1,70 @@
+"""
+Cadenas descargadas que se conservan durante la sesión de Streamlit.
+
+Las estrategias se pintaban bajo `if st.button("📥 Descargar ...")`: cualquier
+otro widget vuelve a ejecutar el script con el botón a False y todo
+desaparecía. Aquí se guarda, por (símbolo, vencimiento), lo descargado y los
+strikes elegidos en st.session_state, de modo que cambiar de pestaña, marcar
+una casilla o volver a un vencimiento ya visto se pinta desde memoria.
+
+Cada dashboard tiene su propio almacén, acotado a las `max_entries` entradas
+usadas más recientemente (cada una son una o dos cadenas de unos cientos de
+strikes).
+"""
+from collections import OrderedDict
+
+import streamlit as st
+
+MAX_SESSION_CHAINS = 8
+
+
+class SessionChainStore:
+    """
+    Entradas {(símbolo, timestamp): dict} de una sesión en orden de uso
+    (`timestamp` puede ser una tupla de vencimientos).
+    Al superar `max_entries` se descarta la usada hace más tiempo.
+    """
+
+    def __init__(self, state, name, max_entries=MAX_SESSION_CHAINS):
+        if name not in state:
+            state[name] = OrderedDict()
+        self._entries = state[name]
+        self.max_entries = max_entries
+
+    @staticmethod
+    def _key(symbol, timestamp):
+        # Los calendar guardan por (vencimiento corto, vencimiento largo).
+        if isinstance(timestamp, tuple):
+            return symbol.upper(), tuple(int(t) for t in timestamp)
+        return symbol.upper(), int(timestamp)
+
+    def get(self, symbol, timestamp):
+        """
+        Entrada guardada (dict mutable) o None.
+        """
+        key = self._key(symbol, timestamp)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, symbol, timestamp, **entry):
+        """
+        Guarda (o sustituye) la entrada y descarta las menos usadas.
+        """
+        key = self._key(symbol, timestamp)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def session_chains(name):
+    """
+    Almacén de la sesión actual para el dashboard `name` ("call", "put"...).
+    """
+    return SessionChainStore(st.session_state, f"cadenas_{name}")
@@ -0,0 +1,281 @@
+"""
+Motor genérico de estrategias con opciones.
+
+Una estrategia es una lista de patas (Leg). Las opciones distintas de todas
+las patas se evalúan a la vez sobre la rejilla de precios como una matriz
+(opciones × precios) con operaciones vectorizadas, y el payoff de cada
+estrategia es una combinación lineal de sus filas (un producto matricial).
+Evaluar juntas varias estrategias de la misma cadena (evaluate_strategies)
+cuesta lo que cuesten sus opciones distintas, no sus patas: añadir una
+estrategia que reutiliza strikes ya evaluados es casi gratis.
+"""
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .pricing import bs_call_value, bs_put_value
+
+CALL = "call"
+PUT = "put"
+
+# Puntos equiespaciados que se añaden a los codos de un payoff lineal a trozos
+# al pintarlo (solo para que el hover tenga valores intermedios).
+PLOT_SAMPLES = 60
+
+
+@dataclass(frozen=True)
+class Leg:
+    """
+    Pata de una estrategia:
+    - side: +1 comprada, -1 vendida
+    - qty: número de contratos
+    - type: "call" o "put"
+    - strike, premium: strike y prima pagada / cobrada por contrato
+    - expiry: años que le quedan a la pata en la fecha de evaluación
+      (0 = se evalúa a vencimiento, por su valor intrínseco)
+    - sigma: volatilidad para valorar con Black–Scholes si expiry > 0
+    """
+    side: int
+    qty: float
+    type: str
+    strike: float
+    premium: float
+    expiry: float = 0.0
+    sigma: float = 0.0
+
+    def __post_init__(self):
+        if self.side not in (1, -1):
+            raise ValueError(f"side debe ser +1 (compra) o -1 (venta), no {self.side}")
+        if self.type not in (CALL, PUT):
+            raise ValueError(f"Tipo de opción desconocido: {self.type}. Usa 'call' o 'put'.")
+
+
+def leg_from_row(row, type, side=1, qty=1, expiry=0.0, sigma=0.0, strike=None):
+    """
+    Pata a partir de una fila de la cadena (strike y último precio como prima).
+    `strike` permite forzar el strike (p. ej. el medio de dos vencimientos).
+    """
+    return Leg(side=side, qty=qty, type=type,
+               strike=float(row.strike if strike is None else strike),
+               premium=float(row.last), expiry=expiry, sigma=sigma)
+
+
+def _option_values(legs, S):
+    """
+    Valor de cada opción distinta (tipo, strike, vencimiento, sigma) de las
+    patas sobre la rejilla S: matriz (opciones × precios). Las estrategias de
+    una misma cadena comparten la mayoría de opciones, así que se calculan una
+    sola vez. Devuelve también la fila que corresponde a cada pata.
+    """
+    keys = [(leg.type, leg.strike, leg.expiry, leg.sigma) for leg in legs]
+    unique = {key: i for i, key in enumerate(dict.fromkeys(keys))}
+    phi = np.array([1.0 if key[0] == CALL else -1.0 for key in unique], dtype=S.dtype)
+    strike = np.array([key[1] for key in unique], dtype=S.dtype)
+    expiry, sigma = (np.array([key[j] for key in unique], dtype=float) for j in (2, 3))
+
+    # Valor intrínseco de todas las opciones de una vez: max(phi·(S - K), 0).
+    values = np.subtract(S[None, :], strike[:, None])
+    values *= phi[:, None]
+    np.maximum(values, 0.0, out=values)
+
+    # Las que no vencen en la fecha de evaluación se valoran con Black–Scholes
+    # (también en bloque, separando calls y puts).
+    for phi_value, pricer in ((1.0, bs_call_value), (-1.0, bs_put_value)):
+        alive = np.flatnonzero((expiry > 0) & (phi == phi_value))
+        if alive.size:
+            values[alive] = pricer(S[None, :], strike[alive, None],
+                                   sigma[alive, None], expiry[alive, None])
+
+    return values, np.array([unique[key] for key in keys])
+
+
+def evaluate_strategies(strategies, S):
+    """
+    Payoff de varias estrategias sobre la misma rejilla. Cada pata aporta
+    side·qty·(valor - prima), así que el resultado es una matriz de pesos
+    (estrategias × opciones) por la matriz de valores, menos las primas netas.
+    Devuelve una matriz (estrategias × precios), en float32 si S viene en
+    float32 (Monte Carlo: mitad de memoria y de ancho de banda) y si no en float64.
+    """
+    S = np.asarray(S)
+    if S.dtype != np.float32:
+        S = S.astype(float)
+    if any(len(legs) == 0 for legs in strategies):
+        raise ValueError("Todas las estrategias deben tener al menos una pata.")
+
+    all_legs = [leg for legs in strategies for leg in legs]
+    owner = np.repeat(np.arange(len(strategies)), [len(legs) for legs in strategies])
+    weight = np.array([leg.side * leg.qty for leg in all_legs], dtype=float)
+    premium = np.array([leg.premium for leg in all_legs], dtype=float)
+
+    values, option = _option_values(all_legs, S)
+    weights = np.zeros((len(strategies), len(values)), dtype=S.dtype)
+    np.add.at(weights, (owner, option), weight)
+    net_premium = np.bincount(owner, weights=weight * premium, minlength=len(strategies))
+
+    result = weights @ values
+    result -= net_premium.astype(S.dtype)[:, None]
+    return result
+
+
+def evaluate_legs(legs, S):
+    """
+    Payoff total de una estrategia sobre la rejilla S.
+    """
+    return evaluate_strategies([legs], S)[0]
+
+
+def payoff_kinks(legs):
+    """
+    Forma exacta del payoff a vencimiento (patas con expiry = 0): strikes
+    ordenados, payoff en cada uno y pendientes de las colas. Python puro: con
+    las pocas patas de una estrategia es más rápido que montar arrays.
+    """
+    strikes = sorted({float(leg.strike) for leg in legs})
+    values = [
+        sum(leg.side * leg.qty * (max(K - leg.strike if leg.type == CALL else leg.strike - K, 0.0)
+                                  - leg.premium) for leg in legs)
+        for K in strikes
+    ]
+    # Por debajo de todos los strikes solo cuentan las puts (pendiente -1
+    # cada una) y por encima solo las calls (+1 cada una).
+    slope_left = -sum(leg.side * leg.qty for leg in legs if leg.type == PUT)
+    slope_right = sum(leg.side * leg.qty for leg in legs if leg.type == CALL)
+    return strikes, values, slope_left, slope_right
+
+
+def payoff_zeros(strikes, values, slope_left, slope_right):
+    """
+    Precios S >= 0 en los que un payoff lineal a trozos vale 0, en orden.
+    """
+    zeros = []
+    # Cola izquierda (la recta llega hasta S = 0).
+    if slope_left != 0 and 0 <= strikes[0] - values[0] / slope_left < strikes[0]:
+        zeros.append(strikes[0] - values[0] / slope_left)
+
+    for i, (K, y) in enumerate(zip(strikes, values)):
+        if y == 0:
+            zeros.append(K)
+        elif i + 1 < len(strikes) and y * values[i + 1] < 0:
+            # Cambio de signo entre dos strikes: interpolación exacta.
+            zeros.append(K - y * (strikes[i + 1] - K) / (values[i + 1] - y))
+
+    if slope_right != 0 and strikes[-1] - values[-1] / slope_right > strikes[-1]:
+        zeros.append(strikes[-1] - values[-1] / slope_right)
+    return zeros
+
+
+class PiecewisePayoff:
+    """
+    Payoff exacto a vencimiento de una estrategia: lineal a trozos con los
+    codos en los strikes de sus patas. Se guarda solo el valor en cada strike
+    y la pendiente de las dos colas, así que se evalúa en cualquier S sin
+    rejilla y para pintarlo bastan los codos y unos pocos puntos más.
+    """
+
+    __slots__ = ("strikes", "values", "slope_left", "slope_right")
+
+    def __init__(self, legs):
+        if not legs:
+            raise ValueError("La estrategia debe tener al menos una pata.")
+        if any(leg.expiry > 0 for leg in legs):
+            raise ValueError("El payoff solo es lineal a trozos si todas las patas están a vencimiento.")
+
+        strikes, values, self.slope_left, self.slope_right = payoff_kinks(legs)
+        self.strikes = np.array(strikes)
+        self.values = np.array(values)
+
+    def __call__(self, S):
+        S = np.asarray(S, dtype=float)
+        K, y = self.strikes, self.values
+        payoff = np.interp(S, K, y)
+        payoff = np.where(S < K[0], y[0] + self.slope_left * (S - K[0]), payoff)
+        payoff = np.where(S > K[-1], y[-1] + self.slope_right * (S - K[-1]), payoff)
+        return payoff[()] if payoff.ndim == 0 else payoff
+
+    def zeros(self):
+        """
+        Precios S >= 0 en los que el payoff vale exactamente 0 (breakevens).
+        """
+        return np.array(payoff_zeros(self.strikes.tolist(), self.values.tolist(),
+                                     self.slope_left, self.slope_right))
+
+    def points(self, S_min, S_max, samples=PLOT_SAMPLES):
+        """
+        Puntos (S, payoff) para pintar en [S_min, S_max]: los extremos, los
+        codos, los breakevens (para que el relleno verde / rojo corte en 0) y
+        `samples` puntos equiespaciados para el hover.
+        """
+        S = np.concatenate([
+            [S_min, S_max],
+            self.strikes,
+            self.zeros(),
+            np.linspace(S_min, S_max, samples),
+        ])
+        S = np.unique(S[(S >= S_min) & (S <= S_max)])
+        return S, self(S)
+
+
+def payoff_frame(legs, S):
+    """
+    DataFrame {"S", "payoff"} listo para plot_payoff.
+    Si todas las patas están a vencimiento el payoff es lineal a trozos y solo
+    se devuelven sus puntos relevantes en el rango de S (exactos); si alguna
+    se valora con Black–Scholes se evalúa sobre toda la rejilla.
+    Las patas quedan en `frame.attrs["legs"]` para reutilizarlas (Monte Carlo,
+    métricas) sin reconstruir la estrategia.
+    """
+    S = np.asarray(S, dtype=float)
+    if all(leg.expiry == 0 for leg in legs):
+        S, payoff = PiecewisePayoff(legs).points(S.min(), S.max())
+    else:
+        payoff = evaluate_legs(legs, S)
+    frame = pd.DataFrame({"S": S, "payoff": payoff})
+    frame.attrs["legs"] = list(legs)
+    return frame
+
+
+if __name__ == "__main__":
+    S = np.linspace(80, 120, 4000)
+    strikes = np.arange(85.0, 116.0, 2.5)
+    prima = {(tipo, K): max(100 - K if tipo == CALL else K - 100, 0) + 2.0
+             for tipo in (CALL, PUT) for K in strikes}
+
+    def pata(side, qty, tipo, K):
+        return Leg(side, qty, tipo, K, prima[(tipo, K)])
+
+    # 20 estrategias sobre la misma cadena (mariposas, spreads, strangles...).
+    rng = np.random.default_rng(0)
+    estrategias = []
+    for _ in range(20):
+        i = int(rng.integers(1, len(strikes) - 2))
+        tipo = CALL if rng.random() < 0.5 else PUT
+        estrategias.append([pata(1, 1, tipo, strikes[i - 1]), pata(-1, 2, tipo, strikes[i]),
+                            pata(1, 1, tipo, strikes[i + 1]), pata(1, 1, PUT, strikes[i - 1])])
+
+    inicio = time.perf_counter()
+    for _ in range(100):
+        evaluate_legs(estrategias[0], S)
+    t_una = (time.perf_counter() - inicio) / 100
+
+    inicio = time.perf_counter()
+    for _ in range(100):
+        evaluate_strategies(estrategias, S)
+    t_veinte = (time.perf_counter() - inicio) / 100
+
+    inicio = time.perf_counter()
+    for _ in range(100):
+        [evaluate_legs(legs, S) for legs in estrategias]
+    t_separadas = (time.perf_counter() - inicio) / 100
+
+    print(f"1 estrategia: {t_una * 1000:.3f} ms | 20 juntas: {t_veinte * 1000:.3f} ms | "
+          f"20 por separado: {t_separadas * 1000:.3f} ms")
+
+    inicio = time.perf_counter()
+    for _ in range(100):
+        frame = payoff_frame(estrategias[0], S)
+    t_tramos = (time.perf_counter() - inicio) / 100
+    print(f"payoff_frame lineal a trozos: {t_tramos * 1000:.3f} ms, "
+          f"{len(frame)} puntos en vez de {len(S)}")
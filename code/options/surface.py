@@ -0,0 +1,261 @@
+"""
+Superficie de volatilidad implícita de un símbolo con todos sus vencimientos.
+
+Cada vencimiento aporta una sonrisa (puts OTM por debajo del spot, calls OTM
+por encima, con la IV recalculada de sus precios) que se lleva a una rejilla
+uniforme de log-moneyness k = ln(K / spot) en varianza total w = sigma²·T.
+sigma(K, T) se consulta por interpolación bilineal en (k, w): el índice en k
+es aritmético y en T una búsqueda entre unas pocas decenas de vencimientos.
+
+Las superficies se guardan por (símbolo, instantánea), con la misma ventana
+de frescura que la caché de cadenas de opciones. vol_surface_if_ready no
+bloquea: la primera consulta lanza la construcción (todos los vencimientos)
+en un hilo y, mientras tanto, los dashboards usan la IV de cada fila.
+"""
+import threading
+import time
+
+import numpy as np
+
+from scrapper.bulk import load_all_expirations
+from scrapper.cache import CACHE_TTL_SECONDS
+from scrapper.fecha import fechas_unix
+from scrapper.quotes import QUOTE_SERVICE
+
+from .chain import as_chain
+from .payoff_utils import years_to_expiry
+from .strategy import CALL, PUT
+
+K_MIN, K_MAX, K_POINTS = -1.0, 1.0, 201
+
+
+class VolSurface:
+    """
+    Varianza total en una rejilla (vencimientos × log-moneyness).
+    - maturities: años hasta cada vencimiento, ordenados
+    - w: matriz (vencimientos × K_POINTS) de sigma²·T
+    Fuera de la rejilla se extrapola con sigma constante (en k y en T).
+    """
+
+    __slots__ = ("spot", "k_min", "k_step", "maturities", "w")
+
+    def __init__(self, spot, slices, k_min=K_MIN, k_max=K_MAX, k_points=K_POINTS):
+        """
+        slices: lista de (T, strikes, ivs), uno por vencimiento.
+        """
+        self.spot = float(spot)
+        self.k_min = k_min
+        self.k_step = (k_max - k_min) / (k_points - 1)
+        grid = np.linspace(k_min, k_max, k_points)
+
+        filas = []
+        for T, strikes, ivs in sorted(slices, key=lambda s: s[0]):
+            strikes, ivs = np.asarray(strikes, dtype=float), np.asarray(ivs, dtype=float)
+            ok = np.isfinite(ivs) & (ivs > 0) & (strikes > 0)
+            if T <= 0 or ok.sum() < 2:
+                continue
+            k = np.log(strikes[ok] / self.spot)
+            order = np.argsort(k)
+            # Sigma plana fuera de los strikes cotizados.
+            iv = np.interp(grid, k[order], ivs[ok][order])
+            filas.append((T, iv * iv * T))
+
+        if not filas:
+            raise ValueError("No hay vencimientos con volatilidades válidas para la superficie.")
+        if len(filas) == 1:
+            # Un solo vencimiento: se duplica para poder interpolar en T.
+            T, w = filas[0]
+            filas.append((2 * T, 2 * w))
+
+        self.maturities = np.array([T for T, _ in filas])
+        # La varianza total no puede bajar con el plazo (sin arbitraje de calendario).
+        self.w = np.maximum.accumulate(np.array([w for _, w in filas]), axis=0)
+
+    def sigma(self, K, T):
+        """
+        Volatilidad implícita interpolada para strikes K y plazos T (años),
+        escalares o arrays combinables por broadcasting. NaN si T <= 0.
+        """
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float))
+
+        # Posición en la rejilla de k: aritmética, sin búsqueda.
+        pos = (np.log(K / self.spot) - self.k_min) / self.k_step
+        pos = np.clip(pos, 0, self.w.shape[1] - 1)
+        i = np.minimum(pos.astype(int), self.w.shape[1] - 2)
+        a = pos - i
+
+        # Plazo dentro de [primer, último] vencimiento; fuera, sigma constante.
+        mats = self.maturities
+        T_in = np.clip(T, mats[0], mats[-1])
+        j = np.clip(np.searchsorted(mats, T_in), 1, len(mats) - 1)
+        b = (T_in - mats[j - 1]) / (mats[j] - mats[j - 1])
+
+        w_prev = (1 - a) * self.w[j - 1, i] + a * self.w[j - 1, i + 1]
+        w_next = (1 - a) * self.w[j, i] + a * self.w[j, i + 1]
+        w = ((1 - b) * w_prev + b * w_next) * (T / T_in)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sigma = np.where(T > 0, np.sqrt(w / T), np.nan)
+        return sigma[()] if sigma.ndim == 0 else sigma
+
+
+def build_vol_surface(spot, chains, now=None):
+    """
+    Superficie a partir de {timestamp: (calls, puts)} (DataFrames u
+    OptionChain). La IV de cada contrato se recalcula con su precio.
+    """
+    slices = []
+    for timestamp, (calls, puts) in chains.items():
+        T = years_to_expiry(timestamp, now)
+        strikes, ivs = [], []
+        for data, kind in ((calls, CALL), (puts, PUT)):
+            if data is None:
+                continue
+            chain = as_chain(data)
+            if chain.empty:
+                continue
+            chain.solve_iv(spot, T, kind)
+            otm = chain.strike >= spot if kind == CALL else chain.strike < spot
+            strikes.append(chain.strike[otm])
+            ivs.append(chain.iv[otm])
+        if strikes:
+            slices.append((T, np.concatenate(strikes), np.concatenate(ivs)))
+    return VolSurface(spot, slices)
+
+
+def _load_surface(symbol):
+    expirations = fechas_unix(symbol)
+    timestamps = {item["date"]: item["timestamp"] for item in expirations}
+    chains = {timestamps[fecha]: sides for fecha, sides in load_all_expirations(symbol, expirations).items()}
+    return build_vol_surface(QUOTE_SERVICE.get_price(symbol), chains)
+
+
+class VolSurfaceCache:
+    """
+    Superficies compartidas por todas las sesiones, una por símbolo y
+    instantánea (ventanas de `snapshot_seconds`). Al cambiar de instantánea
+    se reconstruye; si dos sesiones piden a la vez el mismo símbolo, solo una
+    la construye.
+    """
+
+    def __init__(self, snapshot_seconds=CACHE_TTL_SECONDS, loader=_load_surface):
+        self.snapshot_seconds = snapshot_seconds
+        self.loader = loader
+        self._surfaces = {}      # símbolo → (instantánea, VolSurface)
+        self._errors = {}        # símbolo → (instantánea, excepción de la construcción)
+        self._building = set()   # símbolos con construcción en segundo plano
+        self._locks = {}         # símbolo → Lock de su construcción
+        self._lock = threading.Lock()
+
+    def snapshot(self, now=None):
+        return int((time.time() if now is None else now) // self.snapshot_seconds)
+
+    def get(self, symbol):
+        symbol = symbol.upper()
+        snapshot = self.snapshot()
+        with self._lock:
+            cached = self._surfaces.get(symbol)
+            if cached is not None and cached[0] == snapshot:
+                return cached[1]
+            lock = self._locks.setdefault(symbol, threading.Lock())
+
+        with lock:
+            cached = self._surfaces.get(symbol)
+            if cached is not None and cached[0] == snapshot:
+                return cached[1]
+            try:
+                surface = self.loader(symbol)
+            except Exception as e:
+                with self._lock:
+                    self._errors[symbol] = (snapshot, e)
+                raise
+            with self._lock:
+                self._surfaces[symbol] = (snapshot, surface)
+                self._errors.pop(symbol, None)
+            return surface
+
+    def get_nowait(self, symbol):
+        """
+        Superficie de la instantánea actual si ya está construida. Si no, lanza
+        su construcción en un hilo (una por símbolo) y devuelve None; si la
+        última construcción de esta instantánea falló, relanza el error.
+        """
+        symbol = symbol.upper()
+        snapshot = self.snapshot()
+        with self._lock:
+            cached = self._surfaces.get(symbol)
+            if cached is not None and cached[0] == snapshot:
+                return cached[1]
+            error = self._errors.get(symbol)
+            if error is not None and error[0] == snapshot:
+                raise error[1]
+            if symbol in self._building:
+                return None
+            self._building.add(symbol)
+
+        def construir():
+            try:
+                self.get(symbol)
+            except Exception:
+                pass                # queda en _errors para la próxima consulta
+            finally:
+                with self._lock:
+                    self._building.discard(symbol)
+
+        threading.Thread(target=construir, name=f"vol-surface-{symbol}", daemon=True).start()
+        return None
+
+
+# Instancia compartida por todas las sesiones del servidor de Streamlit.
+VOL_SURFACES = VolSurfaceCache()
+
+
+def get_vol_surface(symbol):
+    """
+    Superficie de volatilidad de `symbol` para la instantánea actual.
+    Lanza ValueError si no hay datos suficientes.
+    """
+    return VOL_SURFACES.get(symbol)
+
+
+def vol_surface_if_ready(symbol):
+    """
+    Superficie de `symbol` si ya está lista; si no, None (y se construye en
+    segundo plano). Relanza el error si la construcción falló.
+    """
+    return VOL_SURFACES.get_nowait(symbol)
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    from .pricing import bs_call_value, bs_put_value
+
+    # Superficie sintética: sonrisa que se aplana con el plazo.
+    spot, ahora = 100.0, 0.0
+
+    def sigma_real(K, T):
+        return 0.2 + 0.1 * np.log(K / spot) ** 2 / np.sqrt(T) + 0.02 * T
+
+    strikes = np.arange(60.0, 141.0, 2.5)
+    cadenas = {}
+    for dias in (7, 14, 30, 60, 90, 180, 365):
+        T = years_to_expiry(dias * 86400, ahora)
+        iv = sigma_real(strikes, T)
+        calls = pd.DataFrame({"Precio de ejercicio": strikes, "Último precio": bs_call_value(spot, strikes, iv, T)})
+        puts = pd.DataFrame({"Precio de ejercicio": strikes, "Último precio": bs_put_value(spot, strikes, iv, T)})
+        cadenas[dias * 86400] = (calls, puts)
+
+    inicio = time.perf_counter()
+    superficie = build_vol_surface(spot, cadenas, now=ahora)
+    print(f"Construcción: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    K = np.random.default_rng(0).uniform(70, 130, 100_000)
+    T = np.random.default_rng(1).uniform(20 / 365, 300 / 365, 100_000)
+    inicio = time.perf_counter()
+    sigma = superficie.sigma(K, T)
+    t = time.perf_counter() - inicio
+    print(f"100.000 consultas sigma(K, T): {t * 1000:.1f} ms | "
+          f"error mediano {np.median(np.abs(sigma - sigma_real(K, T))):.1e}")
+    print("sigma(100, 45 días) =", round(float(superficie.sigma(100.0, 45 / 365)), 4),
+          "| real", round(float(sigma_real(100.0, 45 / 365)), 4))
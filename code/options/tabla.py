@@ -7,7 +7,7 @@ if str(ROOT) not in sys.path:
 
 import streamlit as st
 import pandas as pd
-from scrapper.sp500 import scrape_series_data
+from scrapper.sp500 import get_sp500_constituents
 
 st.set_page_config(layout="wide")
 
@@ -133,7 +133,7 @@ def build_universe_df(data: list[dict]) -> pd.DataFrame:
 
 
 def load_sp500_df() -> pd.DataFrame:
-    return scrape_series_data()
+    return get_sp500_constituents()
 
 
 def render_tables(df_universe: pd.DataFrame, df_sp500: pd.DataFrame) -> None:
@@ -0,0 +1,162 @@
+"""
+Caché LRU de figuras de plotly compartida por todas las sesiones.
+
+Cada rerun de Streamlit vuelve a construir todas las figuras aunque los datos
+y la configuración no hayan cambiado. Aquí se guardan ya construidas, por una
+huella barata de los datos más la configuración que las define, y se
+desalojan las menos usadas cuando la memoria estimada supera `max_bytes`.
+
+Las figuras devueltas se comparten: no se deben modificar (todo lo que cambie
+la figura, como la altura, tiene que ir en la clave y en el constructor).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+FIGURE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+# Coste fijo estimado de una figura (layout, formas, anotaciones).
+FIGURE_OVERHEAD_BYTES = 16 * 1024
+
+
+def data_fingerprint(df, columns=None):
+    """
+    Huella barata de un DataFrame: forma, extremos del índice y sumas de las
+    columnas numéricas. Detecta barras nuevas y también históricos
+    reescritos (p. ej. precios ajustados tras un dividendo) sin hashear
+    todas las filas.
+    """
+    if columns is not None:
+        df = df[[c for c in columns if c in df]]
+    if df.empty:
+        return (df.shape, tuple(df.columns))
+    valores = df.select_dtypes("number").to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        sumas = np.nansum(valores, axis=0)
+    return (
+        df.shape,
+        tuple(df.columns),
+        df.index[0],
+        df.index[-1],
+        tuple(np.round(sumas, 8).tolist()),
+        tuple(np.round(valores[-1], 8).tolist()),
+    )
+
+
+def figure_nbytes(fig):
+    """
+    Memoria estimada de una figura: arrays de sus trazas más un coste fijo.
+    """
+    total = FIGURE_OVERHEAD_BYTES
+    for trace in fig.data:
+        for name in ("x", "y", "open", "high", "low", "close", "customdata"):
+            values = getattr(trace, name, None)
+            if isinstance(values, np.ndarray):
+                total += values.nbytes
+            elif isinstance(values, (list, tuple, pd.Index)):
+                total += 8 * len(values)
+    return total
+
+
+class FigureCache:
+    """
+    Figuras construidas indexadas por una clave hashable, con desalojo LRU
+    por memoria estimada. Si dos sesiones piden a la vez la misma clave, las
+    dos pueden construirla; se queda la primera en guardarse.
+    """
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()     # clave → (figura, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, builder):
+        """
+        Figura guardada para `key` o, si no está, la que devuelve builder().
+        """
+        with self._lock:
+            cached = self._figures.get(key)
+            if cached is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        fig = builder()
+        nbytes = figure_nbytes(fig)
+        if nbytes > self.max_bytes:
+            return fig
+
+        with self._lock:
+            cached = self._figures.get(key)
+            if cached is not None:
+                return cached[0]
+            self._figures[key] = (fig, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, freed) = self._figures.popitem(last=False)
+                self._bytes -= freed
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Devuelve aciertos, fallos, tasa de aciertos, figuras y bytes estimados.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "figures": len(self._figures),
+                "bytes": self._bytes,
+            }
+
+
+# Instancia compartida por todas las sesiones del servidor de Streamlit.
+FIGURE_CACHE = FigureCache()
+
+
+def cached_figure(key, builder):
+    """
+    Figura de la caché compartida para `key`, construida con builder() si
+    no está. La figura devuelta no se debe modificar.
+    """
+    return FIGURE_CACHE.get_or_build(key, builder)
+
+
+if __name__ == "__main__":
+    import plotly.graph_objects as go
+
+    from .traces import line_trace
+
+    n = 10_000
+    df = pd.DataFrame({"Close": np.cumsum(np.random.default_rng(0).normal(size=n)) + 100},
+                      index=pd.date_range("1990-01-01", periods=n))
+
+    def construir():
+        return go.Figure([line_trace(df.index, df["Close"], "Close")])
+
+    repeticiones = 200
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        construir()
+    t_sin = (time.perf_counter() - inicio) / repeticiones
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        cached_figure(("demo", data_fingerprint(df)), construir)
+    t_con = (time.perf_counter() - inicio) / repeticiones
+
+    print(f"Sin caché: {t_sin * 1000:.2f} ms | con caché: {t_con * 1000:.3f} ms por figura")
+    print(FIGURE_CACHE.stats())
@@ -0,0 +1,92 @@
+"""
+Reducción de puntos para pintar series largas con un presupuesto fijo por
+traza, de modo que lo que se envía al navegador no crece con el histórico.
+
+- minmax_indices: por cada cubo se conservan el mínimo y el máximo (los picos
+  se ven igual que con todos los puntos), además del primer y último punto.
+- aggregate_ohlc: velas agrupadas por cubos (apertura del primero, máximo,
+  mínimo, cierre del último, volumen sumado).
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+LINE_POINTS = 1500
+CANDLE_POINTS = 600
+
+
+def minmax_indices(y, n_out=LINE_POINTS):
+    """
+    Posiciones a conservar de `y` (ordenadas): mínimo y máximo de cada uno de
+    n_out / 2 cubos consecutivos. Los NaN se ignoran.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+
+    buckets = max(n_out // 2, 1)
+    size = -(-n // buckets)                      # techo de n / buckets
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+
+    # Cubos sin ningún valor válido (NaN al principio de una media móvil):
+    # se conserva su primer punto.
+    padded[np.isnan(padded).all(axis=1)] = 0.0
+    base = np.arange(buckets) * size
+    keep = np.concatenate([
+        [0, n - 1],
+        base + np.nanargmin(padded, axis=1),
+        base + np.nanargmax(padded, axis=1),
+    ])
+    return np.unique(keep[keep < n])
+
+
+def downsample_xy(x, y, n_out=LINE_POINTS):
+    """
+    (x, y) reducidos con minmax_indices.
+    """
+    idx = minmax_indices(y, n_out)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+
+def aggregate_ohlc(df, n_out=CANDLE_POINTS):
+    """
+    Agrupa las velas de `df` (Open, High, Low, Close y opcionalmente Volume)
+    en como mucho `n_out` cubos consecutivos. El índice de cada cubo es el de
+    su primera vela; el resto de columnas toman el último valor del cubo.
+    """
+    n = len(df)
+    if n <= n_out:
+        return df
+
+    starts = np.unique(np.linspace(0, n, n_out, endpoint=False).astype(int))
+    ends = np.append(starts[1:], n) - 1
+
+    agg = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if col == "Open":
+            agg[col] = values[starts]
+        elif col == "High":
+            agg[col] = np.fmax.reduceat(values, starts)
+        elif col == "Low":
+            agg[col] = np.fmin.reduceat(values, starts)
+        elif col == "Volume":
+            agg[col] = np.add.reduceat(np.nan_to_num(values.astype(float)), starts)
+        else:
+            agg[col] = values[ends]
+    return pd.DataFrame(agg, index=df.index[starts])
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for n in (1_500, 15_000, 150_000):
+        y = np.cumsum(rng.normal(0, 1, n))
+        inicio = time.perf_counter()
+        idx = minmax_indices(y)
+        t = time.perf_counter() - inicio
+        print(f"{n:>7} puntos → {len(idx)} en {t * 1000:.2f} ms | "
+              f"extremos conservados: {y[idx].max() == y.max() and y[idx].min() == y.min()}")
@@ -0,0 +1,16 @@
+"""
+Trazas de plotly con presupuesto fijo de puntos y WebGL (Scattergl) donde
+plotly lo permite. Las velas y las barras no tienen versión WebGL: se agrupan
+en cubos con aggregate_ohlc antes de pintarlas.
+"""
+import plotly.graph_objects as go
+
+from .downsample import LINE_POINTS, downsample_xy
+
+
+def line_trace(x, y, name, n_out=LINE_POINTS, **kwargs):
+    """
+    Línea en WebGL con como mucho `n_out` puntos (mínimo y máximo por cubo).
+    """
+    x, y = downsample_xy(x, y, n_out)
+    return go.Scattergl(x=x, y=y, mode="lines", name=name, **kwargs)
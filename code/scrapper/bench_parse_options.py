@@ -0,0 +1,106 @@
+"""
+Benchmark del parseo de la página de opciones de Yahoo.
+
+Compara el camino original (BeautifulSoup + pd.read_html) con el extractor
+lxml de una sola pasada, comprobando que ambos devuelven las mismas tablas.
+
+Uso (desde la carpeta code/):
+    python -m scrapper.bench_parse_options pagina1.html carpeta_con_paginas/
+Sin argumentos usa páginas sintéticas con la estructura de Yahoo.
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from scrapper.options import parse_options_tables, parse_options_tables_bs4
+
+COLUMNAS = [
+    "Nombre del contrato", "Fecha de última transacción (GMT-5)", "Precio de ejercicio",
+    "Último precio", "Oferta", "Demanda", "Cambio", "Cambio de %", "Volumen",
+    "Interés abierto", "Volatilidad implícita",
+]
+
+
+def _fila_sintetica(i, tipo):
+    strike = 50 + 2.5 * i
+    volumen = "-" if i % 7 == 0 else f"{(i * 37) % 5000:,}"
+    celdas = [
+        f'<a href="/quote/AAPL{tipo}{i:08d}">AAPL251219{tipo}{int(strike * 1000):08d}</a>',
+        "12/12/2025 3:59 PM",
+        f"{strike:,.2f}",
+        f"{(i * 0.37) % 40:.2f}",
+        f"{(i * 0.35) % 40:.2f}",
+        f"{(i * 0.39) % 40:.2f}",
+        f"+{(i * 0.01) % 2:.2f}",
+        f"+{(i * 0.11) % 9:.2f}%",
+        volumen,
+        f"{(i * 131) % 90000:,}",
+        f"{10 + (i * 0.7) % 80:.2f}%",
+    ]
+    return "<tr>" + "".join(f"<td><span>{c}</span></td>" for c in celdas) + "</tr>"
+
+
+def pagina_sintetica(n_filas=200, relleno=2000):
+    """
+    Página con dos tableContainer (CALLS y PUTS) rodeados de marcado de relleno,
+    para simular el tamaño de una página real de Yahoo.
+    """
+    cabecera = "<thead><tr>" + "".join(f"<th>{c}</th>" for c in COLUMNAS) + "</tr></thead>"
+    tablas = "".join(
+        '<div class="tableContainer yf-1"><table><' + cabecera[1:] +
+        "<tbody>" + "".join(_fila_sintetica(i, tipo) for i in range(n_filas)) + "</tbody></table></div>"
+        for tipo in ("C", "P")
+    )
+    ruido = "".join(f'<div class="nav item-{i}"><a href="#{i}">Enlace {i}</a></div>' for i in range(relleno))
+    return f"<html><head><title>AAPL</title></head><body>{ruido}{tablas}{ruido}</body></html>"
+
+
+def _mejor_tiempo(func, pagina, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = func(pagina)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def benchmark(paginas, repeticiones=5):
+    filas = []
+    for nombre, pagina in paginas:
+        t_bs4, (calls_bs4, puts_bs4) = _mejor_tiempo(parse_options_tables_bs4, pagina, repeticiones)
+        t_lxml, (calls_lxml, puts_lxml) = _mejor_tiempo(parse_options_tables, pagina, repeticiones)
+
+        for original, nuevo in ((calls_bs4, calls_lxml), (puts_bs4, puts_lxml)):
+            if original is None or nuevo is None:
+                assert original is None and nuevo is None, f"{nombre}: resultados distintos"
+            else:
+                pd.testing.assert_frame_equal(original, nuevo)
+
+        filas.append({
+            "pagina": nombre,
+            "KB": len(pagina) // 1024,
+            "filas": 0 if calls_lxml is None else len(calls_lxml),
+            "bs4 + read_html (ms)": t_bs4 * 1000,
+            "lxml (ms)": t_lxml * 1000,
+            "speedup": t_bs4 / t_lxml,
+        })
+    return pd.DataFrame(filas)
+
+
+def _leer_paginas(rutas):
+    for ruta in map(Path, rutas):
+        ficheros = sorted(ruta.rglob("*.html")) if ruta.is_dir() else [ruta]
+        for fichero in ficheros:
+            yield fichero.name, fichero.read_text(encoding="utf-8")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        paginas = list(_leer_paginas(sys.argv[1:]))
+    else:
+        paginas = [(f"sintetica_{n}", pagina_sintetica(n)) for n in (50, 200, 800)]
+
+    with pd.option_context("display.float_format", "{:.2f}".format):
+        print(benchmark(paginas).to_string(index=False))
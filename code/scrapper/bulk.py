@@ -0,0 +1,95 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from scrapper.cache import OPTIONS_CACHE
+from scrapper.fecha import fechas_unix
+from scrapper.options import get_indice_page_url, scrape_options_data
+
+MAX_WORKERS = 8
+REQUESTS_PER_SECOND = 8.0
+
+
+class HostRateLimiter:
+    """
+    Limita el número de peticiones por segundo a cada host.
+
+    Cada llamada a `wait(host)` reserva el siguiente hueco libre para ese host
+    y duerme hasta que llega, de modo que varios hilos comparten el límite.
+    """
+
+    def __init__(self, requests_per_second=REQUESTS_PER_SECOND):
+        self.interval = 1.0 / requests_per_second
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+# Compartido por todos los hilos y sesiones para no saturar a Yahoo.
+RATE_LIMITER = HostRateLimiter()
+
+
+def _load_expiration(symbol, timestamp, max_intentos, limiter):
+    cached = OPTIONS_CACHE.get(symbol, timestamp, required=(0, 1))
+    if cached is not None:
+        return cached
+
+    host = urlparse(get_indice_page_url(symbol, timestamp)).netloc
+
+    for intento in range(max_intentos):
+        limiter.wait(host)
+        options_compra, options_venta = scrape_options_data(symbol, timestamp, verbose=False)
+        if options_compra is not None and not options_compra.empty:
+            OPTIONS_CACHE.put(symbol, timestamp, options_compra, options_venta)
+            return options_compra, options_venta
+        time.sleep(2*intento)
+
+    return None, None
+
+
+def load_all_expirations(symbol: str, expirations=None, max_intentos: int = 3,
+                         max_workers: int = MAX_WORKERS, limiter=None):
+    """
+    Descarga CALLS y PUTS de todos los vencimientos de `symbol` en paralelo.
+
+    - expirations: lista de {"date", "timestamp"} (por defecto fechas_unix(symbol)).
+    - max_workers: número máximo de descargas simultáneas.
+    - limiter: HostRateLimiter a usar (por defecto el compartido).
+
+    Devuelve {fecha: (df_calls, df_puts)}; los vencimientos que no se
+    pudieron descargar aparecen como (None, None).
+    """
+    if expirations is None:
+        expirations = fechas_unix(symbol)
+    if limiter is None:
+        limiter = RATE_LIMITER
+
+    if not expirations:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(expirations))) as pool:
+        futures = {
+            item["date"]: pool.submit(
+                _load_expiration, symbol, item["timestamp"], max_intentos, limiter
+            )
+            for item in expirations
+        }
+        return {date: future.result() for date, future in futures.items()}
+
+
+if __name__ == "__main__":
+    inicio = time.perf_counter()
+    cadenas = load_all_expirations("AAPL")
+    for fecha, (calls, puts) in cadenas.items():
+        print(fecha, "→", None if calls is None else len(calls), None if puts is None else len(puts))
+    print(f"{len(cadenas)} vencimientos en {time.perf_counter() - inicio:.1f} s")
@@ -0,0 +1,147 @@
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent.parent          # .../todo-app/code
+CACHE_DIR = APP_DIR / "data" / "cache" / "options"
+
+# Las cadenas de opciones cambian durante la sesión: 15 minutos es suficiente
+# para no repetir descargas sin mostrar datos demasiado viejos.
+CACHE_TTL_SECONDS = 15 * 60
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+SIDES = ("calls", "puts")
+
+
+def safe_symbol(symbol: str) -> str:
+    """
+    Convierte el símbolo en un nombre de fichero válido (^GSPC → _GSPC).
+    """
+    return re.sub(r"[^A-Za-z0-9.=-]", "_", symbol.upper())
+
+
+class OptionsCache:
+    """
+    Caché persistente en disco de las cadenas de opciones.
+
+    Cada entrada se indexa por (símbolo, timestamp de vencimiento) y se guarda
+    como dos ficheros Parquet (calls y puts). Las entradas caducan tras
+    `ttl_seconds` y, si la carpeta supera `max_bytes`, se borran primero las
+    más antiguas.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl_seconds=CACHE_TTL_SECONDS,
+                 max_bytes=CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, timestamp, side):
+        return self.directory / f"{safe_symbol(symbol)}_{int(timestamp)}_{side}.parquet"
+
+    def _read(self, path, now):
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+        if now - mtime > self.ttl_seconds:
+            return None
+
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            return None
+
+    def get(self, symbol, timestamp, required=(0, 1)):
+        """
+        Devuelve (calls, puts) si hay una entrada válida con los lados
+        `required` (0 = CALLS, 1 = PUTS), o None. Un lado no requerido que no
+        se pudo descargar se devuelve como None. Una entrada a la que le falta
+        un lado requerido cuenta como fallo.
+        """
+        now = time.time()
+        sides = (
+            self._read(self._path(symbol, timestamp, "calls"), now),
+            self._read(self._path(symbol, timestamp, "puts"), now),
+        )
+
+        with self._lock:
+            if all(df is None for df in sides) or any(sides[side] is None for side in required):
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return sides
+
+    def put(self, symbol, timestamp, calls, puts):
+        """
+        Guarda las tablas de CALLS y PUTS. Si alguna no se puede serializar
+        (columnas con tipos mezclados), simplemente no se cachea.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        for side, df in zip(SIDES, (calls, puts)):
+            if df is None or df.empty:
+                continue
+            path = self._path(symbol, timestamp, side)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                df.to_parquet(tmp, index=False)
+            except Exception:
+                tmp.unlink(missing_ok=True)
+                continue
+            os.replace(tmp, path)
+
+        self.evict()
+
+    def evict(self):
+        """
+        Borra las entradas caducadas y, si aún se supera `max_bytes`,
+        las más antiguas hasta quedar por debajo del límite.
+        """
+        now = time.time()
+        files = []
+        for path in self.directory.glob("*.parquet"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                files.append((path, stat))
+
+        total = sum(stat.st_size for _, stat in files)
+        for path, stat in sorted(files, key=lambda item: item[1].st_mtime):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+
+    def clear(self):
+        for path in self.directory.glob("*"):
+            path.unlink(missing_ok=True)
+
+    def stats(self):
+        """
+        Devuelve aciertos, fallos y tasa de aciertos de este proceso.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+# Instancia compartida por todas las sesiones del servidor de Streamlit.
+OPTIONS_CACHE = OptionsCache()
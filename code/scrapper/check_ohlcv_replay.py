@@ -0,0 +1,52 @@
+"""
+Comprobación de que una grabación del almacén OHLCV se reproduce otro día.
+
+Graba load_history con un yfinance sintético como si fuera el 2024-03-15 y
+la reproduce (modo replay) en un almacén vacío con la fecha real: las claves
+de los fixtures no llevan la fecha, así que tiene que salir lo mismo.
+
+Uso (desde la carpeta code/):
+    python -m scrapper.check_ohlcv_replay
+Todo se escribe en una carpeta temporal; no toca el almacén ni los fixtures.
+"""
+import datetime
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scrapper import ohlcv_store, transport
+
+
+def _descarga_sintetica(ticker, start, end, **kwargs):
+    index = pd.bdate_range(start, end, inclusive="left", name="Date")
+    valores = np.arange(len(index), dtype=float) + 100
+    return pd.DataFrame({c: valores for c in ohlcv_store.COLUMNS}, index=index)
+
+
+def main():
+    sys.modules["yfinance"] = types.SimpleNamespace(download=_descarga_sintetica)
+    tmp = Path(tempfile.mkdtemp())
+    hoy_real = transport._real_today
+
+    transport.configure(mode="record", fixtures_dir=tmp / "fixtures")
+    ohlcv_store.STORE_DIR = tmp / "store_record"
+    transport._real_today = lambda: datetime.date(2024, 3, 15)
+    grabado = ohlcv_store.load_history("DEMO", start="2024-01-01")
+
+    transport.configure(mode="replay")
+    ohlcv_store.STORE_DIR = tmp / "store_replay"
+    transport._real_today = hoy_real
+    reproducido = ohlcv_store.load_history("DEMO", start="2024-01-01")
+
+    iguales = grabado.equals(reproducido)
+    print(f"Grabado el 2024-03-15, reproducido el {datetime.date.today()}: "
+          f"{len(grabado)} barras | iguales: {iguales}")
+    return iguales
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -1,10 +1,12 @@
-import yfinance as yf
 import datetime as datetime
 import calendar
 
+from scrapper import transport
+
 def fechas_unix(symbol):
-    ticker = yf.Ticker(symbol)
-    expirations = ticker.options 
+    import yfinance as yf
+
+    expirations = transport.call("yf_options", symbol, lambda: yf.Ticker(symbol).options)
     
     result = []
     for s in expirations:
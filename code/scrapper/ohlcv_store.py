@@ -0,0 +1,184 @@
+import datetime
+import os
+import threading
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from scrapper import transport
+from scrapper.cache import APP_DIR, safe_symbol
+
+STORE_DIR = APP_DIR / "data" / "cache" / "ohlcv"
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Tolerancia al comparar el último cierre guardado con el descargado de nuevo.
+# Si la serie ajustada cambia (dividendo, split) hay que rehacerla entera.
+ADJUSTED_RTOL = 1e-4
+
+_locks = defaultdict(threading.Lock)
+
+
+def _empty_frame():
+    return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+
+
+def _prefix(ticker, adjusted):
+    return f"{safe_symbol(ticker)}_{'adj' if adjusted else 'raw'}_"
+
+
+def _path(ticker, adjusted, start):
+    # El inicio de la serie va en el nombre del fichero: no depende de que
+    # parquet conserve los metadatos del DataFrame.
+    return STORE_DIR / f"{_prefix(ticker, adjusted)}{start}.parquet"
+
+
+def _stored(ticker, adjusted):
+    """
+    (ruta, inicio) de la serie guardada de `ticker`, o (None, None).
+    """
+    prefix = _prefix(ticker, adjusted)
+    paths = sorted(STORE_DIR.glob(f"{prefix}*.parquet"))
+    if not paths:
+        return None, None
+    return paths[0], paths[0].stem[len(prefix):]
+
+
+def _download(ticker, start, end, adjusted):
+    """
+    Descarga barras diarias [start, end) de yfinance con columnas normalizadas.
+    `end` siempre es hoy (transport.today()), así que no entra en la clave del
+    fixture: una grabación se reproduce igual otro día.
+    """
+    import yfinance as yf
+
+    data = transport.call("yf_download", (ticker, start, adjusted), lambda: yf.download(
+        ticker,
+        start=start,
+        end=end,
+        interval="1d",
+        auto_adjust=adjusted,
+        progress=False,
+        multi_level_index=False,
+    ))
+    if data is None or data.empty:
+        return _empty_frame()
+
+    data = data[COLUMNS].astype(float)
+    data.index = pd.to_datetime(data.index).tz_localize(None)
+    data.index.name = "Date"
+    return data
+
+
+def _read(path):
+    if path is None:
+        return None
+    try:
+        return pd.read_parquet(path)
+    except (FileNotFoundError, OSError):
+        return None
+
+
+def _write(ticker, adjusted, df, start):
+    path = _path(ticker, adjusted, start)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+    # Las series del mismo ticker con otro inicio quedan sustituidas.
+    for old in STORE_DIR.glob(f"{_prefix(ticker, adjusted)}*.parquet"):
+        if old != path:
+            old.unlink(missing_ok=True)
+    return path
+
+
+def _checked_today(path, today):
+    try:
+        mtime = datetime.date.fromtimestamp(path.stat().st_mtime)
+    except FileNotFoundError:
+        return False
+    return mtime >= today
+
+
+def _is_current(stored, path, today):
+    """
+    El almacén está al día si tiene la barra de la última sesión completa
+    (día hábil anterior a hoy) o si ya se comprobó hoy (festivos).
+    """
+    if stored.empty:
+        return _checked_today(path, today)
+    last_session = (pd.Timestamp(today) - pd.offsets.BDay(1)).normalize()
+    return stored.index[-1] >= last_session or _checked_today(path, today)
+
+
+def _update(ticker, start, adjusted, today):
+    path, start_stored = _stored(ticker, adjusted)
+    stored = _read(path)
+    today_str = today.strftime("%Y-%m-%d")
+
+    if stored is None or start_stored > start:
+        stored = _download(ticker, start, today_str, adjusted)
+        _write(ticker, adjusted, stored, start)
+        return stored
+
+    if _is_current(stored, path, today):
+        return stored
+
+    if stored.empty:
+        new = _download(ticker, start, today_str, adjusted)
+    else:
+        # Se vuelve a pedir la última barra guardada para detectar si la serie
+        # ajustada ha cambiado hacia atrás.
+        last = stored.index[-1]
+        new = _download(ticker, last.strftime("%Y-%m-%d"), today_str, adjusted)
+        if adjusted and last in new.index and not np.isclose(
+            new.at[last, "Close"], stored.at[last, "Close"], rtol=ADJUSTED_RTOL
+        ):
+            stored = _download(ticker, start_stored, today_str, adjusted)
+            _write(ticker, adjusted, stored, start_stored)
+            return stored
+        new = new[new.index > last]
+
+    if new.empty:
+        os.utime(path)      # comprobado hoy: no volver a pedir hasta mañana
+        return stored
+
+    stored = pd.concat([stored, new]) if not stored.empty else new
+    _write(ticker, adjusted, stored, start_stored)
+    return stored
+
+
+def load_history(ticker: str, start: str = "2020-01-01", end: str | None = None,
+                 adjusted: bool = True) -> pd.DataFrame:
+    """
+    Devuelve las barras diarias OHLCV de `ticker` en [start, end) desde el
+    almacén local en Parquet (uno por ticker y por serie ajustada / sin ajustar).
+    Solo se descargan las barras que faltan; si el almacén está al día no se
+    hace ninguna petición.
+    """
+    today = transport.today()
+    with _locks[(ticker.upper(), adjusted)]:
+        try:
+            stored = _update(ticker, start, adjusted, today)
+        except transport.FixtureNotFound:
+            # En replay sin la actualización grabada se sirve lo guardado.
+            stored = _read(_stored(ticker, adjusted)[0])
+            if stored is None:
+                raise
+
+    if end is None:
+        end = today.strftime("%Y-%m-%d")
+
+    mask = (stored.index >= pd.Timestamp(start)) & (stored.index < pd.Timestamp(end))
+    return stored.loc[mask].copy()
+
+
+if __name__ == "__main__":
+    # Resumen del almacén local (solo lectura, sin descargas). La comprobación
+    # de grabar y reproducir otro día está en scrapper/check_ohlcv_replay.py.
+    for path in sorted(STORE_DIR.glob("*.parquet")):
+        df = _read(path)
+        if df is None or df.empty:
+            print(f"{path.stem}: vacío")
+        else:
+            print(f"{path.stem}: {len(df)} barras | {df.index[0]:%Y-%m-%d} → {df.index[-1]:%Y-%m-%d}")
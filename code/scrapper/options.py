@@ -3,19 +3,18 @@ import pandas as pd
 import re
 import requests
 
-from bs4 import BeautifulSoup
 from datetime import datetime
 from io import StringIO
+from lxml import html as lxml_html
+from pandas.io.parsers import TextParser
 
-def process_percentage(value):
-    if pd.isna(value):
-        return value
-    str_value = str(value).replace('%', '').replace(',', '.')
-    try:
-        return float(str_value) / 100
-    except ValueError:
-        return np.nan
+from scrapper import transport
+from scrapper.parsing import parse_percentage
 
+_RE_WHITESPACE = re.compile(r"\s+")
+_XPATH_TABLE_CONTAINERS = (
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' tableContainer ')]"
+)
 
 def process_timestamp(value):
     timestamp_format = '%d/%m/%Y %H:%M:%S'
@@ -34,6 +33,80 @@ def process_timestamp(value):
 def get_indice_page_url(symbol,timestamp=None):
     return f"https://es.finance.yahoo.com/quote/{symbol}/options/?date={timestamp}"
 
+def _cell_text(cell):
+    return _RE_WHITESPACE.sub(" ", cell.text_content().strip())
+
+
+def _table_to_frame(table):
+    """
+    Convierte un <table> de lxml en DataFrame sin volver a serializar el HTML.
+    Usa el mismo TextParser (y las mismas opciones) que pd.read_html, así que
+    los tipos de cada columna coinciden con el camino antiguo.
+    """
+    header_rows = table.xpath("./thead/tr")
+    body_rows = table.xpath("./tbody/tr | ./tr")
+
+    if not header_rows:
+        while body_rows and all(c.tag == "th" for c in body_rows[0].xpath("./th | ./td")):
+            header_rows.append(body_rows.pop(0))
+
+    rows = [[_cell_text(c) for c in tr.xpath("./th | ./td")] for tr in header_rows + body_rows]
+    if not rows:
+        return None
+
+    width = max(len(row) for row in rows)
+    for row in rows:
+        row.extend([""] * (width - len(row)))
+
+    with TextParser(rows, header=0, thousands=",") as parser:
+        return parser.read()
+
+
+def parse_options_tables(page_html, verbose=False):
+    """
+    Extrae (options_compra, options_venta) del HTML de la página de opciones
+    de Yahoo parseándolo una sola vez con lxml.
+    """
+    root = lxml_html.fromstring(page_html)
+    containers = root.xpath(_XPATH_TABLE_CONTAINERS)
+
+    options = []
+    for name, container in zip(("CALLS", "PUTS"), containers[:2]):
+        tables = container.xpath(".//table")
+        try:
+            options.append(_table_to_frame(tables[0]) if tables else None)
+        except Exception as e:
+            if verbose:
+                print(f"Error leyendo tabla de {name}:", e)
+            options.append(None)
+
+    options += [None] * (2 - len(options))
+    return options[0], options[1]
+
+
+def parse_options_tables_bs4(page_html, verbose=False):
+    """
+    Camino original: BeautifulSoup + pd.read_html sobre cada tableContainer.
+    Se mantiene como referencia para el benchmark de parseo.
+    """
+    from bs4 import BeautifulSoup
+
+    expansion_web = BeautifulSoup(page_html, 'html.parser')
+    tables = expansion_web.select('div.tableContainer')
+
+    options = []
+    for name, table in zip(("CALLS", "PUTS"), tables[:2]):
+        try:
+            options.append(pd.read_html(StringIO(str(table)), header=0, encoding="utf-8")[0])
+        except Exception as e:
+            if verbose:
+                print(f"Error leyendo tabla de {name}:", e)
+            options.append(None)
+
+    options += [None] * (2 - len(options))
+    return options[0], options[1]
+
+
 def scrape_options_data(symbol, timestamp, verbose=False):
     url_expansion = get_indice_page_url(symbol, timestamp)
     headers = {
@@ -45,7 +118,7 @@ def scrape_options_data(symbol, timestamp, verbose=False):
     }
 
     try:
-        expansion_request = requests.get(url_expansion, headers=headers, timeout=10)
+        expansion_request = transport.get(url_expansion, headers=headers, timeout=10)
     except requests.exceptions.RequestException as e:
         if verbose:
             print("Error de conexión:", e)
@@ -58,54 +131,29 @@ def scrape_options_data(symbol, timestamp, verbose=False):
             print(expansion_request.text[:300])
         return None, None
 
-    expansion_web = BeautifulSoup(expansion_request.text, 'html.parser')
-
     if verbose:
         print("HTML general de la página:")
-        print(expansion_web.prettify()[:2000])
+        print(expansion_request.text[:2000])
 
-    tables = expansion_web.select('div.tableContainer')
+    options_compra, options_venta = parse_options_tables(expansion_request.text, verbose=verbose)
 
-    if not tables:
+    if options_compra is None and options_venta is None:
         if verbose:
             print("No se encontró ninguna tabla de opciones para", symbol)
         return None, None
 
-    try:
-        options_compra = pd.read_html(
-            StringIO(str(tables[0])),
-            header=0,
-            encoding="utf-8"
-        )[0]
-    except Exception as e:
-        if verbose:
-            print("Error leyendo tabla de CALLS:", e)
-        options_compra = None
-
-    options_venta = None
-    if len(tables) > 1:
-        try:
-            options_venta = pd.read_html(
-                StringIO(str(tables[1])),
-                header=0,
-                encoding="utf-8"
-            )[0]
-        except Exception as e:
-            if verbose:
-                print("Error leyendo tabla de PUTS:", e)
-            options_venta = None
-
     if verbose and options_compra is not None:
         print("CALLS:")
         print(options_compra.head())
     if verbose and options_venta is not None:
         print("PUTS:")
         print(options_venta.head())
-    
-    options_compra['Cambio de %'] = options_compra['Cambio de %'].apply(process_percentage)
-    options_venta['Cambio de %'] = options_venta['Cambio de %'].apply(process_percentage)
-    options_compra['Volatilidad implícita'] = options_compra['Volatilidad implícita'].apply(process_percentage)
-    options_venta['Volatilidad implícita'] = options_venta['Volatilidad implícita'].apply(process_percentage)
+
+    for options in (options_compra, options_venta):
+        if options is None:
+            continue
+        options['Cambio de %'] = parse_percentage(options['Cambio de %'], always_percent=True)
+        options['Volatilidad implícita'] = parse_percentage(options['Volatilidad implícita'], always_percent=True)
     #options_compra['Fecha de última transacción (GMT-5)'] = options_compra['Fecha de última transacción (GMT-5)'].apply(process_timestamp).str.split('.').str[0]
     #options_venta['Fecha de última transacción (GMT-5)'] = options_venta['Fecha de última transacción (GMT-5)'].apply(process_timestamp).str.split('.').str[0]
 
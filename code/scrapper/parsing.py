@@ -0,0 +1,99 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Marcadores que las webs usan para "sin dato".
+PLACEHOLDERS = pa.array(["", "-", "—"])
+
+_NULL = pa.scalar(None, pa.string())
+_NUMBER_REGEX = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+
+def _split_text(values):
+    """
+    Separa una columna en (texto, resto):
+    - texto: array de pyarrow con los strings recortados, sin marcadores
+      de "sin dato" (null donde la celda no era un string útil).
+    - resto: array de pyarrow float64 con las celdas que no eran strings.
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    n = len(s)
+
+    if s.dtype.kind in "biuf":
+        return pa.nulls(n, pa.string()), pa.array(s.to_numpy(dtype=float))
+
+    if pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty"):
+        text = pa.array(s, type=pa.string(), from_pandas=True)
+        rest = pa.nulls(n, pa.float64())
+    else:
+        # Columna mezclada (números y texto): caso raro, se separa celda a celda.
+        obj = s.astype(object)
+        is_text = obj.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+        text = pa.array(obj.where(is_text), type=pa.string(), from_pandas=True)
+        rest = pa.array(pd.to_numeric(obj.where(~is_text), errors="coerce").to_numpy(dtype=float),
+                        from_pandas=True)
+
+    text = pc.utf8_trim_whitespace(text)
+    return pc.if_else(pc.is_in(text, PLACEHOLDERS), _NULL, text), rest
+
+
+def _to_float(text):
+    """
+    Convierte un array de strings a float64 (null si no es un número).
+    Si todo es numérico basta con un cast; si no, se validan con regex.
+    """
+    try:
+        return pc.cast(text, pa.float64())
+    except pa.ArrowInvalid:
+        valid = pc.match_substring_regex(text, _NUMBER_REGEX)
+        return pc.cast(pc.if_else(valid, text, _NULL), pa.float64())
+
+
+def _to_series(numbers, values):
+    index = values.index if isinstance(values, pd.Series) else None
+    return pd.Series(numbers.to_numpy(zero_copy_only=False), index=index, dtype=float)
+
+
+def parse_percentage(values, always_percent=False):
+    """
+    Convierte una columna de porcentajes en formato español a fracción:
+    "12,5%" → 0.125, "3,2" → 3.2, "-" → NaN.
+
+    - always_percent=False: solo se divide entre 100 si la celda lleva '%'.
+    - always_percent=True: se divide siempre entre 100 (columnas que Yahoo
+      ya da en porcentaje, aunque vengan como número).
+    Las celdas numéricas se conservan tal cual (o /100 si always_percent).
+    """
+    text, rest = _split_text(values)
+
+    cleaned = pc.replace_substring(pc.replace_substring(text, "%", ""), ",", ".")
+    parsed = pc.coalesce(_to_float(pc.utf8_trim_whitespace(cleaned)), rest)
+
+    if always_percent:
+        parsed = pc.divide(parsed, 100.0)
+    else:
+        has_pct = pc.match_substring(text, "%")
+        parsed = pc.if_else(pc.fill_null(has_pct, False), pc.divide(parsed, 100.0), parsed)
+
+    return _to_series(parsed, values)
+
+
+def parse_capitalization(values):
+    """
+    Convierte capitalizaciones en formato español a número:
+    "1.234,5 mil M" → 1.2345e12, "850,2 M" → 8.502e8, "-" → NaN.
+    Las celdas que no son texto se consideran sin dato.
+    """
+    text, _ = _split_text(values)
+
+    has_m = pc.fill_null(pc.match_substring(text, "M"), False)
+    has_mil = pc.fill_null(pc.match_substring(text, "mil"), False)
+
+    # "mil" sin "M" no es un formato válido.
+    text = pc.if_else(pc.and_(has_mil, pc.invert(has_m)), _NULL, text)
+    text = pc.replace_substring(pc.replace_substring(text, ".", ""), ",", ".")
+    text = pc.replace_substring(pc.replace_substring(text, "mil", ""), "M", "")
+    number = _to_float(pc.utf8_trim_whitespace(text))
+
+    factor = pc.if_else(has_m, pc.if_else(has_mil, 1e9, 1e6), 1.0)
+    return _to_series(pc.multiply(number, factor), values)
@@ -0,0 +1,104 @@
+import threading
+import time
+
+from scrapper import transport
+
+# El spot se usa para centrar gráficos y elegir strikes: unos segundos de
+# antigüedad no cambian nada y evitan una petición por cada payoff.
+QUOTE_TTL_SECONDS = 30
+FETCH_TIMEOUT_SECONDS = 20
+
+
+class QuoteService:
+    """
+    Precios spot compartidos por todas las sesiones.
+
+    - Cada símbolo se guarda `ttl_seconds`; dentro de esa ventana no se vuelve
+      a pedir.
+    - Si dos llamadas piden a la vez un símbolo que no está, solo una descarga
+      y la otra espera su resultado.
+    - Los símbolos que faltan se piden todos juntos con un único yf.download.
+    """
+
+    def __init__(self, ttl_seconds=QUOTE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._prices = {}        # símbolo → (precio, instante de descarga)
+        self._inflight = {}      # símbolo → Event de la descarga en curso
+        self._lock = threading.Lock()
+
+    def _download(self, symbols):
+        import yfinance as yf
+
+        data = transport.call("yf_quotes", symbols, lambda: yf.download(
+            symbols,
+            period="5d",
+            interval="1d",
+            auto_adjust=True,
+            progress=False,
+            threads=True,
+        ))
+        if data is None or data.empty:
+            return {}
+
+        close = data["Close"]
+        prices = {}
+        for symbol in symbols:
+            if symbol not in close:
+                continue
+            serie = close[symbol].dropna()
+            if not serie.empty:
+                prices[symbol] = float(serie.iloc[-1])
+        return prices
+
+    def get_prices(self, symbols):
+        """
+        Devuelve {símbolo: precio} para los símbolos que se pudieron obtener.
+        """
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        now = time.monotonic()
+        result, to_fetch, to_wait = {}, [], []
+
+        with self._lock:
+            for symbol in symbols:
+                cached = self._prices.get(symbol)
+                if cached is not None and now - cached[1] < self.ttl_seconds:
+                    result[symbol] = cached[0]
+                elif symbol in self._inflight:
+                    to_wait.append((symbol, self._inflight[symbol]))
+                else:
+                    self._inflight[symbol] = threading.Event()
+                    to_fetch.append(symbol)
+
+        if to_fetch:
+            prices = {}
+            try:
+                prices = self._download(to_fetch)
+            finally:
+                with self._lock:
+                    fetched_at = time.monotonic()
+                    for symbol in to_fetch:
+                        if symbol in prices:
+                            self._prices[symbol] = (prices[symbol], fetched_at)
+                        self._inflight.pop(symbol).set()
+            result.update(prices)
+
+        for symbol, event in to_wait:
+            event.wait(FETCH_TIMEOUT_SECONDS)
+            cached = self._prices.get(symbol)
+            if cached is not None:
+                result[symbol] = cached[0]
+
+        return result
+
+    def get_price(self, symbol):
+        """
+        Precio actual de `symbol`. Lanza ValueError si no se pudo obtener.
+        """
+        prices = self.get_prices([symbol])
+        if symbol.upper() not in prices:
+            raise ValueError(f"No se pudo obtener el precio actual de {symbol}.")
+        return prices[symbol.upper()]
+
+
+# Instancia compartida por todas las sesiones del servidor de Streamlit.
+QUOTE_SERVICE = QuoteService()
@@ -1,29 +1,23 @@
 import time
 import numpy as np
 import pandas as pd
-import yfinance as yf
-import requests
-from bs4 import BeautifulSoup
 from io import StringIO
 import datetime
+import os
+import threading
 import streamlit as st  
 
-BASE_URL = "https://www.slickcharts.com/sp500"
+from scrapper import transport
+from scrapper.cache import APP_DIR
+from scrapper.ohlcv_store import load_history
+from scrapper.parsing import parse_percentage
 
-def percentage_to_float(perc):
-    if isinstance(perc, str):
-        if '%' in perc:
-            perc = perc.replace('%', '').replace(',', '.')
-            perc = float(perc) / 100
-            return perc
-        else:
-            perc = perc.replace(',', '.')
-            try:
-                return float(perc)
-            except:
-                return None
-    return perc
+BASE_URL = "https://www.slickcharts.com/sp500"
 
+CONSTITUENTS_COLUMNS = ['Rank', 'Company', 'Symbol', 'Weight', 'Price', 'Chg', '% Chg',
+                        '% Chg String', '% Chg Float']
+CONSTITUENTS_REFRESH_SECONDS = 15 * 60
+CONSTITUENTS_SNAPSHOT = APP_DIR / "data" / "cache" / "sp500_constituents.parquet"
 
 def scrape_series_data(verbose=False):
 
@@ -35,11 +29,13 @@ def scrape_series_data(verbose=False):
         )
     }
 
-    indice_page_request = requests.get(BASE_URL, headers=headers)
+    indice_page_request = transport.get(BASE_URL, headers=headers)
 
     if indice_page_request.status_code != 200:
         raise ValueError(f"Error {indice_page_request.status_code} al cargar la página.")
 
+    from bs4 import BeautifulSoup
+
     indice_page_web = BeautifulSoup(indice_page_request.content, 'html.parser')
 
     table = indice_page_web.select_one("table.table.table-hover.table-borderless.table-sm")
@@ -53,17 +49,106 @@ def scrape_series_data(verbose=False):
         print("Tabla descargada con forma:", sp500.shape)
 
     sp500.columns = ['Rank', 'Company', 'Symbol', 'Weight', 'Price', 'Chg', '% Chg']
-    sp500['Weight'] = sp500['Weight'].apply(percentage_to_float)
+    sp500['Weight'] = parse_percentage(sp500['Weight'])
     sp500['% Chg String'] = ( sp500['% Chg']
     .str.replace('(', '', regex=False)
     .str.replace(')', '', regex=False)
 )
-    sp500['% Chg Float'] = ( sp500['% Chg String']
-    .apply(percentage_to_float)
-)
+    sp500['% Chg Float'] = parse_percentage(sp500['% Chg String'])
     return sp500
 
-@st.cache_data
+class ConstituentsService:
+    """
+    Tabla de constituyentes del S&P 500 servida desde memoria.
+
+    Un hilo en segundo plano la vuelve a descargar de slickcharts cada
+    `refresh_seconds`; mientras tanto se sirve la última versión (aunque esté
+    desfasada), así que una página nunca espera a slickcharts. Cada descarga
+    correcta se guarda en disco para arrancar con datos tras un reinicio.
+    El error de la última descarga fallida queda en `last_error` (y se
+    imprime con verbose).
+    """
+
+    def __init__(self, refresh_seconds=CONSTITUENTS_REFRESH_SECONDS,
+                 snapshot_path=CONSTITUENTS_SNAPSHOT, verbose=False):
+        self.refresh_seconds = refresh_seconds
+        self.snapshot_path = snapshot_path
+        self.verbose = verbose
+        self.updated_at = None
+        self.last_error = None
+        self._df = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            if self._df is None:
+                try:
+                    self._df = pd.read_parquet(self.snapshot_path)
+                    self.updated_at = datetime.datetime.fromtimestamp(
+                        os.path.getmtime(self.snapshot_path)
+                    )
+                except (FileNotFoundError, OSError, ValueError):
+                    pass
+            self._thread = threading.Thread(
+                target=self._run, name="sp500-constituents", daemon=True
+            )
+            self._thread.start()
+
+    def refresh(self):
+        """
+        Descarga la tabla ahora. Si falla, se conserva la versión anterior.
+        """
+        df = scrape_series_data(verbose=False)
+        with self._lock:
+            self._df = df
+            self.updated_at = datetime.datetime.now()
+            self.last_error = None
+
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.snapshot_path.with_suffix(f".{os.getpid()}.tmp")
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, self.snapshot_path)
+        except Exception:
+            pass
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = e
+                if self.verbose:
+                    print("Error actualizando los constituyentes del S&P 500:", e)
+            time.sleep(self.refresh_seconds)
+
+    def get(self):
+        """
+        Devuelve la última tabla disponible sin bloquear. Mientras no haya
+        ninguna (primer arranque) devuelve una tabla vacía con las columnas.
+        """
+        self._ensure_started()
+        df = self._df
+        if df is None:
+            return pd.DataFrame(columns=CONSTITUENTS_COLUMNS)
+        return df
+
+
+CONSTITUENTS_SERVICE = ConstituentsService()
+
+
+def get_sp500_constituents():
+    """
+    Constituyentes del S&P 500 (Company, Symbol, Weight, ...) desde memoria,
+    refrescados en segundo plano. No hace peticiones en el hilo que llama.
+    """
+    return CONSTITUENTS_SERVICE.get()
+
+
+@st.cache_data(ttl=60 * 60)
 def load_data(
     ticker: str,
     start: str = "2020-01-01",
@@ -71,18 +156,29 @@ def load_data(
     interval: str = "1d",
 ) -> pd.DataFrame:
     """
-    Descarga datos de un ticker concreto y los cachea por (ticker, start, end, interval).
+    Descarga datos de un ticker concreto y los cachea una hora por
+    (ticker, start, end, interval): con end=None las barras nuevas aparecen
+    aunque el servidor lleve días en marcha.
+    Las barras diarias salen del almacén local OHLCV, que solo descarga
+    las sesiones que faltan.
     """
+    if interval == "1d":
+        return load_history(ticker, start=start, end=end, adjusted=True)
+
+    import yfinance as yf
+
+    # La clave lleva el `end` pedido (None = hasta hoy), no la fecha del día.
+    key = (ticker, start, end, interval)
     if end is None:
-        end = datetime.datetime.now().strftime("%Y-%m-%d")
+        end = transport.today().strftime("%Y-%m-%d")
 
-    data = yf.download(
+    data = transport.call("yf_download", key, lambda: yf.download(
         ticker,
         start=start,
         end=end,
         interval=interval,
         auto_adjust=True, 
-    )
+    ))
 
     if data.empty:
         return pd.DataFrame(
@@ -1,61 +1,20 @@
 import time
 import pandas as pd
 
-import requests
-from bs4 import BeautifulSoup
+from scrapper import transport
 import pandas as pd
 import time
 
+from scrapper.parsing import parse_capitalization, parse_percentage
+
 BASE_URL = "https://es.marketscreener.com/cotizacion/indice/S-P-500-4985/componentes/"
 
 def get_indice_page_url(page):
     return f"{BASE_URL}?p={page}"
 
-def capitalizacion_to_float(cap):
-    if not isinstance(cap, str):
-        return None
-
-    cap = cap.strip()
-
-    if cap in ("", "-", "—"):
-        return None
-
-    cap = cap.replace('.', '').replace(',', '.')
-
-    if 'mil' in cap and 'M' in cap:
-        cap = cap.replace('mil', '').replace('M', '').strip()
-        try:
-            return float(cap) * 1e9
-        except:
-            return None
-        
-    if 'M' in cap:
-        cap = cap.replace('M', '').strip()
-        try:
-            return float(cap) * 1e6
-        except:
-            return None
-
-    try:
-        return float(cap)
-    except:
-        return None
-
-        
-def percentage_to_float(perc):
-    if isinstance(perc, str):
-        if '%' in perc:
-            perc = perc.replace('%', '').replace(',', '.')
-            perc = float(perc)/100
-            return perc
-        else:
-            perc = perc.replace(',', '.')
-            try:
-                return float(perc)
-            except:
-                return None
-
 def scrape_series_data(verbose=False):
+    from bs4 import BeautifulSoup
+
     sp500 = []
     page = 1
 
@@ -72,7 +31,7 @@ def scrape_series_data(verbose=False):
                 'Chrome/109.0.0.0 Safari/537.36'
             )
         }
-        indice_page_request = requests.get(indice_page_url, headers=headers)
+        indice_page_request = transport.get(indice_page_url, headers=headers)
 
         if indice_page_request.status_code != 200:
             print(indice_page_request.status_code)
@@ -106,8 +65,8 @@ def load_sp500():
     sp500 = sp500.iloc[:, 1:]
     sp500.columns = ['activo','Capi. USD', 'Variación', 'Varia. 5d.', 'Varia. 1 de ene.']
     sp500 = sp500.dropna(how='all')
-    sp500['Capi. USD'] = sp500['Capi. USD'].apply(capitalizacion_to_float)
-    sp500['Variación'] = sp500['Variación'].apply(percentage_to_float)
-    sp500['Varia. 5d.'] = sp500['Varia. 5d.'].apply(percentage_to_float)
-    sp500['Varia. 1 de ene.'] = sp500['Varia. 1 de ene.'].apply(percentage_to_float)
+    sp500['Capi. USD'] = parse_capitalization(sp500['Capi. USD'])
+    sp500['Variación'] = parse_percentage(sp500['Variación'])
+    sp500['Varia. 5d.'] = parse_percentage(sp500['Varia. 5d.'])
+    sp500['Varia. 1 de ene.'] = parse_percentage(sp500['Varia. 1 de ene.'])
     return sp500
\ No newline at end of file
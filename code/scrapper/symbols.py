@@ -1,6 +1,155 @@
-import requests
+import csv
+import difflib
+import re
+import threading
+import unicodedata
+from pathlib import Path
 
-def obtener_ticker(nombre: str):
+from scrapper import transport
+from scrapper.cache import APP_DIR
+
+INDEX_PATH = APP_DIR / "data" / "cache" / "tickers_index.csv"
+
+# CSVs con los que se siembra el índice: (ruta, columna nombre, columna símbolo)
+SEED_CANDIDATES = [
+    (APP_DIR / "data" / "tickers_us_stocks.csv", "name", "symbol"),                      # unused/data.py
+    (APP_DIR / "scrapper" / "unused" / "tickers_us_stocks.csv", "name", "symbol"),
+    (APP_DIR / "data" / "sp500_con_simbolos.csv", "activo", "Symbol"),                   # unused/ver_simbols.py
+]
+
+# Palabras que no distinguen a una empresa de otra
+_STOPWORDS = {
+    "the", "inc", "incorporated", "corp", "corporation", "co", "company", "companies",
+    "ltd", "limited", "plc", "sa", "ag", "nv", "se", "lp", "llc",
+    "common", "stock", "shares", "ordinary",
+}
+# "Class A", "Cl B": la clase de acción distingue tickers (GOOGL / GOOG)
+_CLASS_WORDS = {"class", "cl"}
+_RE_NO_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_company_name(nombre: str) -> str:
+    """
+    Normaliza un nombre de empresa para buscarlo en el índice:
+    "NVIDIA Corporation" → "nvidia", "Procter & Gamble Co." → "procter and gamble",
+    "Alphabet Inc. (Class A)" → "alphabet class a".
+    """
+    nombre = unicodedata.normalize("NFKD", str(nombre)).encode("ascii", "ignore").decode()
+    nombre = nombre.lower().replace("&", " and ")
+    tokens = [t for t in _RE_NO_ALNUM.split(nombre) if t and t not in _STOPWORDS]
+
+    # La clase de acción se conserva al final como "class x".
+    clase = []
+    for i, token in enumerate(tokens[:-1]):
+        if token in _CLASS_WORDS and len(tokens[i + 1]) == 1:
+            clase = ["class", tokens[i + 1]]
+            tokens = tokens[:i] + tokens[i + 2:]
+            break
+    return " ".join(tokens + clase)
+
+
+def share_class(key: str) -> str:
+    """
+    Clase de acción de un nombre normalizado ("a" en "alphabet class a"), o "".
+    """
+    tokens = key.split(" ")
+    if len(tokens) > 2 and tokens[-2] == "class":
+        return tokens[-1]
+    return ""
+
+
+class TickerIndex:
+    """
+    Índice local nombre de empresa → ticker.
+
+    Se siembra con los CSV de SEED_CANDIDATES, se completa con los resultados
+    de la búsqueda de Yahoo (`add`) y se persiste en `path`. Las búsquedas son
+    locales: primero coincidencia exacta del nombre normalizado y, si no hay,
+    coincidencia aproximada entre los nombres que empiezan por la misma palabra.
+    """
+
+    def __init__(self, path=INDEX_PATH, seeds=SEED_CANDIDATES):
+        self.path = Path(path)
+        self._exact = {}
+        self._by_first_token = {}
+        self._lock = threading.Lock()
+
+        for seed_path, name_col, symbol_col in seeds:
+            self._load_csv(seed_path, name_col, symbol_col)
+        self._load_csv(self.path, "name", "symbol")
+
+    def __len__(self):
+        return len(self._exact)
+
+    def _load_csv(self, path, name_col, symbol_col):
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    self._insert(row.get(name_col), row.get(symbol_col))
+        except FileNotFoundError:
+            pass
+
+    def _insert(self, nombre, symbol):
+        if not nombre or not symbol:
+            return None
+        key = normalize_company_name(nombre)
+        if not key:
+            return None
+        actual = self._exact.get(key)
+        if actual is not None:
+            # Nunca se pisa una entrada con otro símbolo: la primera gana.
+            return key if actual == symbol else None
+        self._by_first_token.setdefault(key.split(" ", 1)[0], []).append(key)
+        self._exact[key] = symbol
+        return key
+
+    def lookup(self, nombre: str, cutoff: float = 0.85):
+        """
+        Devuelve el ticker de `nombre` o None si no está en el índice.
+        """
+        key = normalize_company_name(nombre)
+        symbol = self._exact.get(key)
+        if symbol is not None or not key or cutoff >= 1:
+            return symbol
+
+        # Solo se comparan nombres de la misma clase de acción: "Class A" no
+        # debe acabar en el ticker de "Class C" por parecido.
+        clase = share_class(key)
+        candidates = [c for c in self._by_first_token.get(key.split(" ", 1)[0], ())
+                      if share_class(c) == clase]
+        match = difflib.get_close_matches(key, candidates, n=1, cutoff=cutoff)
+        if not match:
+            return None
+
+        symbol = self._exact[match[0]]
+        with self._lock:
+            self._insert(nombre, symbol)   # la próxima vez es exacta (solo en memoria)
+        return symbol
+
+    def add(self, nombre: str, symbol: str):
+        """
+        Añade (nombre, symbol) al índice y lo guarda en disco.
+        """
+        with self._lock:
+            key = normalize_company_name(nombre)
+            if not symbol or not key or key in self._exact:
+                return
+            self._insert(nombre, symbol)
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            is_new = not self.path.exists()
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if is_new:
+                    writer.writerow(["name", "symbol"])
+                writer.writerow([nombre, symbol])
+
+
+# Índice compartido por todas las sesiones.
+TICKER_INDEX = TickerIndex()
+
+
+def _buscar_quotes(nombre: str):
     url = "https://query1.finance.yahoo.com/v1/finance/search"
     params = {"q": nombre}
     headers = {
@@ -11,7 +160,7 @@ def obtener_ticker(nombre: str):
         )
     }
 
-    resp = requests.get(url, params=params, headers=headers, timeout=10)
+    resp = transport.get(url, params=params, headers=headers, timeout=10)
 
     if resp.status_code != 200:
         print("Error HTTP:", resp.status_code)
@@ -26,14 +175,44 @@ def obtener_ticker(nombre: str):
         print(resp.text[:300])
         return None
 
-    quotes = data.get("quotes", [])
+    return data.get("quotes", [])
+
+
+def obtener_ticker(nombre: str):
+    """
+    Busca el ticker de `nombre` en Yahoo (una petición HTTP).
+    """
+    quotes = _buscar_quotes(nombre)
+    if not quotes:
+        if quotes is not None:
+            print("No se han encontrado resultados para:", nombre)
+        return None
+
+    return quotes[0].get("symbol")
+
+
+def buscar_ticker(nombre: str):
+    """
+    Devuelve el ticker de `nombre` usando el índice local y, solo si no está,
+    la búsqueda de Yahoo, cuyo resultado se guarda en el índice.
+    """
+    symbol = TICKER_INDEX.lookup(nombre)
+    if symbol is not None:
+        return symbol
+
+    quotes = _buscar_quotes(nombre)
     if not quotes:
-        print("No se han encontrado resultados para:", nombre)
+        if quotes is not None:
+            print("No se han encontrado resultados para:", nombre)
         return None
 
     symbol = quotes[0].get("symbol")
+    TICKER_INDEX.add(nombre, symbol)
+    for campo in ("longname", "shortname"):
+        if quotes[0].get(campo):
+            TICKER_INDEX.add(quotes[0][campo], symbol)
 
     return symbol
 
 if __name__ == "__main__":
-    print("Ticker NVIDIA:", obtener_ticker("NVIDIA CORPORATION"))
+    print("Ticker NVIDIA:", buscar_ticker("NVIDIA CORPORATION"))
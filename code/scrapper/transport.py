@@ -0,0 +1,223 @@
+"""
+Capa HTTP común de los scrapers con modo grabación / reproducción.
+
+Modos (variable de entorno SCAVENGER_HTTP_MODE o configure()):
+- live:   peticiones reales (por defecto).
+- record: peticiones reales y se guarda cada respuesta en la carpeta de fixtures.
+- replay: no se toca la red; las respuestas salen de la carpeta de fixtures,
+          con una latencia simulada opcional.
+
+Las claves de los fixtures no llevan la fecha del día: en replay, today()
+devuelve la fecha en que se grabó, para que lo que depende de "hoy" (p. ej.
+el almacén OHLCV) pida exactamente lo mismo que en la grabación.
+
+Ejemplo para benchmarks offline (desde code/):
+    SCAVENGER_HTTP_MODE=record streamlit run app.py      # navegar una vez
+    SCAVENGER_HTTP_MODE=replay SCAVENGER_REPLAY_LATENCY_MS=150 streamlit run app.py
+"""
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import random
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode, urlparse
+
+import requests
+
+from scrapper.cache import APP_DIR
+
+MODES = ("live", "record", "replay")
+
+_config = {
+    "mode": os.environ.get("SCAVENGER_HTTP_MODE", "live"),
+    "fixtures_dir": Path(os.environ.get("SCAVENGER_FIXTURES_DIR", APP_DIR / "data" / "fixtures")),
+    "latency_ms": float(os.environ.get("SCAVENGER_REPLAY_LATENCY_MS", 0)),
+    "jitter_ms": float(os.environ.get("SCAVENGER_REPLAY_JITTER_MS", 0)),
+}
+_lock = threading.Lock()
+
+
+class FixtureNotFound(requests.exceptions.ConnectionError):
+    """
+    En modo replay no hay ninguna respuesta grabada para la petición.
+    """
+
+
+def configure(mode=None, fixtures_dir=None, latency_ms=None, jitter_ms=None):
+    """
+    Cambia la configuración en caliente (útil en scripts de benchmark).
+    """
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"Modo HTTP desconocido: {mode}. Opciones: {MODES}")
+        _config["mode"] = mode
+    if fixtures_dir is not None:
+        _config["fixtures_dir"] = Path(fixtures_dir)
+    if latency_ms is not None:
+        _config["latency_ms"] = float(latency_ms)
+    if jitter_ms is not None:
+        _config["jitter_ms"] = float(jitter_ms)
+
+
+def get_mode():
+    return _config["mode"]
+
+
+def _real_today():
+    return datetime.date.today()
+
+
+def _recorded_on_path():
+    return _config["fixtures_dir"] / "recorded_on.json"
+
+
+def _mark_recorded():
+    """
+    Anota la fecha de la grabación junto a los fixtures.
+    """
+    path = _recorded_on_path()
+    fecha = _real_today().isoformat()
+    try:
+        if json.loads(path.read_text(encoding="utf-8")).get("date") == fecha:
+            return
+    except (FileNotFoundError, ValueError):
+        pass
+    _atomic_write(path, json.dumps({"date": fecha}).encode("utf-8"))
+
+
+def today():
+    """
+    Fecha de "hoy" para construir peticiones: la real, salvo en replay, donde
+    es la de la grabación (si está anotada).
+    """
+    if _config["mode"] == "replay":
+        try:
+            meta = json.loads(_recorded_on_path().read_text(encoding="utf-8"))
+            return datetime.date.fromisoformat(meta["date"])
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+    return _real_today()
+
+
+class RecordedResponse:
+    """
+    Respuesta servida desde disco con la parte de requests.Response que usan
+    los scrapers.
+    """
+
+    def __init__(self, url, status_code, content, encoding="utf-8", headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding or "utf-8"
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} para {self.url}", response=self)
+
+
+def _key(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:20]
+
+
+def _body_suffix(content_type):
+    if "html" in content_type:
+        return ".html"
+    if "json" in content_type:
+        return ".json"
+    return ".bin"
+
+
+def _atomic_write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _simulate_latency():
+    latency = _config["latency_ms"] + random.uniform(0, _config["jitter_ms"])
+    if latency > 0:
+        time.sleep(latency / 1000)
+
+
+def _http_paths(url, params):
+    query = urlencode(sorted((params or {}).items()))
+    base = _config["fixtures_dir"] / "http" / urlparse(url).netloc / _key(url, query)
+    return base.with_suffix(".meta.json"), base
+
+
+def get(url, params=None, headers=None, timeout=10):
+    """
+    Equivalente a requests.get para los scrapers, según el modo configurado.
+    """
+    mode = _config["mode"]
+    meta_path, base = _http_paths(url, params)
+
+    if mode == "replay":
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            content = base.with_suffix(meta["body_suffix"]).read_bytes()
+        except FileNotFoundError:
+            raise FixtureNotFound(f"No hay respuesta grabada para {url} {params or ''}")
+        _simulate_latency()
+        return RecordedResponse(meta["url"], meta["status_code"], content,
+                                meta.get("encoding"), meta.get("headers"))
+
+    response = requests.get(url, params=params, headers=headers, timeout=timeout)
+
+    if mode == "record":
+        content_type = response.headers.get("Content-Type", "")
+        suffix = _body_suffix(content_type)
+        meta = {
+            "url": url,
+            "status_code": response.status_code,
+            "encoding": response.encoding,
+            "headers": {"Content-Type": content_type},
+            "body_suffix": suffix,
+        }
+        with _lock:
+            _atomic_write(base.with_suffix(suffix), response.content)
+            _atomic_write(meta_path, json.dumps(meta, indent=2).encode("utf-8"))
+            _mark_recorded()
+
+    return response
+
+
+def call(kind, key, func):
+    """
+    Graba / reproduce el resultado de una llamada que no pasa por requests
+    (yfinance). `kind` agrupa los fixtures y `key` identifica la llamada: debe
+    depender solo de los parámetros de la petición, nunca de la fecha actual.
+    """
+    mode = _config["mode"]
+    path = _config["fixtures_dir"] / "calls" / kind / f"{_key(key)}.pkl"
+
+    if mode == "replay":
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            raise FixtureNotFound(f"No hay resultado grabado para {kind} {key}")
+        _simulate_latency()
+        return pickle.loads(data)
+
+    result = func()
+
+    if mode == "record":
+        with _lock:
+            _atomic_write(path, pickle.dumps(result))
+            _mark_recorded()
+
+    return result
@@ -1,4 +1,6 @@
 import requests
+
+from .. import transport
 from bs4 import BeautifulSoup
 
 def get_indice_page_url(symbol):
@@ -16,7 +18,7 @@ def obtener_fechas_vencimiento(symbol, verbose=False):
     }
 
     try:
-        resp = requests.get(url_expansion, headers=headers, timeout=10)
+        resp = transport.get(url_expansion, headers=headers, timeout=10)
     except requests.exceptions.RequestException as e:
         if verbose:
             print("Error de conexión:", e)
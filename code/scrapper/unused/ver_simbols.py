@@ -1,11 +1,14 @@
-from ..symbols import obtener_ticker
+from ..symbols import TICKER_INDEX, buscar_ticker
 from pandas import read_csv
 import time
 data=read_csv('../data/sp500.csv')
 nombres=[]
 for company in data['activo'].tolist():
-    print(obtener_ticker(company))
-    nombres.append(obtener_ticker(company))
-    time.sleep(1)
+    symbol = TICKER_INDEX.lookup(company)
+    if symbol is None:
+        symbol = buscar_ticker(company)
+        time.sleep(1)
+    print(symbol)
+    nombres.append(symbol)
 data['Symbol']=nombres
-data.to_csv('../data/sp500_con_simbolos.csv',index=False)
\ No newline at end of file
+data.to_csv('../data/sp500_con_simbolos.csv',index=False)
@@ -0,0 +1,148 @@
+"""
+Perfil de importación del arranque de app.py.
+
+Con la variable de entorno SCAVENGER_IMPORT_PROFILE activa (=1, o la ruta
+del informe), install() mide cuánto tarda en ejecutarse cada módulo que se
+importa a partir de ese momento: tiempo acumulado (con lo que él importa) y
+propio. Al final de cada ejecución del script, write_report() añade al
+informe los módulos nuevos y lo que tardó el script en pintar la página; el
+primer bloque de cada proceso es la latencia de la primera sesión.
+
+Solo se ven las importaciones posteriores a install(): lo que Streamlit ya
+cargó al arrancar el servidor no aparece. Sin la variable no se instala nada.
+"""
+import datetime
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+ENV_VAR = "SCAVENGER_IMPORT_PROFILE"
+APP_DIR = Path(__file__).resolve().parent
+REPORT_PATH = APP_DIR / "data" / "cache" / "import_profile.txt"
+TOP_MODULES = 40
+
+
+class _ImportTimer:
+    """
+    Buscador de meta_path que delega en los demás y envuelve exec_module del
+    loader encontrado para cronometrar la ejecución del módulo.
+    """
+
+    def __init__(self):
+        self.records = []           # (módulo, acumulado s, propio s)
+        self._stack = threading.local()
+        self._lock = threading.Lock()
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            loader = spec.loader
+            # Los importadores de módulos integrados y congelados son clases:
+            # no se tocan (afectaría a todos sus módulos).
+            if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+                loader.exec_module = self._timed(name, loader.exec_module)
+            return spec
+        return None
+
+    def _timed(self, name, exec_module):
+        def exec_module_timed(module):
+            stack = self._stack.__dict__.setdefault("frames", [])
+            stack.append(0.0)                  # tiempo de los hijos
+            inicio = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                total = time.perf_counter() - inicio
+                hijos = stack.pop()
+                if stack:
+                    stack[-1] += total
+                with self._lock:
+                    self.records.append((name, total, total - hijos))
+        return exec_module_timed
+
+    def take(self):
+        with self._lock:
+            records, self.records = self.records, []
+        return records
+
+
+_TIMER = None
+
+
+def _report_path():
+    value = os.environ.get(ENV_VAR, "")
+    if value.lower() in ("1", "true", "yes", "si", "sí"):
+        return REPORT_PATH
+    return Path(value)
+
+
+def install():
+    """
+    Activa el perfil si la variable de entorno lo pide (una vez por proceso).
+    Devuelve True si está activo.
+    """
+    global _TIMER
+    if not os.environ.get(ENV_VAR):
+        return False
+    if _TIMER is None:
+        _TIMER = _ImportTimer()
+        sys.meta_path.insert(0, _TIMER)
+    return True
+
+
+def format_report(records, label="", elapsed=None):
+    """
+    Texto del informe: totales, paquetes por tiempo propio y los módulos más
+    lentos por tiempo acumulado (ms).
+    """
+    lineas = [
+        f"# {datetime.datetime.now():%Y-%m-%d %H:%M:%S} | {label}",
+        f"# módulos nuevos: {len(records)} | importación: "
+        f"{sum(propio for _, _, propio in records) * 1000:.0f} ms"
+        + (f" | script hasta pintar: {elapsed * 1000:.0f} ms" if elapsed is not None else ""),
+    ]
+
+    paquetes = {}
+    for nombre, _, propio in records:
+        paquete = nombre.split(".")[0]
+        paquetes[paquete] = paquetes.get(paquete, 0.0) + propio
+    lineas.append("propio_ms  paquete")
+    for paquete, propio in sorted(paquetes.items(), key=lambda item: -item[1])[:TOP_MODULES]:
+        lineas.append(f"{propio * 1000:9.1f}  {paquete}")
+
+    lineas.append("acum_ms  propio_ms  módulo")
+    for nombre, total, propio in sorted(records, key=lambda r: -r[1])[:TOP_MODULES]:
+        lineas.append(f"{total * 1000:7.1f}  {propio * 1000:9.1f}  {nombre}")
+    return "\n".join(lineas) + "\n\n"
+
+
+def write_report(label="", elapsed=None):
+    """
+    Añade al informe los módulos importados desde el último informe. No hace
+    nada si el perfil no está activo o no hubo importaciones nuevas.
+    """
+    if _TIMER is None:
+        return None
+    records = _TIMER.take()
+    if not records:
+        return None
+    path = _report_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(format_report(records, label, elapsed))
+    return path
+
+
+if __name__ == "__main__":
+    os.environ.setdefault(ENV_VAR, "1")
+    install()
+    inicio = time.perf_counter()
+    import options.payoff_call_streamlit
+    import stock.stock_streamlit
+    print(format_report(_TIMER.take(), "demo", time.perf_counter() - inicio))
@@ -6,15 +6,17 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 import streamlit as st
-import datetime
 import pandas as pd
-import yfinance as yf
 
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 from scrapper.sp500_fechas import load_sp500
-from scrapper.symbols import obtener_ticker
+from scrapper.symbols import buscar_ticker
+from scrapper.ohlcv_store import load_history
+from render.cache import cached_figure, data_fingerprint
+from render.downsample import aggregate_ohlc
+from render.traces import line_trace
 
 from pathlib import Path
 
@@ -56,20 +58,13 @@ DEFAULT_CONFIG = {
     "macd": False
 }
 
-@st.cache_data
+@st.cache_data(ttl=60 * 60, show_spinner=False)
 def load_data(ticker: str):
-    data = yf.download(
-        ticker,
-        start="2020-01-01",
-        end=datetime.datetime.now().strftime("%Y-%m-%d"),
-        interval="1d"
-    )
-
-    data.reset_index(inplace=True)
-    data.columns = ["Date", "Open", "High", "Low", "Close", "Volume"]
-    data["Date"] = pd.to_datetime(data["Date"])
-    data.set_index("Date", inplace=True)
-    return data
+    """
+    Barras diarias desde 2020 servidas desde el almacén local OHLCV:
+    solo se descargan las sesiones que faltan.
+    """
+    return load_history(ticker, start="2020-01-01", adjusted=True)
 
 
 def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
@@ -127,48 +122,37 @@ def build_figure(
 
     row_id = 1
 
+    # Velas y barras agrupadas en cubos y líneas reducidas a mínimo / máximo:
+    # el número de puntos por traza es fijo aunque crezca el histórico.
+    velas = aggregate_ohlc(df[[c for c in ("Open", "High", "Low", "Close", "Volume", "MACD_hist") if c in df]])
+
     fig.add_trace(go.Candlestick(
-        x=df.index,
-        open=df["Open"],
-        high=df["High"],
-        low=df["Low"],
-        close=df["Close"],
+        x=velas.index,
+        open=velas["Open"],
+        high=velas["High"],
+        low=velas["Low"],
+        close=velas["Close"],
         name="Precio"
     ), row=row_id, col=1)
 
     if sma20:
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df["SMA20"],
-            mode="lines",
-            name="SMA20"
-        ), row=row_id, col=1)
+        fig.add_trace(line_trace(df.index, df["SMA20"], "SMA20"), row=row_id, col=1)
 
     if sma50:
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df["SMA50"],
-            mode="lines",
-            name="SMA50"
-        ), row=row_id, col=1)
+        fig.add_trace(line_trace(df.index, df["SMA50"], "SMA50"), row=row_id, col=1)
 
     if volume:
         row_id += 1
         fig.add_trace(go.Bar(
-            x=df.index,
-            y=df["Volume"],
+            x=velas.index,
+            y=velas["Volume"],
             name="Volumen"
         ), row=row_id, col=1)
         fig.update_yaxes(title_text="Volumen", row=row_id, col=1)
 
     if rsi:
         row_id += 1
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df["RSI14"],
-            mode="lines",
-            name="RSI14"
-        ), row=row_id, col=1)
+        fig.add_trace(line_trace(df.index, df["RSI14"], "RSI14"), row=row_id, col=1)
         fig.add_hrect(
             y0=30, y1=70,
             fillcolor="lightgray",
@@ -181,22 +165,12 @@ def build_figure(
     if macd:
         row_id += 1
         fig.add_trace(go.Bar(
-            x=df.index,
-            y=df["MACD_hist"],
+            x=velas.index,
+            y=velas["MACD_hist"],
             name="MACD Hist"
         ), row=row_id, col=1)
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df["MACD"],
-            mode="lines",
-            name="MACD"
-        ), row=row_id, col=1)
-        fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df["MACD_signal"],
-            mode="lines",
-            name="MACD Signal"
-        ), row=row_id, col=1)
+        fig.add_trace(line_trace(df.index, df["MACD"], "MACD"), row=row_id, col=1)
+        fig.add_trace(line_trace(df.index, df["MACD_signal"], "MACD Signal"), row=row_id, col=1)
         fig.update_yaxes(title_text="MACD", row=row_id, col=1)
 
     fig.update_yaxes(title_text="Precio", row=1, col=1)
@@ -213,21 +187,26 @@ def build_figure(
 
 def show_chart(slot_key: str, ticker: str, config: dict, n_rows: int = 1):
     df = load_data(ticker)
-    df = add_indicators(df)
-
-    fig = build_figure(
-        df,
-        sma20=config["sma20"],
-        sma50=config["sma50"],
-        volume=config["volume"],
-        rsi=config["rsi"],
-        macd=config["macd"]
-    )
 
     base_height = 600  
     height = base_height // n_rows
 
-    fig.update_layout(height=height)
+    def construir():
+        fig = build_figure(
+            add_indicators(df),
+            sma20=config["sma20"],
+            sma50=config["sma50"],
+            volume=config["volume"],
+            rsi=config["rsi"],
+            macd=config["macd"]
+        )
+        fig.update_layout(height=height)
+        return fig
+
+    # Con los mismos datos y la misma configuración se reutiliza la figura
+    # ya construida (también entre gráficos iguales de un mismo layout).
+    clave = ("velas", ticker, data_fingerprint(df), tuple(sorted(config.items())), n_rows)
+    fig = cached_figure(clave, construir)
 
     st.plotly_chart(
         fig,
@@ -241,12 +220,13 @@ def init_tickers(TICKERS=None, num_empresas=4):
     """
     Inicializa la lista de TICKERS.
     Si TICKERS es None, se cargan las primeras empresas del S&P 500
-    y se obtienen sus tickers correspondientes.
+    y se obtienen sus tickers correspondientes (índice local de nombres,
+    con búsqueda en Yahoo solo para los que aún no están).
     """
     if TICKERS is None:
         df_sp500 = load_sp500()
         empresas = df_sp500["activo"].iloc[1:1 + num_empresas].tolist()
-        TICKERS = [obtener_ticker(empresa) for empresa in empresas]
+        TICKERS = [buscar_ticker(empresa) for empresa in empresas]
 
     return TICKERS
 
@@ -8,7 +8,7 @@ if str(ROOT) not in sys.path:
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from scrapper.sp500 import scrape_series_data
+from scrapper.sp500 import get_sp500_constituents
 
 
 def prep(df: pd.DataFrame) -> pd.DataFrame:
@@ -69,7 +69,10 @@ def fig_treemap(df: pd.DataFrame):
 
 def dashboard_app_tree_map():
     
-    df = prep(scrape_series_data())
+    df = prep(get_sp500_constituents())
+    if df.empty:
+        st.info("Cargando la composición del S&P 500, vuelve a intentarlo en unos segundos.")
+        return
     st.plotly_chart(fig_treemap(df), width='stretch')
 
 